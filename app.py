@@ -1,61 +1,25 @@
 import os
-from flask import Flask, render_template, redirect, url_for, session
+import time
+
+from flask import Flask, g, jsonify, render_template, redirect, request, url_for, session, flash
 from config_loader import load_config
+from blueprints.api import api_bp
+from blueprints.dashboard import dashboard_bp
 from blueprints.query import query_bp
 from blueprints.reports import reports_bp
 from blueprints.auth import auth_bp, login_required, permission_required, current_user
-
-
-def _run_startup_sql():
-    import re
-    import pymysql
-
-    conf_path = os.path.join('config', 'app.conf')
-    sql_path = os.path.join('initdb', 'newdb.sql')
-    if not os.path.exists(sql_path):
-        return
-    kv = {}
-    try:
-        with open(conf_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                s = line.strip()
-                if not s or s.startswith('#') or s.startswith('[') or '=' not in s:
-                    continue
-                k, v = s.split('=', 1)
-                kv[k.strip()] = v.strip()
-    except FileNotFoundError:
-        pass
-
-    host = kv.get('DB_HOST') or kv.get('host') or '127.0.0.1'
-    port = int(kv.get('DB_PORT') or kv.get('port') or 3306)
-    user = kv.get('DB_ADMIN_USER') or kv.get('user') or 'root'
-    password = kv.get('DB_ADMIN_PASSWORD') or kv.get('password') or ''
-
-    with open(sql_path, 'r', encoding='utf-8') as f:
-        sql_text = f.read()
-
-    if 'DELIMITER' in sql_text.upper():
-        raise RuntimeError('newdb.sql содержит DELIMITER — такой файл этой мини-функцией не выполняется')
-
-    sql_text = re.sub(r'/\*.*?\*/', '', sql_text, flags=re.S)  # /* ... */
-    lines = []
-    for line in sql_text.splitlines():
-        line = line.split('--')[0].strip()                     # -- ...
-        if line:
-            lines.append(line)
-    cleaned = '\n'.join(lines)
-    statements = [s.strip() for s in cleaned.split(';') if s.strip()]
-
-    conn = pymysql.connect(
-        host=host, port=port, user=user, password=password,
-        autocommit=True, charset='utf8mb4'
-    )
-    try:
-        with conn.cursor() as cur:
-            for s in statements:
-                cur.execute(s)
-    finally:
-        conn.close()
+from models.assets import init_assets
+from models.cache import init_cache, query_cache
+from models.compression import init_compression
+from models.dashboard import init_dashboard
+from models.dataversion import init_data_versions
+from models.governor import QueryRejected, QueryTimeout, init_governor, query_governor
+from models.jobs import init_jobs, report_jobs
+from models.metrics import HTTP_REQUESTS, HTTP_RESPONSE_BYTES, HTTP_SECONDS, registry
+from models.migrations import migrate_on_startup
+from models.pool import pool_stats
+from models.replicas import init_replicas, replica_router
+from models.slowlog import init_slowlog, slow_log
 
 
 def create_app():
@@ -63,13 +27,63 @@ def create_app():
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
 
     load_config(app, os.path.join('config', 'app.conf'))
+    if app.config['MIGRATIONS_ON_STARTUP']:
+        migrate_on_startup(app)
+    init_cache(app.config)
+    init_jobs(app.config)
+    init_slowlog(app.config)
+    init_governor(app.config)
+    init_replicas(app.config)
+    init_data_versions(app.config)
+    init_dashboard(app.config)
+    init_assets(app)
+    init_compression(app)
     app.config.setdefault('REPORTS_CONFIG_PATH', os.path.join(app.root_path, 'config', 'reports.json'))
+    app.config.setdefault('DASHBOARD_CONFIG_PATH', os.path.join(app.root_path, 'config', 'dashboard.json'))
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _metrics_record(response):
+        endpoint = request.endpoint or 'unmatched'
+        HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        started = g.get('metrics_started')
+        if started is not None:
+            HTTP_SECONDS.observe(time.perf_counter() - started, endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            HTTP_RESPONSE_BYTES.observe(response.content_length, endpoint)
+        return response
+
+    @app.errorhandler(QueryRejected)
+    @app.errorhandler(QueryTimeout)
+    def _query_limited(exc):
+        # 503 — не хватило мест для запроса (можно повторить), 504 — запрос прерван по времени
+        status = 503 if isinstance(exc, QueryRejected) else 504
+        if request.blueprint == 'api':
+            response = jsonify({'error': str(exc)})
+        else:
+            response = app.make_response(render_template('error.html', message=str(exc)))
+        response.status_code = status
+        if status == 503:
+            response.headers['Retry-After'] = '5'
+        return response
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(query_bp)
     app.register_blueprint(reports_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(dashboard_bp)
 
     MENU_ITEMS = [
+        {
+            'title': 'Сводка',
+            'subtitle': 'Основные показатели на одной странице',
+            'endpoint': 'dashboard.index',
+            'icon': '🧭',
+            'permissions': ['queries', 'reports_view']
+        },
         {
             'title': 'Параметризованные запросы',
             'subtitle': 'Готовые выборки и поисковые формы',
@@ -120,7 +134,24 @@ def create_app():
     @app.route('/admin')
     @permission_required('admin')
     def admin():
-        return render_template('admin.html')
+        return render_template('admin.html', pools=pool_stats(), cache=query_cache.stats(),
+                               jobs=report_jobs.stats(), limits=query_governor.stats(),
+                               replicas=replica_router.stats(),
+                               slow_queries=slow_log.recent(),
+                               slow_threshold_ms=round(slow_log.threshold * 1000))
+
+    @app.route('/admin/cache/clear', methods=['POST'])
+    @permission_required('admin')
+    def admin_cache_clear():
+        name = (request.form.get('name') or '').strip() or None
+        removed = query_cache.invalidate(name)
+        flash(f'Кэш сброшен, удалено записей: {removed}.', 'success')
+        return redirect(url_for('admin'))
+
+    @app.route('/metrics')
+    @permission_required('admin')
+    def metrics():
+        return app.response_class(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
     @app.route('/exit')
     def exit_page():
@@ -130,8 +161,6 @@ def create_app():
     return app
 
 
-# _run_startup_sql()
-
 app = create_app()
 wsgi_app = app.wsgi_app
 
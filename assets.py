@@ -0,0 +1,44 @@
+"""
+Сборка статики.
+
+Минифицирует CSS/JS из static/, кладет в static/dist копии с хешем
+содержимого в имени и сжатые варианты .gz (и .br, если установлен пакет
+brotli), записывает static/dist/manifest.json. Приложение не импортируется.
+
+    python assets.py            # собрать
+    python assets.py --clean    # собрать и удалить файлы прежних версий
+
+Нужна, если в секции [assets] config/app.conf выключена сборка при запуске.
+"""
+import argparse
+import os
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Сборка статики')
+    parser.add_argument('--static', default='static', help='каталог статики')
+    parser.add_argument('--clean', action='store_true', help='удалить собранные файлы прежних версий')
+    args = parser.parse_args(argv)
+
+    from models.assets import DIST_DIR, brotli, build
+
+    try:
+        manifest = build(args.static, clean=args.clean)
+    except OSError as exc:
+        print(f'Статика не собрана: {exc}', file=sys.stderr)
+        return 1
+    dist = os.path.join(args.static, DIST_DIR)
+    for name, built in sorted(manifest.items()):
+        size = os.path.getsize(os.path.join(args.static, built))
+        compressed = [f'{ext[1:]} {os.path.getsize(path)} Б' for ext in ('.gz', '.br')
+                      if os.path.isfile(path := os.path.join(args.static, built + ext))]
+        print(f'{name:<30} -> {built} ({size} Б{"; " + ", ".join(compressed) if compressed else ""})')
+    if brotli is None:
+        print('Пакет brotli не установлен: файлы .br не собраны.')
+    print(f'Манифест: {os.path.join(dist, "manifest.json")}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""
+Нагрузочный прогон запросов и отчетов.
+
+Поднимает приложение через create_app(), входит под dispatcher (запросы
+/query/*) и manager (отчеты из reports.json) и обращается к каждому
+обработчику из нескольких потоков. По каждому обработчику выводит задержки
+p50/p95/p99, запросы в секунду и пиковый RSS процесса за время его прогона; результат можно
+сохранить в JSON и сравнить с прошлым прогоном.
+
+    python bench.py                                  # 4 потока, 50 запросов на обработчик
+    python bench.py -c 16 -n 400 -o bench-before.json
+    python bench.py --only hard -o bench-after.json
+    python bench.py --compare bench-before.json bench-after.json
+    python bench.py --sqlite                         # без сервера, база SQLite в памяти
+
+Нужна запущенная MySQL/MariaDB из config/app.conf с базой, развернутой python migrate.py.
+С --sqlite запросы идут во встроенную базу SQLite, наполненную из миграций: так
+измеряются накладные расходы самого приложения (шаблоны, сериализация, пул, кэш)
+без сети и сервера БД; абсолютные времена запросов с MySQL не сравнимы.
+Кэш результатов на время прогона отключается (ключ --cache оставляет его).
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+USERS = {
+    'dispatcher': 'disp123',
+    'manager': 'boss123',
+}
+
+# параметры запросов каталога, которым нужен ввод пользователя (остальные берут значения по умолчанию)
+SAMPLE_ARGS: dict[str, dict[str, Any]] = {
+    'search_products': {'name': 'а', 'min_price': 0, 'max_price': 100000},
+}
+
+
+@dataclass
+class Target:
+    name: str
+    user: str
+    url: str
+
+
+@dataclass
+class Result:
+    name: str
+    url: str
+    user: str
+    requests: int = 0
+    errors: int = 0
+    rps: float = 0.0
+    mean_ms: float = 0.0
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    max_ms: float = 0.0
+    peak_rss_mb: float = 0.0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга; values отсортированы."""
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux — килобайты, в macOS — байты
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def current_rss_mb() -> float | None:
+    """Текущий RSS процесса из /proc/self/statm; None — не Linux."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class RssSampler:
+    """
+    Пиковый RSS за время блока with: текущий RSS опрашивается в фоновом потоке.
+    ru_maxrss для этого не годится — это максимум за всю жизнь процесса, и
+    каждый обработчик унаследовал бы пик предыдущих. Без /proc (macOS)
+    остается только он.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self):
+        while True:
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        if current_rss_mb() is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, et, ev, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            rss = current_rss_mb()
+            self.peak = max(self.peak, rss or 0.0)
+        else:
+            self.peak = peak_rss_mb()
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak, 1)
+
+
+def collect_targets(app) -> list[Target]:
+    from flask import url_for
+
+    from blueprints.query import provider
+    from blueprints.reports.registry import get_registry
+
+    targets = []
+    with app.test_request_context():
+        targets.append(Target('query.index', 'dispatcher', url_for('query.index')))
+        for spec in sorted(provider.catalog.values(), key=lambda s: s.path):
+            url = url_for('query.run_query', path=spec.path, **SAMPLE_ARGS.get(spec.name, {}))
+            targets.append(Target(f'query:{spec.name}', 'dispatcher', url))
+        for report in get_registry(app.config['REPORTS_CONFIG_PATH']).all():
+            defaults = {
+                p['name']: p['default'] for p in report.get('params') or []
+                if 'name' in p and p.get('default') not in (None, '')
+            }
+            url = url_for('reports.view_report', report_id=report['id'], **defaults)
+            targets.append(Target(f"report:{report['id']}", 'manager', url))
+    return targets
+
+
+def login(app, user: str):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'login': user, 'password': USERS[user]})
+    if response.status_code != 302:
+        raise RuntimeError(f'не удалось войти как {user}')
+    return client
+
+
+def check_database(app):
+    from models.db import DBContextManager
+
+    with DBContextManager(app.config) as db:
+        rows = db.select('SELECT COUNT(*) AS n FROM invoice')
+    if not rows or not rows[0]['n']:
+        raise RuntimeError('таблица invoice пуста — примените миграции: python migrate.py')
+
+
+def run_target(app, target: Target, requests: int, concurrency: int, warmup: int) -> Result:
+    clients = [login(app, target.user) for _ in range(concurrency)]
+    for client in clients:
+        for _ in range(warmup):
+            client.get(target.url, buffered=True)
+
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    remaining = [requests]
+    lock = threading.Lock()
+
+    def worker(client):
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            response = client.get(target.url, buffered=True)
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                key = str(response.status_code)
+                statuses[key] = statuses.get(key, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in clients]
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return Result(
+        name=target.name,
+        url=target.url,
+        user=target.user,
+        requests=len(ms),
+        errors=sum(n for status, n in statuses.items() if status != '200'),
+        rps=round(len(ms) / wall, 1) if wall else 0.0,
+        mean_ms=round(sum(ms) / len(ms), 2) if ms else 0.0,
+        p50_ms=round(percentile(ms, 50), 2),
+        p95_ms=round(percentile(ms, 95), 2),
+        p99_ms=round(percentile(ms, 99), 2),
+        max_ms=round(ms[-1], 2) if ms else 0.0,
+        peak_rss_mb=rss.peak_mb,
+        statuses=statuses,
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def print_results(results: list[Result]):
+    print(f"{'обработчик':<40} {'запр.':>6} {'ошиб.':>5} {'rps':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'RSS,МБ':>7}")
+    for r in results:
+        print(f'{r.name:<40} {r.requests:>6} {r.errors:>5} {r.rps:>8.1f} '
+              f'{r.p50_ms:>8.2f} {r.p95_ms:>8.2f} {r.p99_ms:>8.2f} {r.peak_rss_mb:>7.1f}')
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return '—'
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path, encoding='utf-8') as f:
+        old = {r['name']: r for r in json.load(f)['results']}
+    with open(new_path, encoding='utf-8') as f:
+        new = {r['name']: r for r in json.load(f)['results']}
+    print(f"{'обработчик':<40} {'p95 было':>9} {'стало':>9} {'Δp95':>8} "
+          f"{'rps было':>9} {'стало':>9} {'Δrps':>8}")
+    for name in sorted(old.keys() | new.keys()):
+        a, b = old.get(name), new.get(name)
+        if a is None or b is None:
+            print(f"{name:<40} {'только в ' + (new_path if a is None else old_path)}")
+            continue
+        print(f"{name:<40} {a['p95_ms']:>9.2f} {b['p95_ms']:>9.2f} {_change(a['p95_ms'], b['p95_ms']):>8} "
+              f"{a['rps']:>9.1f} {b['rps']:>9.1f} {_change(a['rps'], b['rps']):>8}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон запросов и отчетов')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='число одновременных клиентов')
+    parser.add_argument('-n', '--requests', type=int, default=50, help='запросов на обработчик')
+    parser.add_argument('--warmup', type=int, default=1, help='прогревочных запросов на клиента')
+    parser.add_argument('--only', action='append', default=[], metavar='TEXT',
+                        help='только обработчики, в имени или адресе которых есть TEXT')
+    parser.add_argument('--cache', action='store_true', help='не отключать кэш результатов')
+    parser.add_argument('--sqlite', nargs='?', const=':memory:', metavar='PATH',
+                        help='встроенная база SQLite (файл или :memory:) вместо MySQL')
+    parser.add_argument('-o', '--output', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='сравнить два сохраненных прогона')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare)
+
+    if args.sqlite:
+        # до импорта app: приложение создается при импорте модуля
+        os.environ['DB_BACKEND'] = 'sqlite'
+        os.environ['DB_SQLITE_PATH'] = args.sqlite
+
+    from app import create_app
+    from models.cache import query_cache
+
+    app = create_app()
+    if not args.cache:
+        query_cache.configure(enabled=False)
+    try:
+        check_database(app)
+    except Exception as exc:
+        print(f'База данных недоступна: {exc}', file=sys.stderr)
+        print('Запустите MySQL/MariaDB из config/app.conf и примените миграции: python migrate.py.', file=sys.stderr)
+        return 2
+
+    targets = [
+        t for t in collect_targets(app)
+        if not args.only or any(s in t.name or s in t.url for s in args.only)
+    ]
+    results = []
+    for target in targets:
+        results.append(run_target(app, target, args.requests, args.concurrency, args.warmup))
+
+    print_results(results)
+    if args.output:
+        data = {
+            'meta': {
+                'started_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'revision': _git_revision(),
+                'python': platform.python_version(),
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'warmup': args.warmup,
+                'cache': args.cache,
+                'backend': app.config['DB_BACKEND'],
+            },
+            'results': [asdict(r) for r in results],
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f'\nРезультаты сохранены в {args.output}')
+    return 1 if any(r.errors for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+from flask import Blueprint
+
+# JSON API для дашбордов: результаты запросов и отчетов в колоночном виде
+api_bp = Blueprint('api', __name__, url_prefix='/api')
+
+from . import views  # noqa: E402,F401
+
+__all__ = ['api_bp']
@@ -0,0 +1,193 @@
+# blueprints/api/views.py
+from functools import wraps
+from typing import Any, Callable
+
+from flask import current_app, jsonify, request, url_for
+
+from blueprints.auth import current_user
+from blueprints.dashboard.views import run_dashboard
+from blueprints.query import provider
+from blueprints.reports.background import job_cache_key, runs_in_background, submit_report_job
+from blueprints.reports.registry import get_registry
+from models.cache import query_cache
+from models.columnar import MIMETYPES, columnar_document, compress, msgpack_available, serialize
+from models.db import DBContextManager
+from models.jobs import CANCELLED, DONE, FAILED, Job, JobQueueFull, report_jobs
+from models.sql_provider import QueryParamError
+
+from . import api_bp
+
+# ответы меньше порога не сжимаются: выигрыш меньше накладных расходов gzip
+MIN_COMPRESS_BYTES = 1024
+
+
+def _error(status: int, message: str):
+    response = jsonify({'error': message})
+    response.status_code = status
+    return response
+
+
+def api_permission_required(permission: str):
+    """Как permission_required, но вместо перенаправления отвечает 401/403 в JSON."""
+    def decorator(view: Callable):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user = current_user()
+            if not user:
+                return _error(401, 'Требуется авторизация.')
+            if permission not in user.get('permissions', []):
+                return _error(403, 'Недостаточно прав.')
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _negotiate() -> str | None:
+    """Формат ответа из ?format=json|msgpack или заголовка Accept; None — формат недоступен."""
+    fmt = (request.args.get('format') or '').lower()
+    if fmt:
+        if fmt not in MIMETYPES or (fmt == 'msgpack' and not msgpack_available()):
+            return None
+        return fmt
+    if msgpack_available():
+        best = request.accept_mimetypes.best_match(
+            ['application/json', 'application/msgpack', 'application/x-msgpack'], 'application/json'
+        )
+        if best != 'application/json':
+            return 'msgpack'
+    return 'json'
+
+
+def _document_response(build: Callable[[], dict[str, Any]]):
+    fmt = _negotiate()
+    if fmt is None:
+        return _error(406, 'Формат недоступен; поддерживаются: json'
+                      + (', msgpack' if msgpack_available() else ''))
+    body = serialize(build(), fmt)
+    response = current_app.response_class(body, mimetype=MIMETYPES[fmt])
+    if len(body) >= MIN_COMPRESS_BYTES and request.accept_encodings['gzip']:
+        response.set_data(compress(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
+
+
+def _columnar_response(result, **extra: Any):
+    return _document_response(
+        lambda: columnar_document(result.columns, result.types, result.rows, **extra)
+    )
+
+
+@api_bp.route('/query/<path:name>')
+@api_permission_required('queries')
+def query_result(name: str):
+    # запрос ищется по имени .sql-файла, а также по адресу из заголовка "-- path:"
+    spec = provider.spec(name) or provider.by_path(name)
+    if spec is None:
+        return _error(404, f'Запрос {name} не найден.')
+    try:
+        params = spec.bind(request.args)
+    except QueryParamError as exc:
+        return _error(400, str(exc))
+
+    def load():
+        with DBContextManager(current_app.config) as db:
+            for sql in spec.statements[:-1]:
+                db.execute(sql, params, spec.name)
+            return db.select(spec.statements[-1], params, spec.name, spec.timeout_ms, spec.max_rows)
+
+    result = query_cache.get_or_load(spec.name, params, load,
+                                     provider.cache_ttl(spec.name))
+    return _columnar_response(result, name=spec.name, title=spec.title, params=params or {},
+                              truncated=result.truncated)
+
+
+@api_bp.route('/reports/<report_id>')
+@api_permission_required('reports_view')
+def report_result(report_id: str):
+    report = get_registry(current_app.config['REPORTS_CONFIG_PATH']).get(report_id)
+    if not report:
+        return _error(404, f'Отчет {report_id} не найден.')
+    sql = report.get('sql')
+    if not sql:
+        return _error(400, 'Для отчета не задан SQL-запрос.')
+    parameters = report.get('params') or []
+    values = {
+        p['name']: (request.args.get(p['name']) or p.get('default') or '')
+        for p in parameters
+    }
+    query_params = values if parameters else None
+    name = f'report:{report_id}'
+    if runs_in_background(report, bool(request.args.get('background'))):
+        # долгие отчеты — через очередь фоновых задач, как и на странице отчета
+        result = query_cache.get(job_cache_key(report_id, query_params))
+        if result is None:
+            try:
+                job = submit_report_job(report_id, report, query_params)
+            except JobQueueFull as exc:
+                response = _error(503, str(exc))
+                response.headers['Retry-After'] = '5'
+                return response
+            if job.status != DONE:
+                return _job_accepted(job)
+            result = job.result
+        return _columnar_response(result, name=report_id, title=report.get('title') or report_id,
+                                  params=values, truncated=result.truncated)
+
+    def load():
+        with DBContextManager(current_app.config) as db:
+            return db.select(sql, query_params, name, report.get('timeout_ms'), report.get('max_rows'))
+
+    result = query_cache.get_or_load(name, query_params, load,
+                                     report.get('cache_ttl'))
+    return _columnar_response(result, name=report_id, title=report.get('title') or report_id,
+                              params=values, truncated=result.truncated)
+
+
+def _job_accepted(job: Job):
+    # 202: результат будет по адресу из Location (опрашивать, пока статус не done)
+    location = url_for('api.job_result', job_id=job.id)
+    response = jsonify({'job': job.to_dict(), 'location': location})
+    response.status_code = 202
+    response.headers['Location'] = location
+    response.headers['Retry-After'] = '2'
+    return response
+
+
+@api_bp.route('/jobs/<job_id>')
+@api_permission_required('reports_view')
+def job_result(job_id: str):
+    job = report_jobs.get(job_id)
+    if not job:
+        return _error(404, 'Фоновая задача не найдена или ее результат устарел.')
+    if job.status == DONE:
+        result = job.result
+        return _columnar_response(result, name=job.title, job=job.to_dict(), truncated=result.truncated)
+    if job.status == FAILED:
+        return _error(500, f'Отчет не выполнен: {job.error}')
+    if job.status == CANCELLED:
+        return _error(410, 'Задача отменена.')
+    return _job_accepted(job)
+
+
+@api_bp.route('/dashboard')
+def dashboard():
+    # панели, недоступные пользователю, в сводку не попадают (см. build_panels)
+    if not current_user():
+        return _error(401, 'Требуется авторизация.')
+
+    def build():
+        panels, seconds = run_dashboard()
+        documents = []
+        for panel in panels:
+            doc = panel.to_dict()
+            if panel.result is not None:
+                result = panel.result
+                doc.update(columnar_document(result.columns, result.types, result.rows,
+                                             truncated=result.truncated))
+            documents.append(doc)
+        return {'seconds': round(seconds, 3), 'panels': documents}
+
+    return _document_response(build)
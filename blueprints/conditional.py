@@ -0,0 +1,96 @@
+# blueprints/conditional.py
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Iterable
+
+import pymysql
+from flask import current_app, request, session
+
+from models.assets import asset_manifest
+from models.backend import get_backend
+from models.db import DBContextManager
+from models.pool import PoolTimeout
+from models.dataversion import DataVersion, data_versions
+
+# отметка версии шаблонов: после выкладки новых шаблонов старые ETag не совпадут
+_templates_stamp: str | None = None
+
+
+def _templates_version() -> str:
+    global _templates_stamp
+    if _templates_stamp is None:
+        root = os.path.join(current_app.root_path, current_app.template_folder or 'templates')
+        latest = 0.0
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                latest = max(latest, os.path.getmtime(os.path.join(dirpath, filename)))
+        _templates_stamp = str(int(latest))
+    return _templates_stamp
+
+
+def data_version(sqls: Iterable[str]) -> DataVersion | None:
+    """
+    Версия данных таблиц запроса для условного GET; None — страница
+    отдается как обычно (POST, версии отключены, база не ответила).
+    Версия читается с реплики, которую выбрал бы обычный SELECT; строки
+    под нее берутся оттуда же через versioned_db.
+    """
+    if request.method not in ('GET', 'HEAD') or not data_versions.enabled:
+        return None
+    if not get_backend(current_app.config).information_schema:
+        return None
+    try:
+        with DBContextManager(current_app.config, governed=False) as db:
+            return data_versions.version(db, sqls)
+    except (pymysql.MySQLError, PoolTimeout) as exc:
+        current_app.logger.warning('Не удалось получить версию данных: %s', exc)
+        return None
+
+
+def versioned_db(version: DataVersion | None) -> DBContextManager:
+    """
+    Блок для выборки результата под версией: с того же сервера, с которого
+    прочитана версия. Иначе отстающая реплика вернула бы строки до изменения,
+    и они закэшировались бы под более новой версией.
+    """
+    config = current_app.config
+    if version is None:
+        return DBContextManager(config)
+    return DBContextManager(config, replica=version.server, primary=version.server is None)
+
+
+def _etag(version: DataVersion) -> str:
+    # страница зависит от адреса с параметрами, пользователя, шаблонов и адресов статики
+    login = (session.get('user') or {}).get('login') or ''
+    key = '\0'.join((request.full_path, login, version.token, _templates_version(), asset_manifest.version))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def not_modified(version: DataVersion | None):
+    """Ответ 304, если у клиента актуальная страница; иначе None — страницу нужно построить."""
+    if version is None or session.get('_flashes'):
+        return None
+    etag = _etag(version)
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    else:
+        since = request.if_modified_since
+        fresh = bool(since and version.last_modified and since.timestamp() >= int(version.last_modified))
+    if not fresh:
+        return None
+    return conditional(current_app.response_class(status=304), version)
+
+
+def conditional(response, version: DataVersion | None):
+    """Ставит ETag и Last-Modified на готовую страницу (потоковые ответы не помечаются)."""
+    if version is None or response.status_code not in (200, 304) or response.is_streamed:
+        return response
+    response.set_etag(_etag(version), weak=True)
+    if version.last_modified:
+        response.last_modified = datetime.fromtimestamp(int(version.last_modified), timezone.utc)
+    # страница своя у каждого пользователя и каждый раз сверяется с сервером
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
+
+from . import views  # noqa: E402,F401
+
+__all__ = ['dashboard_bp']
@@ -0,0 +1,143 @@
+# blueprints/dashboard/views.py
+import json
+import os
+import time
+from typing import Any
+
+from flask import current_app, render_template, url_for
+
+from blueprints.auth import current_user, login_required
+from blueprints.query import provider
+from blueprints.reports.registry import get_registry
+from models.cache import query_cache
+from models.dashboard import Panel, dashboard_runner
+from models.db import DBContextManager
+from models.sql_provider import QuerySpec
+
+from . import dashboard_bp
+
+# описание панелей перечитывается, только если файл изменился
+_panels_cache: tuple[tuple[str, float] | None, list[dict[str, Any]]] = (None, [])
+
+
+def _panel_definitions() -> list[dict[str, Any]]:
+    global _panels_cache
+    path = current_app.config['DASHBOARD_CONFIG_PATH']
+    try:
+        stamp = (path, os.stat(path).st_mtime)
+    except OSError:
+        return []
+    if _panels_cache[0] != stamp:
+        with open(path, encoding='utf-8') as f:
+            panels = json.load(f)
+        _panels_cache = (stamp, [p for p in panels if isinstance(p, dict)])
+    return _panels_cache[1]
+
+
+def _time_limit_ms(own: int | None, timeout: float) -> int:
+    # сервер прерывает запрос не позже срока панели
+    limit = int(timeout * 1000)
+    return min(own, limit) if own else limit
+
+
+def _query_panel(config, spec: QuerySpec, raw: dict[str, Any], timeout: float) -> Panel:
+    values = {key: str(value) for key, value in raw.items()}
+    timeout_ms = _time_limit_ms(spec.timeout_ms, timeout)
+
+    def load():
+        params = spec.bind(values)
+
+        def select():
+            with DBContextManager(config) as db:
+                for sql in spec.statements[:-1]:
+                    db.execute(sql, params, spec.name)
+                return db.select(spec.statements[-1], params, spec.name, timeout_ms, spec.max_rows)
+
+        # ключ кэша тот же, что у JSON API
+        return query_cache.get_or_load(spec.name, params, select, provider.cache_ttl(spec.name))
+
+    return Panel(f'query:{spec.name}', spec.title or spec.name, load, timeout,
+                 url_for('query.run_query', path=spec.path, **values))
+
+
+def _report_panel(config, report: dict[str, Any], raw: dict[str, Any], timeout: float) -> Panel:
+    report_id = report['id']
+    parameters = report.get('params') or []
+    values = {p['name']: (raw.get(p['name']) or p.get('default') or '') for p in parameters}
+    query_params = values if parameters else None
+    name = f'report:{report_id}'
+    timeout_ms = _time_limit_ms(report.get('timeout_ms'), timeout)
+
+    def load():
+        def select():
+            with DBContextManager(config) as db:
+                return db.select(report['sql'], query_params, name, timeout_ms, report.get('max_rows'))
+
+        return query_cache.get_or_load(name, query_params, select, report.get('cache_ttl'))
+
+    return Panel(name, report.get('title') or report_id, load, timeout,
+                 url_for('reports.view_report', report_id=report_id, **values))
+
+
+def _failed_panel(key: str, title: str, message: str, timeout: float) -> Panel:
+    def load():
+        raise LookupError(message)
+
+    return Panel(key, title, load, timeout)
+
+
+def build_panels() -> list[Panel]:
+    """
+    Панели из config/dashboard.json, доступные текущему пользователю.
+    Элемент: {"query": "<имя .sql>"} или {"report": "<id>"}, необязательно
+    "params", "title" и "timeout" (секунды). Панели выполняются в потоках
+    без контекста запроса, поэтому идут в счет общего лимита одновременных
+    запросов, но не личного лимита пользователя: их число и так ограничено
+    пулом сводки.
+    """
+    config = current_app.config
+    permissions = set((current_user() or {}).get('permissions', []))
+    default_timeout = float(config.get('DASHBOARD_PANEL_TIMEOUT', 10))
+    registry = get_registry(config['REPORTS_CONFIG_PATH'])
+    panels = []
+    for item in _panel_definitions():
+        timeout = float(item.get('timeout') or default_timeout)
+        raw = item.get('params') or {}
+        if item.get('query'):
+            if 'queries' not in permissions:
+                continue
+            spec = provider.spec(item['query'])
+            if spec is None:
+                panels.append(_failed_panel(f"query:{item['query']}", item.get('title') or item['query'],
+                                            f"Запрос {item['query']} не найден.", timeout))
+                continue
+            panel = _query_panel(config, spec, raw, timeout)
+        elif item.get('report'):
+            if 'reports_view' not in permissions:
+                continue
+            report = registry.get(item['report'])
+            if not report or not report.get('sql'):
+                panels.append(_failed_panel(f"report:{item['report']}", item.get('title') or item['report'],
+                                            f"Отчет {item['report']} не найден.", timeout))
+                continue
+            panel = _report_panel(config, report, raw, timeout)
+        else:
+            continue
+        if item.get('title'):
+            panel.title = item['title']
+        panels.append(panel)
+    return panels
+
+
+def run_dashboard() -> tuple[list, float]:
+    """Результаты всех панелей и общее время сводки, секунды."""
+    started = time.perf_counter()
+    results = dashboard_runner.run(build_panels())
+    return results, time.perf_counter() - started
+
+
+@dashboard_bp.route('/')
+@login_required
+def index():
+    panels, seconds = run_dashboard()
+    return render_template('dashboard.html', panels=panels, seconds=seconds)
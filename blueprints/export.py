@@ -0,0 +1,33 @@
+# blueprints/export.py
+from urllib.parse import quote
+
+from flask import current_app, request, stream_with_context, url_for
+
+from models.export import FORMATS, export_chunks
+
+
+def export_format() -> str | None:
+    """Формат выгрузки из ?format=csv|ndjson|xlsx или None для обычной страницы."""
+    fmt = (request.args.get('format') or '').lower()
+    return fmt if fmt in FORMATS else None
+
+
+def export_response(filename: str, fmt: str, rows, title: str = 'Данные'):
+    """
+    Потоковая выгрузка: rows — генератор строк (обычно stream_rows), поэтому
+    результат целиком в памяти не собирается.
+    """
+    body = stream_with_context(export_chunks(fmt, rows, title))
+    response = current_app.response_class(body, content_type=FORMATS[fmt])
+    response.headers['Content-Disposition'] = (
+        f"attachment; filename=\"{filename}.{fmt}\"; filename*=UTF-8''{quote(filename)}.{fmt}"
+    )
+    return response
+
+
+def export_links() -> dict[str, str]:
+    """Ссылки на выгрузку текущего результата во всех форматах."""
+    skip = ('after', 'before', 'stream', 'format')
+    args = {k: v for k, v in request.values.items() if k not in skip}
+    view_args = request.view_args or {}
+    return {fmt: url_for(request.endpoint, **view_args, **args, format=fmt) for fmt in FORMATS}
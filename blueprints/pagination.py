@@ -0,0 +1,26 @@
+# blueprints/pagination.py
+from flask import request, url_for
+
+from models.pagination import Page
+
+_CURSOR_ARGS = ('after', 'before', 'stream')
+
+
+def requested_cursor() -> tuple[str | None, str | None]:
+    return request.args.get('after') or None, request.args.get('before') or None
+
+
+def page_links(page: Page) -> dict[str, str | None]:
+    """Ссылки на соседние страницы с сохранением параметров текущего запроса."""
+    args = {k: v for k, v in request.values.items() if k not in _CURSOR_ARGS}
+    view_args = request.view_args or {}
+
+    def link(**extra):
+        return url_for(request.endpoint, **view_args, **args, **extra)
+
+    return {
+        'next_url': link(after=page.next_token) if page.next_token else None,
+        'prev_url': link(before=page.prev_token) if page.prev_token else None,
+        'first_url': link() if page.prev_token else None,
+        'all_url': link(stream=1),
+    }
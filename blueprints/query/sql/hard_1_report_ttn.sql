@@ -1,3 +1,10 @@
+-- title: Отчёт по ТТН
+-- description: Сводка по оформленным накладным.
+-- icon: 📦
+-- order: 90
+-- path: hard/1
+-- keyset: invoice_date, ttn_no
+-- page_size: 100
 SELECT i.id AS ttn_no,
        p.full_name AS employee,
        i.invoice_date,
@@ -1,3 +1,10 @@
+-- title: Команда по договору клиента
+-- description: Кто обслуживает выбранный договор.
+-- icon: 🤝
+-- order: 100
+-- path: hard/2
+-- param: contract str = C-1001 | Номер договора | C-1001
+-- cache_ttl: 86400
 SELECT DISTINCT p.full_name
 FROM invoice i
 JOIN personal p ON p.id=i.personal_id
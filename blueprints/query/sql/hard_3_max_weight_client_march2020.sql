@@ -1,10 +1,15 @@
+-- title: Клиент с максимальным весом в марте 2020
+-- description: Кто заказал больше всего в марте.
+-- icon: 🏆
+-- order: 110
+-- path: hard/3
+-- cache_ttl: 86400
 SELECT c.*
 FROM client c
 JOIN (
-  SELECT i.client_id, SUM(i.total_weight_kg) AS w
-  FROM invoice i
-  WHERE i.invoice_date >= '2020-03-01' AND i.invoice_date < '2020-04-01'
-  GROUP BY i.client_id
+  SELECT s.client_id, s.total_weight_kg AS w
+  FROM client_month_summary s
+  WHERE s.month_start = '2020-03-01'
   ORDER BY w DESC
   LIMIT 1
-) t ON t.client_id=c.id;
\ No newline at end of file
+) t ON t.client_id=c.id;
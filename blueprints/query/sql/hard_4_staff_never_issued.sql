@@ -1,3 +1,8 @@
+-- title: Сотрудники без оформленных ТТН
+-- description: Кто ни разу не оформлял накладные.
+-- icon: 🚧
+-- order: 120
+-- path: hard/4
 SELECT p.full_name
 FROM personal p
 LEFT JOIN invoice i ON i.personal_id=p.id
@@ -1,3 +1,9 @@
+-- title: Не оформляли ТТН в марте 2020
+-- description: Сотрудники, у которых в марте не было отгрузок.
+-- icon: 📆
+-- order: 130
+-- path: hard/5
+-- cache_ttl: 86400
 SELECT p.full_name
 FROM personal p
 LEFT JOIN (
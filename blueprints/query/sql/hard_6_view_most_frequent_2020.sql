@@ -1,11 +1,16 @@
-CREATE OR REPLACE VIEW v_client_counts_2020 AS
-SELECT client_id, COUNT(*) AS trips
-FROM invoice
-WHERE YEAR(invoice_date)=2020
-GROUP BY client_id;
-
-SELECT c.*, v.trips
-FROM v_client_counts_2020 v
-JOIN client c ON c.id=v.client_id
-ORDER BY v.trips DESC
-LIMIT 1;
\ No newline at end of file
+-- title: Клиент с частыми поставками 2020
+-- description: Поиск самых активных клиентов года.
+-- icon: 🏁
+-- order: 140
+-- path: hard/6
+-- cache_ttl: 86400
+SELECT c.*, t.trips
+FROM client c
+JOIN (
+  SELECT s.client_id, SUM(s.trip_count) AS trips
+  FROM client_month_summary s
+  WHERE s.month_start >= '2020-01-01' AND s.month_start < '2021-01-01'
+  GROUP BY s.client_id
+  ORDER BY trips DESC
+  LIMIT 1
+) t ON t.client_id=c.id;
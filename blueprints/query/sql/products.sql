@@ -1,4 +1,10 @@
+-- title: Все товары
+-- description: Выгрузить полный каталог запасных частей.
+-- icon: 🚛
+-- order: 20
+-- path: all
+-- keyset: id
+-- page_size: 100
 SELECT id, name, price, category
 FROM product
-ORDER BY id
-LIMIT 1000;
\ No newline at end of file
+ORDER BY id;
@@ -1,6 +1,17 @@
+-- title: Поиск товаров
+-- description: Фильтр по названию запчасти и диапазону цен.
+-- icon: 🚗
+-- order: 10
+-- path: run
+-- param: name like | Название содержит | например, тормозные колодки
+-- param: min_price float? min=0 | Мин. цена | 0
+-- param: max_price float? min=0 | Макс. цена | 1000
+-- check: min_price <= max_price
+-- keyset: price, id
+-- page_size: 100
 SELECT id, name, price, category
 FROM product
 WHERE (%(name)s IS NULL OR name LIKE %(name)s)
-  AND price BETWEEN %(min_price)s AND %(max_price)s
-ORDER BY price ASC
-LIMIT 100;
\ No newline at end of file
+  AND (%(min_price)s IS NULL OR price >= %(min_price)s)
+  AND (%(max_price)s IS NULL OR price <= %(max_price)s)
+ORDER BY price ASC, id ASC;
\ No newline at end of file
@@ -1,3 +1,9 @@
+-- title: Сотрудники, принятые в марте 2020
+-- description: Кто вышел в команду во время весеннего набора.
+-- icon: 🧑‍🔧
+-- order: 30
+-- path: simple/1
+-- cache_ttl: 86400
 SELECT full_name, position
 FROM personal
 WHERE hired_at >= '2020-03-01' AND hired_at < '2020-04-01';
\ No newline at end of file
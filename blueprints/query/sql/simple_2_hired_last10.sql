@@ -1,3 +1,9 @@
+-- title: Сотрудники последних 10 дней
+-- description: Новые специалисты за последние десять дней.
+-- icon: ⏱️
+-- order: 40
+-- path: simple/2
+-- cache: off
 SELECT full_name, position, hired_at
 FROM personal
 WHERE hired_at >= (CURRENT_DATE - INTERVAL 10 DAY);
\ No newline at end of file
@@ -1,3 +1,10 @@
+-- title: Госномера по серии
+-- description: Вывести номера транспорта по серии.
+-- icon: 🛣️
+-- order: 50
+-- path: simple/3
+-- param: series str = HT | Серия номера | HT
+-- limit: 1000
 SELECT plate_no
 FROM vehicle
 WHERE plate_no LIKE CONCAT('%%', %(series)s, '%%');
\ No newline at end of file
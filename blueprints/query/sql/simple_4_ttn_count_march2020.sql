@@ -1,3 +1,9 @@
-SELECT COUNT(*) AS ttn_count
-FROM invoice
-WHERE invoice_date >= '2020-03-01' AND invoice_date < '2020-04-01';
\ No newline at end of file
+-- title: Количество ТТН за март 2020
+-- description: Сколько товарно-транспортных накладных выписано.
+-- icon: 📑
+-- order: 60
+-- path: simple/4
+-- cache_ttl: 86400
+SELECT COALESCE(SUM(trip_count), 0) AS ttn_count
+FROM client_month_summary
+WHERE month_start = '2020-03-01';
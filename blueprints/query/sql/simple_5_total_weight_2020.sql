@@ -1,6 +1,12 @@
-SELECT c.full_name, SUM(i.total_weight_kg) AS total_weight_kg
-FROM client c
-JOIN invoice i ON i.client_id=c.id
-WHERE YEAR(i.invoice_date)=2020
+-- title: Суммарный вес отгрузок 2020
+-- description: Вес отгрузок по клиентам за 2020 год.
+-- icon: ⚖️
+-- order: 70
+-- path: simple/5
+-- cache_ttl: 86400
+SELECT c.full_name, SUM(s.total_weight_kg) AS total_weight_kg
+FROM client_month_summary s
+JOIN client c ON c.id=s.client_id
+WHERE s.month_start >= '2020-01-01' AND s.month_start < '2021-01-01'
 GROUP BY c.id
-ORDER BY total_weight_kg DESC;
\ No newline at end of file
+ORDER BY total_weight_kg DESC;
@@ -1,3 +1,8 @@
+-- title: Самый молодой сотрудник
+-- description: Быстрый поиск самого молодого специалиста.
+-- icon: 🎯
+-- order: 80
+-- path: simple/6
 SELECT full_name, birth_date
 FROM personal
 WHERE birth_date IS NOT NULL
@@ -0,0 +1,52 @@
+# blueprints/reports/background.py
+from typing import Any
+
+from flask import current_app
+
+from blueprints.auth import current_user
+from models.cache import normalize_params, query_cache
+from models.db import DBContextManager
+from models.jobs import Job, report_jobs
+
+from .registry import ReportDefinition
+
+
+def is_heavy(report: ReportDefinition) -> bool:
+    """Оценка при создании отчета больше порога — выполнять только в фоне."""
+    threshold = current_app.config.get('REPORT_BACKGROUND_ROWS', 0)
+    rows = (report.get('estimate') or {}).get('rows')
+    return bool(threshold and rows and rows >= threshold)
+
+
+def runs_in_background(report: ReportDefinition, requested: bool = False) -> bool:
+    """Отчет выполняется фоновой задачей: по запросу, по описанию ("background") или по оценке."""
+    return requested or bool(report.get('background')) or is_heavy(report)
+
+
+def job_cache_key(report_id: str, query_params: dict[str, Any] | None) -> tuple:
+    # ключ и задачи (дедупликация), и ее результата в кэше
+    return f'report:{report_id}', normalize_params(query_params)
+
+
+def submit_report_job(report_id: str, report: ReportDefinition,
+                      query_params: dict[str, Any] | None) -> Job:
+    """Ставит отчет в фоновую очередь (или возвращает такую же задачу); JobQueueFull — мест нет."""
+    cache_key = job_cache_key(report_id, query_params)
+    config = current_app.config
+    query = report['sql']
+
+    def run(job):
+        # фоновая задача идет в счет лимита одновременных запросов ее автора
+        with DBContextManager(config, user=job.owner) as db:
+            job.set_cancel_hook(db.cancel_hook())
+            rows = db.select(query, query_params, f'report:{report_id}',
+                             report.get('timeout_ms'), report.get('max_rows'))
+        query_cache.set(cache_key, rows, report.get('cache_ttl'))
+        return rows
+
+    user = current_user() or {}
+    # готовый результат живет не дольше, чем разрешает cache_ttl отчета
+    cache_ttl = report.get('cache_ttl')
+    return report_jobs.submit(cache_key, run, owner=user.get('login'),
+                              title=report.get('title') or report_id,
+                              ttl=None if cache_ttl is None else float(cache_ttl))
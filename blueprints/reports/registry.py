@@ -0,0 +1,131 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any
+
+try:  # межпроцессная блокировка доступна только на POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+ReportDefinition = dict[str, Any]
+
+
+class DuplicateReportError(ValueError):
+    """Отчет с таким идентификатором уже существует."""
+
+
+class ReportRegistry:
+    """
+    Кэш описаний отчетов из reports.json с индексом по id.
+    Файл перечитывается, только если изменились его mtime, inode или размер;
+    запись идет во временный файл с последующим атомарным переименованием.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp: tuple[int, int, int] | None = None
+        self._reports: list[ReportDefinition] = []
+        self._index: dict[str, ReportDefinition] = {}
+
+    def _current_stamp(self) -> tuple[int, int, int] | None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def _read(self) -> list[ReportDefinition]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if isinstance(data, list):
+                    return data
+        except (OSError, json.JSONDecodeError):
+            pass
+        return []
+
+    def _set(self, reports: list[ReportDefinition], stamp):
+        self._reports = reports
+        self._index = {item['id']: item for item in reports if item.get('id')}
+        self._stamp = stamp
+
+    def _refresh(self):
+        stamp = self._current_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+        with self._lock:
+            stamp = self._current_stamp()
+            if stamp is None:
+                self._set([], None)
+            elif stamp != self._stamp:
+                self._set(self._read(), stamp)
+
+    def all(self) -> list[ReportDefinition]:
+        self._refresh()
+        return self._reports
+
+    def get(self, report_id: str) -> ReportDefinition | None:
+        self._refresh()
+        return self._index.get(report_id)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, reports: list[ReportDefinition]):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix='.reports-', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp создает файл с правами 0600 — сохраняем права прежнего файла
+            try:
+                mode = stat.S_IMODE(os.stat(self.path).st_mode)
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def add(self, report: ReportDefinition) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock, self._file_lock():
+            # перечитываем под блокировкой, чтобы не потерять отчеты других процессов
+            reports = self._read() if self._current_stamp() else []
+            if any(item.get('id') == report['id'] for item in reports):
+                raise DuplicateReportError(report['id'])
+            reports = reports + [report]
+            self._write(reports)
+            self._set(reports, self._current_stamp())
+
+
+_registries: dict[str, ReportRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(path: str) -> ReportRegistry:
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = _registries[path] = ReportRegistry(path)
+    return registry
@@ -2,9 +2,13 @@ import json
 import os
 from typing import Any
 
+import pymysql
 from flask import (
+    abort,
     current_app,
     flash,
+    jsonify,
+    make_response,
     redirect,
     render_template,
     request,
@@ -12,12 +16,20 @@ from flask import (
 )
 
 from blueprints.auth import current_user, login_required, permission_required
+from blueprints.conditional import conditional, data_version, not_modified, versioned_db
+from blueprints.export import export_format, export_links, export_response
+from blueprints.pagination import page_links, requested_cursor
+from blueprints.streaming import render_streamed, stream_rows, streaming_requested
+from models.cache import query_cache
+from models.cost import CostCheckUnavailable, CostEstimate, estimate, is_select, placeholders
 from models.db import DBContextManager
+from models.governor import QueryRejected, QueryTimeout
+from models.jobs import JobQueueFull, report_jobs
+from models.pagination import DEFAULT_PAGE_SIZE, parse_keys
 
 from . import reports_bp
-
-
-ReportDefinition = dict[str, Any]
+from .background import job_cache_key, runs_in_background, submit_report_job
+from .registry import DuplicateReportError, ReportDefinition, ReportRegistry, get_registry
 
 
 def _storage_path() -> str:
@@ -26,32 +38,16 @@ def _storage_path() -> str:
     )
 
 
-def _load_reports() -> list[ReportDefinition]:
-    path = _storage_path()
-    if not os.path.exists(path):
-        return []
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-    except (OSError, json.JSONDecodeError):
-        pass
-    return []
+def _registry() -> ReportRegistry:
+    return get_registry(_storage_path())
 
 
-def _save_reports(reports: list[ReportDefinition]) -> None:
-    path = _storage_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(reports, f, ensure_ascii=False, indent=2)
+def _load_reports() -> list[ReportDefinition]:
+    return _registry().all()
 
 
 def _find_report(report_id: str) -> ReportDefinition | None:
-    for item in _load_reports():
-        if item.get('id') == report_id:
-            return item
-    return None
+    return _registry().get(report_id)
 
 
 @reports_bp.before_request
@@ -102,24 +98,132 @@ def view_report(report_id: str):
 
     should_execute = not parameters or request.method == 'POST' or any(provided.values())
     rows: list[dict[str, Any]] | None = None
+    page: dict[str, str | None] | None = None
+    exports: dict[str, str] | None = None
+    version = None
     if should_execute:
         query = report.get('sql')
         if not query:
             flash('Для отчета не задан SQL-запрос.', 'error')
             return redirect(url_for('reports.list_reports'))
 
+        query_params = params_values if parameters else None
+        fmt = export_format()
+        if fmt:
+            rows_iter = stream_rows(query, query_params, f'report:{report_id}',
+                                    timeout_ms=report.get('timeout_ms'))
+            return export_response(report_id, fmt, rows_iter, report.get('title') or report_id)
+        if runs_in_background(report, bool(request.values.get('background'))):
+            # готовый результат фоновой задачи показывается сразу, иначе ставится новая задача
+            rows = query_cache.get(job_cache_key(report_id, query_params))
+            if rows is None:
+                submitted = _submit_report_job(report_id, report, query_params)
+                if submitted is not None:
+                    return submitted
+            return render_template(
+                'reports/view.html', report=report, params=parameters, values=params_values, rows=rows,
+                page=None, exports=export_links(),
+            )
+        # повторный GET без изменений в таблицах отчета — 304 без выполнения запроса
+        version = data_version([query])
+        cached = not_modified(version)
+        if cached is not None:
+            return cached
+        exports = export_links()
+        if streaming_requested(bool(report.get('stream'))):
+            # потоковый режим: строки выводятся по мере чтения, результат не кэшируется
+            return render_streamed(
+                'reports/view.html', report=report, params=parameters, values=params_values,
+                rows=stream_rows(query, query_params, f'report:{report_id}',
+                                 timeout_ms=report.get('timeout_ms')),
+                exports=exports,
+            )
+
+        # необязательная постраничная выдача: "keyset" и "page_size" в описании отчета
+        keys = parse_keys(report.get('keyset'))
+        after, before = requested_cursor() if keys else (None, None)
+        page_size = int(report.get('page_size') or DEFAULT_PAGE_SIZE)
+        cache_params = query_params
+        if keys:
+            cache_params = {**(query_params or {}), '_after': after, '_before': before}
+        if version:
+            cache_params = {**(cache_params or {}), '_version': version.token}
+
+        def load():
+            # строки под версией данных — с того же сервера, что и версия
+            with versioned_db(version) as db:
+                if keys:
+                    return db.select_page(query, query_params, keys, after, before, page_size,
+                                          name=f'report:{report_id}', timeout_ms=report.get('timeout_ms'))
+                return db.select(query, query_params, f'report:{report_id}',
+                                 report.get('timeout_ms'), report.get('max_rows'))
+
         try:
-            with DBContextManager(current_app.config) as db:
-                rows = db.select(query, params_values if parameters else None)
+            result = query_cache.get_or_load(
+                f'report:{report_id}', cache_params, load, report.get('cache_ttl')
+            )
+            if keys:
+                rows, page = result.rows, page_links(result)
+            else:
+                rows = result
+        except (QueryRejected, QueryTimeout) as exc:
+            flash(str(exc), 'error')
+            rows, version = None, None
         except Exception as exc:  # pragma: no cover - defensive path
             current_app.logger.exception('Ошибка при выполнении отчета %s', report_id)
             flash(f'Не удалось выполнить отчет: {exc}', 'error')
-            rows = None
+            rows, version = None, None
 
+    return conditional(make_response(render_template(
+        'reports/view.html', report=report, params=parameters, values=params_values, rows=rows,
+        page=page, exports=exports,
+    )), version)
+
+
+def _submit_report_job(report_id: str, report: ReportDefinition, query_params: dict[str, Any] | None):
+    """Ставит отчет в фоновую очередь; None — очередь заполнена (сообщение уже во flash)."""
+    try:
+        job = submit_report_job(report_id, report, query_params)
+    except JobQueueFull as exc:
+        flash(str(exc), 'error')
+        return None
+    return redirect(url_for('reports.job_status', job_id=job.id, report_id=report_id))
+
+
+@reports_bp.route('/jobs/<job_id>')
+@permission_required('reports_view')
+def job_status(job_id: str):
+    job = report_jobs.get(job_id)
+    if not job:
+        flash('Фоновая задача не найдена или ее результат устарел.', 'error')
+        return redirect(url_for('reports.list_reports'))
+    report_id = request.args.get('report_id')
+    return render_template('reports/job.html', job=job, report_id=report_id,
+                           rows=job.result if job.status == 'done' else None)
+
+
+@reports_bp.route('/jobs/<job_id>/status')
+@permission_required('reports_view')
+def job_status_json(job_id: str):
+    job = report_jobs.get(job_id)
+    if not job:
+        abort(404)
+    return jsonify(job.to_dict())
 
-    return render_template(
-        'reports/view.html', report=report, params=parameters, values=params_values, rows=rows
-    )
+
+@reports_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@permission_required('reports_view')
+def job_cancel(job_id: str):
+    job = report_jobs.get(job_id)
+    user = current_user() or {}
+    if not job:
+        abort(404)
+    if job.owner != user.get('login') and 'admin' not in user.get('permissions', []):
+        flash('Отменить задачу может только ее автор или администратор.', 'error')
+    elif report_jobs.cancel(job_id):
+        flash('Задача отменена.', 'info')
+    return redirect(url_for('reports.job_status', job_id=job_id,
+                            report_id=request.args.get('report_id')))
 
 
 @reports_bp.route('/create', methods=['GET', 'POST'])
@@ -136,8 +240,7 @@ def create_report():
             flash('Идентификатор, заголовок и SQL должны быть заполнены.', 'error')
             return render_template('reports/create.html', values=request.form)
 
-        reports = _load_reports()
-        if any(item.get('id') == report_id for item in reports):
+        if _find_report(report_id):
             flash('Отчет с таким идентификатором уже существует.', 'error')
             return render_template('reports/create.html', values=request.form)
 
@@ -153,17 +256,87 @@ def create_report():
                 flash('Параметры должны быть списком JSON.', 'error')
                 return render_template('reports/create.html', values=request.form)
 
-        reports.append(
-            {
-                'id': report_id,
-                'title': title,
-                'description': description,
-                'sql': sql,
-                'params': params_list,
-            }
-        )
-        _save_reports(reports)
+        names = [p['name'] for p in params_list]
+        used = placeholders(sql)
+        missing = [name for name in used if name not in names]
+        if missing:
+            flash(f'Параметры {", ".join(missing)} используются в SQL, но не описаны в списке параметров.',
+                  'error')
+            return render_template('reports/create.html', values=request.form)
+        unused = [name for name in names if name not in used]
+        if unused:
+            flash(f'Параметры {", ".join(unused)} описаны, но не используются в SQL.', 'warning')
+        if not is_select(sql):
+            flash('Отчет должен быть запросом SELECT (или WITH ... SELECT).', 'error')
+            return render_template('reports/create.html', values=request.form)
+
+        # пробный EXPLAIN с параметрами по умолчанию: сам запрос не выполняется
+        defaults = {p['name']: p.get('default') for p in params_list} if params_list else None
+        cost: CostEstimate | None = None
+        try:
+            with DBContextManager(current_app.config) as db:
+                cost = estimate(db, sql, defaults)
+        except CostCheckUnavailable as exc:
+            current_app.logger.warning('Не удалось оценить отчет %s: %s', report_id, exc)
+            flash(f'Оценить стоимость не удалось ({exc}), отчет сохранен без оценки.', 'warning')
+        except (QueryRejected, QueryTimeout) as exc:
+            flash(str(exc), 'error')
+            return render_template('reports/create.html', values=request.form)
+        except pymysql.MySQLError as exc:
+            flash(f'Запрос не прошел проверку: {exc.args[-1] if exc.args else exc}', 'error')
+            return render_template('reports/create.html', values=request.form)
+
+        if cost is not None:
+            errors, warnings = _cost_problems(cost)
+            if errors:
+                for message in errors:
+                    flash(message, 'error')
+                return render_template('reports/create.html', values=request.form, estimate=cost)
+            if warnings and not request.form.get('confirm_cost'):
+                for message in warnings:
+                    flash(message, 'warning')
+                return render_template('reports/create.html', values=request.form, estimate=cost,
+                                       confirm_cost=True)
+
+        try:
+            _registry().add(
+                {
+                    'id': report_id,
+                    'title': title,
+                    'description': description,
+                    'sql': sql,
+                    'params': params_list,
+                    **({'estimate': cost.to_dict()} if cost is not None else {}),
+                }
+            )
+        except DuplicateReportError:
+            flash('Отчет с таким идентификатором уже существует.', 'error')
+            return render_template('reports/create.html', values=request.form)
+        query_cache.invalidate(f'report:{report_id}')
         flash('Отчет добавлен и готов к использованию.', 'success')
         return redirect(url_for('reports.view_report', report_id=report_id))
 
     return render_template('reports/create.html', values={})
+
+
+def _cost_problems(cost: CostEstimate) -> tuple[list[str], list[str]]:
+    """Сравнение оценки с порогами [report_cost]: (ошибки, предупреждения)."""
+    config = current_app.config
+    errors: list[str] = []
+    warnings: list[str] = []
+    checks = (
+        (cost.rows, config.get('REPORT_COST_WARN_ROWS', 0), config.get('REPORT_COST_MAX_ROWS', 0),
+         'сервер просмотрит около {value:,.0f} строк'),
+        (cost.cost, config.get('REPORT_COST_WARN', 0), config.get('REPORT_COST_MAX', 0),
+         'стоимость плана {value:,.0f}'),
+    )
+    for value, warn, limit, text in checks:
+        if value is None:
+            continue
+        if limit and value > limit:
+            errors.append(f'Отчет слишком тяжелый: {text.format(value=value)} (допустимо {limit:,.0f}).')
+        elif warn and value > warn:
+            warnings.append(f'Отчет тяжелый: {text.format(value=value)} (порог {warn:,.0f}).')
+    if cost.full_scans and (errors or warnings):
+        (errors or warnings).append('Полный просмотр таблиц: ' + ', '.join(cost.full_scans) + '.')
+    return errors, warnings
@@ -0,0 +1,45 @@
+# blueprints/streaming.py
+from flask import current_app, request, stream_template
+
+from models.db import DBContextManager
+
+# размер пачки строк, читаемых с сервера, и порог сброса HTML клиенту
+FETCH_CHUNK_ROWS = 500
+FLUSH_BYTES = 16 * 1024
+
+
+def streaming_requested(default: bool = False) -> bool:
+    value = request.values.get('stream')
+    if value is None:
+        return default
+    return value.lower() in ('1', 'yes', 'true', 'on')
+
+
+def stream_rows(sql, params=None, name=None, chunk_size: int = FETCH_CHUNK_ROWS,
+                timeout_ms: int | None = None):
+    """Генератор строк выборки; соединение держится, пока генератор не исчерпан."""
+    with DBContextManager(current_app.config) as db:
+        yield from db.stream(sql, params, chunk_size, name=name, timeout_ms=timeout_ms)
+
+
+def _buffered(parts, size: int = FLUSH_BYTES):
+    # Jinja отдает вывод мелкими фрагментами — собираем их в блоки разумного размера
+    buf: list[str] = []
+    length = 0
+    for part in parts:
+        buf.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buf)
+            buf = []
+            length = 0
+    if buf:
+        yield ''.join(buf)
+
+
+def render_streamed(template_name: str, **context):
+    """Потоковый рендер шаблона: строки выводятся по мере получения из БД."""
+    return current_app.response_class(
+        _buffered(stream_template(template_name, **context)),
+        mimetype='text/html',
+    )
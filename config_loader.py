@@ -1,4 +1,5 @@
 import configparser
+import os
 from flask import Flask
 
 
@@ -13,5 +14,117 @@ def load_config(app: Flask, conf_path: str):
         DB_USER=mysql.get('user', 'vehicles'),
         DB_PASSWORD=mysql.get('password', '123'),
         DB_NAME=mysql.get('database', 'vehicles'),
+        # учетная запись для миграций схемы; по умолчанию — та же, что у приложения
+        DB_ADMIN_USER=mysql.get('db_admin_user'),
+        DB_ADMIN_PASSWORD=mysql.get('db_admin_password'),
+    )
+
+    database = parser['database'] if parser.has_section('database') else {}
+    app.config.update(
+        # mysql — сервер из [mysql]; sqlite — встроенная база для прогонов без сервера.
+        # Переменные окружения DB_BACKEND и DB_SQLITE_PATH переопределяют файл (bench.py --sqlite)
+        DB_BACKEND=os.environ.get('DB_BACKEND') or database.get('backend', 'mysql'),
+        DB_SQLITE_PATH=os.environ.get('DB_SQLITE_PATH') or database.get('sqlite_path', ':memory:'),
+        DB_SQLITE_INIT=str(database.get('sqlite_init', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+    )
+
+    replicas = parser['replicas'] if parser.has_section('replicas') else {}
+    app.config.update(
+        # реплики для чтения: "host:port, host:port"; пусто — все запросы на основной сервер
+        DB_REPLICAS=replicas.get('hosts', ''),
+        DB_REPLICA_STRATEGY=replicas.get('strategy', 'round_robin'),
+        DB_REPLICA_MAX_LAG=float(replicas.get('max_lag', 5)),
+        DB_REPLICA_CHECK_INTERVAL=float(replicas.get('check_interval', 10)),
+        DB_REPLICA_USER=replicas.get('user') or None,
+        DB_REPLICA_PASSWORD=replicas.get('password') or None,
+    )
+
+    migrations = parser['migrations'] if parser.has_section('migrations') else {}
+    app.config.update(
+        MIGRATIONS_ON_STARTUP=str(migrations.get('on_startup', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+    )
+
+    pool = parser['pool'] if parser.has_section('pool') else {}
+    app.config.update(
+        DB_POOL_MIN_SIZE=int(pool.get('min_size', 1)),
+        DB_POOL_MAX_SIZE=int(pool.get('max_size', 10)),
+        DB_POOL_MAX_LIFETIME=float(pool.get('max_lifetime', 3600)),
+        DB_POOL_TIMEOUT=float(pool.get('timeout', 10)),
+        DB_POOL_PING_INTERVAL=float(pool.get('ping_interval', 30)),
+    )
+
+    cache = parser['cache'] if parser.has_section('cache') else {}
+    app.config.update(
+        CACHE_ENABLED=str(cache.get('enabled', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        CACHE_MAX_BYTES=int(cache.get('max_mb', 64)) * 1024 * 1024,
+        CACHE_DEFAULT_TTL=float(cache.get('default_ttl', 300)),
+    )
+
+    jobs = parser['jobs'] if parser.has_section('jobs') else {}
+    app.config.update(
+        JOBS_MAX_WORKERS=int(jobs.get('max_workers', 2)),
+        JOBS_MAX_QUEUE=int(jobs.get('max_queue', 20)),
+        JOBS_RESULT_TTL=float(jobs.get('result_ttl', 600)),
+    )
+
+    limits = parser['limits'] if parser.has_section('limits') else {}
+    app.config.update(
+        DB_MAX_EXECUTION_MS=int(limits.get('max_execution_ms', 30000)),
+        DB_MAX_ROWS=int(limits.get('max_rows', 50000)),
+        LIMITS_ENABLED=str(limits.get('enabled', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        LIMITS_MAX_CONCURRENT=int(limits.get('max_concurrent', 8)),
+        LIMITS_MAX_PER_USER=int(limits.get('max_per_user', 3)),
+        LIMITS_QUEUE_TIMEOUT=float(limits.get('queue_timeout', 5)),
+        LIMITS_MAX_QUEUE=int(limits.get('max_queue', 16)),
+    )
+
+    dashboard = parser['dashboard'] if parser.has_section('dashboard') else {}
+    app.config.update(
+        DASHBOARD_MAX_WORKERS=int(dashboard.get('max_workers', 4)),
+        DASHBOARD_PANEL_TIMEOUT=float(dashboard.get('panel_timeout', 10)),
+    )
+
+    etag = parser['etag'] if parser.has_section('etag') else {}
+    app.config.update(
+        ETAG_ENABLED=str(etag.get('enabled', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        ETAG_VERSION_TTL=float(etag.get('version_ttl', 2)),
+        ETAG_MAX_AGE=float(etag.get('max_age', 300)),
+    )
+
+    assets = parser['assets'] if parser.has_section('assets') else {}
+    app.config.update(
+        # сборка static/dist (минификация, хеш в имени, .gz/.br) при запуске приложения
+        ASSETS_BUILD_ON_STARTUP=str(assets.get('build_on_startup', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        ASSETS_MAX_AGE=int(assets.get('max_age', 31536000)),
+    )
+
+    compression = parser['compression'] if parser.has_section('compression') else {}
+    app.config.update(
+        COMPRESSION_ENABLED=str(compression.get('enabled', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        COMPRESSION_MIN_SIZE=int(compression.get('min_size', 1024)),
+        COMPRESSION_GZIP_LEVEL=int(compression.get('gzip_level', 6)),
+        COMPRESSION_BROTLI_QUALITY=int(compression.get('brotli_quality', 4)),
+    )
+
+    report_cost = parser['report_cost'] if parser.has_section('report_cost') else {}
+    app.config.update(
+        # пороги оценки EXPLAIN при создании отчета: 0 — без ограничения
+        REPORT_COST_WARN_ROWS=int(report_cost.get('warn_rows', 1000000)),
+        REPORT_COST_MAX_ROWS=int(report_cost.get('max_rows', 100000000)),
+        REPORT_COST_WARN=float(report_cost.get('warn_cost', 100000)),
+        REPORT_COST_MAX=float(report_cost.get('max_cost', 0)),
+        REPORT_BACKGROUND_ROWS=int(report_cost.get('background_rows', 1000000)),
+    )
+
+    slowlog = parser['slowlog'] if parser.has_section('slowlog') else {}
+    app.config.update(
+        SLOWLOG_ENABLED=str(slowlog.get('enabled', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        SLOWLOG_THRESHOLD_MS=float(slowlog.get('threshold_ms', 500)),
+        SLOWLOG_SAMPLE_RATE=float(slowlog.get('sample_rate', 1.0)),
+        SLOWLOG_EXPLAIN=str(slowlog.get('explain', 'yes')).lower() in ('1', 'yes', 'true', 'on'),
+        SLOWLOG_PATH=slowlog.get('path', 'logs/slow_queries.log') or None,
+        SLOWLOG_MAX_BYTES=int(slowlog.get('max_mb', 10)) * 1024 * 1024,
+        SLOWLOG_BACKUP_COUNT=int(slowlog.get('backup_count', 5)),
+        SLOWLOG_KEEP=int(slowlog.get('keep', 100)),
     )
     return app
@@ -0,0 +1,469 @@
+"""
+Генератор синтетических данных для проверки запросов на больших объемах.
+
+Заполняет client, personal, vehicle, product, invoice и invoice_list базы из
+config/app.conf согласованными данными: внешние ключи ссылаются на
+существующие строки, клиенты и товары выбираются по распределению Ципфа
+(немногие крупные клиенты дают большую часть оборота), даты накладных
+смещены к последним годам, с сезонностью и редкими выходными.
+
+    python datagen.py --scale 0.1 --yes              # ~10 тыс. накладных
+    python datagen.py --scale 10 --yes               # ~1 млн накладных, ~3 млн строк
+    python datagen.py --scale 100 --load-data --yes  # ~10 млн накладных, ~28 млн строк
+
+Существующие данные этих таблиц удаляются (TRUNCATE). На время загрузки
+снимаются триггеры invoice и вторичные индексы, не нужные внешним ключам,
+отключаются проверки внешних ключей и уникальности; после загрузки индексы
+и триггеры восстанавливаются, client_month_summary и client.total_weight_kg
+пересчитываются. --load-data грузит через LOAD DATA LOCAL INFILE (на сервере
+нужен local_infile=ON), иначе — пакетным executemany.
+"""
+import argparse
+import datetime
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+# объемы при scale=1
+BASE_ROWS = {
+    'client': 2000,
+    'personal': 200,
+    'vehicle': 150,
+    'product': 1000,
+    'invoice': 100_000,
+}
+
+# число строк в накладной и его вероятность (в среднем ~2.8 строки)
+LINES_PER_INVOICE = (1, 2, 3, 4, 5, 6, 7, 8)
+LINES_WEIGHTS = (30, 25, 18, 10, 7, 5, 3, 2)
+
+# доля сотрудников, не оформлявших накладных (для hard_4)
+IDLE_STAFF_SHARE = 0.05
+
+# от зависимых таблиц к справочникам
+TABLES = ('invoice_list', 'client_month_summary', 'invoice', 'vehicle', 'product', 'personal', 'client')
+
+COLUMNS = {
+    'client': ('id', 'full_name', 'phone', 'email', 'city', 'address', 'created_at',
+               'contract_no', 'total_weight_kg'),
+    'personal': ('id', 'full_name', 'position', 'phone', 'email', 'hired_at', 'salary', 'birth_date'),
+    'vehicle': ('id', 'plate_no', 'model', 'capacity_kg', 'is_active'),
+    'product': ('id', 'name', 'category', 'price', 'stock', 'weight_kg'),
+    'invoice': ('id', 'client_id', 'personal_id', 'vehicle_id', 'invoice_date', 'status',
+                'total', 'total_weight_kg'),
+    'invoice_list': ('id', 'invoice_id', 'product_id', 'qty', 'price', 'line_total'),
+}
+
+FIRST_NAMES = ('Иван', 'Анна', 'Павел', 'Ольга', 'Сергей', 'Марина', 'Никита', 'Дарья', 'Роман',
+               'Ирина', 'Алексей', 'Елена', 'Дмитрий', 'Наталья', 'Андрей', 'Татьяна', 'Михаил',
+               'Светлана', 'Георгий', 'Нино')
+LAST_NAMES = ('Петров', 'Иванов', 'Соколов', 'Смирнов', 'Волков', 'Орлов', 'Кузнецов', 'Егоров',
+              'Лебедев', 'Козлов', 'Новиков', 'Морозов', 'Попов', 'Васильев', 'Зайцев', 'Павлов')
+COMPANY_KINDS = ('ООО', 'ИП', 'АО')
+COMPANY_WORDS = ('Авто', 'Транс', 'Деталь', 'Мотор', 'Сервис', 'Логистик', 'Запчасть', 'Гарант',
+                 'Колесо', 'Драйв')
+CITIES = (('Тбилиси', 5), ('Батуми', 3), ('Кутаиси', 2), ('Рустави', 1), ('Зугдиди', 1), ('Гори', 1))
+STREETS = ('ул. Руставели', 'пр. Чавчавадзе', 'ул. Царя Тамары', 'пр. Агмашенебели',
+           'ул. Горгиладзе', 'ул. Пекина', 'ул. Казбеги')
+POSITIONS = (('Продавец-консультант', 6, 1500), ('Менеджер по закупкам', 2, 2000),
+             ('Логист', 3, 1800), ('Администратор склада', 1, 2200), ('Бухгалтер', 1, 2500))
+VEHICLE_MODELS = (('Форд Транзит', 1500), ('Мерседес Спринтер', 2000), ('Рено Мастер', 1600),
+                  ('Фольксваген Крафтер', 1700), ('Ивеко Дэйли', 1800))
+PLATE_SERIES = ('AA', 'HT', 'BB', 'CC', 'KT', 'MN', 'OP', 'RS', 'TT', 'XX', 'ZZ', 'EE')
+# категория, названия, цена в копейках (мин, макс), вес в граммах (мин, макс)
+PRODUCT_KINDS = (
+    ('Электрика', ('Аккумулятор', 'Генератор', 'Стартер', 'Лампа фары'), (2000, 30000), (200, 18000)),
+    ('Двигатель', ('Масляный фильтр', 'Свеча зажигания', 'Ремень ГРМ', 'Прокладка ГБЦ'), (500, 15000), (50, 1500)),
+    ('Тормозная система', ('Тормозные колодки', 'Тормозной диск', 'Суппорт'), (2500, 25000), (800, 9000)),
+    ('Фильтры', ('Воздушный фильтр', 'Салонный фильтр', 'Топливный фильтр'), (700, 4000), (150, 800)),
+    ('Подвеска', ('Амортизатор', 'Шаровая опора', 'Рычаг подвески', 'Сайлентблок'), (1500, 20000), (300, 6000)),
+)
+INVOICE_STATUSES = (('оплачен', 75), ('новый', 20), ('отменен', 5))
+
+# сезонность по месяцам (весна и осень — пик сервисного спроса)
+MONTH_WEIGHTS = (0.7, 0.75, 1.1, 1.2, 1.1, 0.95, 0.85, 0.85, 1.05, 1.15, 1.0, 0.9)
+YEAR_GROWTH = 1.25
+WEEKEND_WEIGHT = 0.25
+
+
+def _money(cents: int) -> str:
+    return f'{cents // 100}.{cents % 100:02d}'
+
+
+def _weight(grams: int) -> str:
+    return f'{grams // 1000}.{grams % 1000:03d}'
+
+
+def _zipf_cum_weights(n: int, exponent: float) -> list[float]:
+    return list(itertools.accumulate(1 / (i + 1) ** exponent for i in range(n)))
+
+
+def _weighted(rng: random.Random, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _random_date(rng: random.Random, start: datetime.date, end: datetime.date) -> datetime.date:
+    return start + datetime.timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _person_name(rng: random.Random) -> str:
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES)
+    # фамилии согласуем с именем по роду
+    if first[-1] in 'аяо' and first not in ('Никита',):
+        last += 'а'
+    return f'{first} {last}'
+
+
+def scaled(scale: float) -> dict[str, int]:
+    return {table: max(5, int(rows * scale)) for table, rows in BASE_ROWS.items()}
+
+
+class Generator:
+    """Построчно порождает данные; все случайные величины зависят только от seed."""
+
+    def __init__(self, counts: dict[str, int], seed: int, start: datetime.date, end: datetime.date):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.start = start
+        self.end = end
+        self.product_price: list[int] = []
+        self.product_weight: list[int] = []
+        self.client_weight = [0] * (counts['client'] + 1)
+
+    def personal(self):
+        rng = self.rng
+        for i in range(1, self.counts['personal'] + 1):
+            position, _, salary = _weighted(rng, [(p, p[1]) for p in POSITIONS])
+            birth = _random_date(rng, datetime.date(1960, 1, 1), datetime.date(2003, 12, 31))
+            adult = birth + datetime.timedelta(days=18 * 366)
+            hired = _random_date(rng, max(adult, datetime.date(2010, 1, 1)), self.end)
+            yield (i, _person_name(rng), position, f'+995-555-{i:06d}', f'staff{i}@example.com',
+                   hired.isoformat(), _money(salary * 100 + rng.randrange(-300, 300) * 100),
+                   birth.isoformat())
+
+    def vehicles(self):
+        rng = self.rng
+        for i in range(self.counts['vehicle']):
+            model, capacity = rng.choice(VEHICLE_MODELS)
+            # номера уникальны до len(PLATE_SERIES)² * 1000 машин
+            series = PLATE_SERIES[i % len(PLATE_SERIES)]
+            n = i // len(PLATE_SERIES) % 1000
+            suffix = PLATE_SERIES[i // (len(PLATE_SERIES) * 1000) % len(PLATE_SERIES)]
+            yield (i + 1, f'{series}-{n:03d}-{suffix}', model, capacity, 1 if rng.random() < 0.9 else 0)
+
+    def products(self):
+        rng = self.rng
+        for i in range(1, self.counts['product'] + 1):
+            category, names, (price_lo, price_hi), (weight_lo, weight_hi) = rng.choice(PRODUCT_KINDS)
+            # логнормальный разброс цены внутри диапазона категории
+            price = min(price_hi, max(price_lo, int(price_lo * rng.lognormvariate(0.6, 0.6))))
+            weight = rng.randint(weight_lo, weight_hi)
+            self.product_price.append(price)
+            self.product_weight.append(weight)
+            yield (i, f'{rng.choice(names)} {i:05d}', category, _money(price), rng.randint(0, 500),
+                   _weight(weight))
+
+    def clients(self):
+        rng = self.rng
+        for i in range(1, self.counts['client'] + 1):
+            if rng.random() < 0.6:
+                name = f'{rng.choice(COMPANY_KINDS)} «{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_WORDS).lower()}-{i}»'
+            else:
+                name = _person_name(rng)
+            created = _random_date(rng, self.start - datetime.timedelta(days=365), self.end)
+            yield (i, name, f'+995-555-{500000 + i:06d}', f'client{i}@example.com',
+                   _weighted(rng, CITIES), f'{rng.choice(STREETS)}, {rng.randint(1, 150)}',
+                   f'{created.isoformat()} 10:00:00', f'C-{1000 + i}',
+                   _weight(self.client_weight[i]))
+
+    def _day_counts(self) -> list[tuple[datetime.date, int]]:
+        days = []
+        day = self.start
+        while day <= self.end:
+            weight = YEAR_GROWTH ** (day.year - self.start.year) * MONTH_WEIGHTS[day.month - 1]
+            if day.weekday() >= 5:
+                weight *= WEEKEND_WEIGHT
+            days.append((day, weight))
+            day += datetime.timedelta(days=1)
+        total = sum(w for _, w in days)
+        result = []
+        for day, weight in days:
+            expected = self.counts['invoice'] * weight / total
+            count = int(expected) + (1 if self.rng.random() < expected % 1 else 0)
+            result.append((day, count))
+        return result
+
+    def invoices(self, batch_size: int):
+        """Пакеты (накладные, строки накладных); id растут вместе с датой."""
+        rng = self.rng
+        n_clients = self.counts['client']
+        n_products = len(self.product_price)
+        n_vehicles = self.counts['vehicle']
+        active_staff = max(1, int(self.counts['personal'] * (1 - IDLE_STAFF_SHARE)))
+        client_cw = _zipf_cum_weights(n_clients, 1.1)
+        client_ids = list(range(1, n_clients + 1))
+        rng.shuffle(client_ids)
+        product_cw = _zipf_cum_weights(n_products, 0.9)
+        product_ids = list(range(1, n_products + 1))
+        rng.shuffle(product_ids)
+        staff_cw = _zipf_cum_weights(active_staff, 0.5)
+        staff_ids = list(range(1, active_staff + 1))
+        statuses, status_weights = zip(*INVOICE_STATUSES)
+
+        invoice_id = 0
+        line_id = 0
+        invoices, lines = [], []
+        for day, count in self._day_counts():
+            if not count:
+                continue
+            seconds = sorted(rng.randint(8 * 3600, 19 * 3600) for _ in range(count))
+            clients = rng.choices(client_ids, cum_weights=client_cw, k=count)
+            staff = rng.choices(staff_ids, cum_weights=staff_cw, k=count)
+            n_lines = rng.choices(LINES_PER_INVOICE, weights=LINES_WEIGHTS, k=count)
+            for second, client_id, personal_id, k in zip(seconds, clients, staff, n_lines):
+                invoice_id += 1
+                total = weight = 0
+                for product_id in rng.choices(product_ids, cum_weights=product_cw, k=k):
+                    qty = min(int(rng.paretovariate(1.5)), 50)
+                    price = self.product_price[product_id - 1]
+                    line_id += 1
+                    lines.append((line_id, invoice_id, product_id, qty, _money(price), _money(qty * price)))
+                    total += qty * price
+                    weight += qty * self.product_weight[product_id - 1]
+                self.client_weight[client_id] += weight
+                vehicle_id = rng.randint(1, n_vehicles) if rng.random() < 0.85 else None
+                stamp = f'{day.isoformat()} {second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}'
+                invoices.append((invoice_id, client_id, personal_id, vehicle_id, stamp,
+                                 rng.choices(statuses, weights=status_weights)[0],
+                                 _money(total), _weight(weight)))
+                if len(invoices) >= batch_size:
+                    yield invoices, lines
+                    invoices, lines = [], []
+        if invoices:
+            yield invoices, lines
+
+
+class InsertSink:
+    """Загрузка пакетным INSERT (pymysql собирает executemany в многострочный INSERT)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, table: str, rows):
+        if not rows:
+            return
+        columns = COLUMNS[table]
+        sql = (f"INSERT INTO `{table}` ({', '.join(columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        with self.conn.cursor() as cur:
+            cur.executemany(sql, rows)
+        self.conn.commit()
+
+    def close(self):
+        pass
+
+
+class LoadDataSink:
+    """Загрузка через LOAD DATA LOCAL INFILE из временных файлов по chunk_rows строк."""
+
+    def __init__(self, conn, chunk_rows: int = 1_000_000):
+        self.conn = conn
+        self.chunk_rows = chunk_rows
+        self._files: dict[str, list] = {}  # таблица -> [файл, путь, число строк]
+
+    def write(self, table: str, rows):
+        if table not in self._files:
+            fd, path = tempfile.mkstemp(prefix=f'datagen-{table}-', suffix='.tsv')
+            self._files[table] = [os.fdopen(fd, 'w', encoding='utf-8', newline='\n'), path, 0]
+        entry = self._files[table]
+        # сгенерированные значения не содержат табуляций, переводов строк и '\'
+        entry[0].writelines(
+            '\t'.join(r'\N' if v is None else str(v) for v in row) + '\n' for row in rows
+        )
+        entry[2] += len(rows)
+        if entry[2] >= self.chunk_rows:
+            self._load(table)
+
+    def _load(self, table: str):
+        handle, path, count = self._files[table]
+        handle.flush()
+        if count:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE `{table}` CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(COLUMNS[table])})",
+                    (path,),
+                )
+            self.conn.commit()
+        handle.seek(0)
+        handle.truncate()
+        self._files[table][2] = 0
+
+    def close(self):
+        for table in list(self._files):
+            self._load(table)
+            handle, path, _ = self._files.pop(table)
+            handle.close()
+            os.unlink(path)
+
+
+def _drop_triggers(cur, table: str) -> list[str]:
+    cur.execute('SHOW TRIGGERS WHERE `Table` = %s', (table,))
+    statements = []
+    for row in cur.fetchall():
+        cur.execute(f"SHOW CREATE TRIGGER `{row['Trigger']}`")
+        statements.append(cur.fetchone()['SQL Original Statement'])
+        cur.execute(f"DROP TRIGGER `{row['Trigger']}`")
+    return statements
+
+
+def _drop_secondary_indexes(cur, database: str, table: str) -> str | None:
+    """Снимает неуникальные индексы, не нужные внешним ключам; возвращает ALTER для восстановления."""
+    cur.execute(
+        'SELECT COLUMN_NAME FROM information_schema.KEY_COLUMN_USAGE '
+        'WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND REFERENCED_TABLE_NAME IS NOT NULL',
+        (database, table),
+    )
+    fk_columns = {row['COLUMN_NAME'] for row in cur.fetchall()}
+    cur.execute(
+        'SELECT INDEX_NAME, COLUMN_NAME, SUB_PART FROM information_schema.STATISTICS '
+        "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 1 "
+        'ORDER BY INDEX_NAME, SEQ_IN_INDEX',
+        (database, table),
+    )
+    indexes: dict[str, list[str]] = {}
+    for row in cur.fetchall():
+        part = f"({row['SUB_PART']})" if row['SUB_PART'] else ''
+        indexes.setdefault(row['INDEX_NAME'], []).append(f"`{row['COLUMN_NAME']}`{part}")
+    droppable = {name: cols for name, cols in indexes.items()
+                 if cols[0].split('`')[1] not in fk_columns}
+    if not droppable:
+        return None
+    cur.execute(f"ALTER TABLE `{table}` " + ', '.join(f'DROP INDEX `{name}`' for name in droppable))
+    return f"ALTER TABLE `{table}` " + ', '.join(
+        f"ADD INDEX `{name}` ({', '.join(cols)})" for name, cols in droppable.items()
+    )
+
+
+def _log(message: str, started: float):
+    print(f'[{time.perf_counter() - started:8.1f} с] {message}', flush=True)
+
+
+def generate(config, scale: float, seed: int, start: datetime.date, end: datetime.date,
+             load_data: bool = False, batch_size: int = 5000):
+    counts = scaled(scale)
+    conn = pymysql.connect(
+        host=config['DB_HOST'],
+        port=int(config.get('DB_PORT', 3306)),
+        user=config['DB_USER'],
+        password=config['DB_PASSWORD'],
+        database=config['DB_NAME'],
+        cursorclass=DictCursor,
+        autocommit=False,
+        charset='utf8mb4',
+        local_infile=load_data,
+    )
+    started = time.perf_counter()
+    gen = Generator(counts, seed, start, end)
+    sink = LoadDataSink(conn) if load_data else InsertSink(conn)
+    restore_indexes: list[str] = []
+    triggers: list[str] = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SET SESSION foreign_key_checks = 0, unique_checks = 0')
+            for table in TABLES:
+                cur.execute(f'TRUNCATE TABLE `{table}`')
+            triggers = _drop_triggers(cur, 'invoice')
+            for table in TABLES:
+                alter = _drop_secondary_indexes(cur, config['DB_NAME'], table)
+                if alter:
+                    restore_indexes.append(alter)
+        conn.commit()
+        _log(f'таблицы очищены, снято триггеров: {len(triggers)}, '
+             f'таблиц без вторичных индексов: {len(restore_indexes)}', started)
+
+        for table, rows in (('personal', gen.personal()), ('vehicle', gen.vehicles()),
+                            ('product', gen.products())):
+            for batch in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+                sink.write(table, batch)
+        _log(f"справочники: {counts['personal']} сотрудников, {counts['vehicle']} машин, "
+             f"{counts['product']} товаров", started)
+
+        n_invoices = n_lines = 0
+        report_every = max(batch_size, counts['invoice'] // 10)
+        for invoices, lines in gen.invoices(batch_size):
+            sink.write('invoice', invoices)
+            sink.write('invoice_list', lines)
+            previous = n_invoices
+            n_invoices += len(invoices)
+            n_lines += len(lines)
+            if n_invoices // report_every != previous // report_every:
+                _log(f'накладных: {n_invoices}, строк: {n_lines}', started)
+
+        # клиенты последними: суммарный вес уже посчитан по сгенерированным накладным
+        clients = gen.clients()
+        for batch in iter(lambda: list(itertools.islice(clients, batch_size)), []):
+            sink.write('client', batch)
+        sink.close()
+        _log(f"загружено: {counts['client']} клиентов, {n_invoices} накладных, {n_lines} строк", started)
+    finally:
+        with conn.cursor() as cur:
+            for alter in restore_indexes:
+                cur.execute(alter)
+            _log('индексы восстановлены', started)
+            cur.execute(
+                "INSERT INTO client_month_summary (client_id, month_start, trip_count, total_weight_kg, total) "
+                "SELECT client_id, DATE_FORMAT(invoice_date, '%Y-%m-01'), COUNT(*), SUM(total_weight_kg), SUM(total) "
+                "FROM invoice GROUP BY client_id, DATE_FORMAT(invoice_date, '%Y-%m-01')"
+            )
+            for statement in triggers:
+                cur.execute(statement)
+            cur.execute('SET SESSION foreign_key_checks = 1, unique_checks = 1')
+            cur.execute(f"ANALYZE TABLE {', '.join(f'`{t}`' for t in TABLES)}")
+            cur.fetchall()
+        conn.commit()
+        conn.close()
+        _log('сводка client_month_summary пересчитана, триггеры восстановлены', started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Генерация и загрузка синтетических данных')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='масштаб: 1 — 100 тыс. накладных (~280 тыс. строк)')
+    parser.add_argument('--seed', type=int, default=1, help='зерно генератора (результат воспроизводим)')
+    parser.add_argument('--from', dest='start', default='2018-01-01', help='первая дата накладных')
+    parser.add_argument('--to', dest='end', default=datetime.date.today().isoformat(),
+                        help='последняя дата накладных')
+    parser.add_argument('--load-data', action='store_true', help='грузить через LOAD DATA LOCAL INFILE')
+    parser.add_argument('--batch', type=int, default=5000, help='строк в одном пакете')
+    parser.add_argument('--yes', action='store_true', help='подтвердить удаление существующих данных')
+    args = parser.parse_args(argv)
+
+    counts = scaled(args.scale)
+    print('Будет создано: ' + ', '.join(f'{t}={n}' for t, n in counts.items())
+          + f" (~{int(counts['invoice'] * 2.8)} строк накладных)")
+    if not args.yes:
+        print('Существующие данные таблиц будут удалены. Запустите с --yes для подтверждения.')
+        return 2
+
+    from flask import Flask
+
+    from config_loader import load_config
+
+    app = load_config(Flask(__name__), os.path.join('config', 'app.conf'))
+    generate(app.config, args.scale, args.seed,
+             datetime.date.fromisoformat(args.start), datetime.date.fromisoformat(args.end),
+             load_data=args.load_data, batch_size=args.batch)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,5 @@
-DROP DATABASE IF EXISTS vehicles;
-CREATE DATABASE vehicles CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
-USE vehicles;
+-- Исходная схема базы vehicles и демонстрационные данные.
+-- База создается раннером миграций (python migrate.py) с utf8mb4_unicode_ci.
 
 CREATE TABLE client (
   id INT AUTO_INCREMENT PRIMARY KEY,
@@ -0,0 +1,79 @@
+-- На существующей базе сводка пересчитывается целиком.
+
+-- сводка по клиенту за месяц; поддерживается триггерами на invoice
+CREATE TABLE IF NOT EXISTS client_month_summary (
+  client_id INT NOT NULL,
+  month_start DATE NOT NULL,
+  trip_count INT NOT NULL DEFAULT 0,
+  total_weight_kg DECIMAL(14,3) NOT NULL DEFAULT 0.000,
+  total DECIMAL(14,2) NOT NULL DEFAULT 0.00,
+  PRIMARY KEY (client_id, month_start),
+  KEY idx_cms_month (month_start),
+  CONSTRAINT fk_cms_client FOREIGN KEY (client_id) REFERENCES client(id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TRIGGER IF EXISTS trg_invoice_summary_insert;
+DROP TRIGGER IF EXISTS trg_invoice_summary_update;
+DROP TRIGGER IF EXISTS trg_invoice_summary_delete;
+DROP VIEW IF EXISTS v_client_counts_2020;
+
+DELETE FROM client_month_summary;
+INSERT INTO client_month_summary (client_id, month_start, trip_count, total_weight_kg, total)
+SELECT client_id, DATE_FORMAT(invoice_date, '%Y-%m-01'), COUNT(*), SUM(total_weight_kg), SUM(total)
+FROM invoice
+GROUP BY client_id, DATE_FORMAT(invoice_date, '%Y-%m-01');
+
+DELIMITER //
+CREATE TRIGGER trg_invoice_summary_insert
+AFTER INSERT ON invoice
+FOR EACH ROW
+BEGIN
+  INSERT INTO client_month_summary (client_id, month_start, trip_count, total_weight_kg, total)
+  VALUES (NEW.client_id, DATE_FORMAT(NEW.invoice_date, '%Y-%m-01'), 1, NEW.total_weight_kg, NEW.total)
+  ON DUPLICATE KEY UPDATE
+    trip_count = trip_count + 1,
+    total_weight_kg = total_weight_kg + NEW.total_weight_kg,
+    total = total + NEW.total;
+END//
+CREATE TRIGGER trg_invoice_summary_update
+AFTER UPDATE ON invoice
+FOR EACH ROW
+BEGIN
+  IF NEW.client_id <> OLD.client_id
+     OR NEW.invoice_date <> OLD.invoice_date
+     OR NEW.total_weight_kg <> OLD.total_weight_kg
+     OR NEW.total <> OLD.total THEN
+    UPDATE client_month_summary
+    SET trip_count = trip_count - 1,
+        total_weight_kg = total_weight_kg - OLD.total_weight_kg,
+        total = total - OLD.total
+    WHERE client_id = OLD.client_id
+      AND month_start = DATE_FORMAT(OLD.invoice_date, '%Y-%m-01');
+    DELETE FROM client_month_summary
+    WHERE client_id = OLD.client_id
+      AND month_start = DATE_FORMAT(OLD.invoice_date, '%Y-%m-01')
+      AND trip_count <= 0;
+    INSERT INTO client_month_summary (client_id, month_start, trip_count, total_weight_kg, total)
+    VALUES (NEW.client_id, DATE_FORMAT(NEW.invoice_date, '%Y-%m-01'), 1, NEW.total_weight_kg, NEW.total)
+    ON DUPLICATE KEY UPDATE
+      trip_count = trip_count + 1,
+      total_weight_kg = total_weight_kg + NEW.total_weight_kg,
+      total = total + NEW.total;
+  END IF;
+END//
+CREATE TRIGGER trg_invoice_summary_delete
+AFTER DELETE ON invoice
+FOR EACH ROW
+BEGIN
+  UPDATE client_month_summary
+  SET trip_count = trip_count - 1,
+      total_weight_kg = total_weight_kg - OLD.total_weight_kg,
+      total = total - OLD.total
+  WHERE client_id = OLD.client_id
+    AND month_start = DATE_FORMAT(OLD.invoice_date, '%Y-%m-01');
+  DELETE FROM client_month_summary
+  WHERE client_id = OLD.client_id
+    AND month_start = DATE_FORMAT(OLD.invoice_date, '%Y-%m-01')
+    AND trip_count <= 0;
+END//
+DELIMITER ;
@@ -0,0 +1,11 @@
+-- Вторичные индексы invoice и personal.
+-- Подобраны по замечаниям query_lint.py: выборки по дате накладной,
+-- суммы по клиенту за период, сотрудники без накладных за период.
+
+ALTER TABLE invoice
+  ADD INDEX idx_invoice_date (invoice_date),
+  ADD INDEX idx_invoice_client_date (client_id, invoice_date, total_weight_kg),
+  ADD INDEX idx_invoice_personal_date (personal_id, invoice_date);
+
+ALTER TABLE personal
+  ADD INDEX idx_personal_hired_at (hired_at);
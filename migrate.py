@@ -0,0 +1,65 @@
+"""
+Миграции схемы базы данных.
+
+Применяет файлы initdb/migrations/NNNN_name.sql к базе из config/app.conf
+(учетная запись DB_ADMIN_USER, если задана) и ведет журнал примененных
+миграций в таблице schema_migrations. Приложение не импортируется.
+
+    python migrate.py                  # применить новые миграции
+    python migrate.py status           # какие миграции применены
+    python migrate.py baseline 0003    # база уже в состоянии 0003: отметить, не выполняя
+
+Пустая база создается при первом запуске. Базу, развернутую раньше
+вручную, сначала нужно отметить командой baseline.
+"""
+import argparse
+import os
+import sys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Миграции схемы базы данных')
+    parser.add_argument('command', nargs='?', default='up', choices=('up', 'status', 'baseline'),
+                        help='up — применить новые (по умолчанию), status — список, baseline — отметить')
+    parser.add_argument('version', nargs='?', help='номер миграции для baseline')
+    parser.add_argument('--config', default=os.path.join('config', 'app.conf'), help='файл настроек')
+    parser.add_argument('--batch', type=int, default=50, help='операторов в одном обращении к серверу')
+    args = parser.parse_args(argv)
+
+    import pymysql
+    from flask import Flask
+
+    from config_loader import load_config
+    from models.migrations import MigrationError, MigrationRunner
+
+    config = load_config(Flask(__name__), args.config).config
+    runner = MigrationRunner(config, batch_size=args.batch)
+    try:
+        if args.command == 'status':
+            for migration, applied in runner.status():
+                state = f"применена {applied['applied_at']}" if applied else 'не применена'
+                mark = '!' if applied and applied['checksum'] != migration.checksum else ' '
+                print(f'{mark} {migration.version}_{migration.name:<40} {state}')
+            return 0
+        if args.command == 'baseline':
+            if not args.version:
+                parser.error('для baseline укажите номер миграции')
+            for migration in runner.baseline(args.version):
+                print(f'отмечена {migration.version}_{migration.name}')
+            return 0
+        applied = runner.migrate()
+    except MigrationError as exc:
+        print(f'Ошибка миграции: {exc}', file=sys.stderr)
+        return 1
+    except pymysql.err.OperationalError as exc:
+        print(f'База данных недоступна: {exc}', file=sys.stderr)
+        return 2
+    for migration in applied:
+        print(f'применена {migration.version}_{migration.name}')
+    if not applied:
+        print('Новых миграций нет.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
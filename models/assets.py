@@ -0,0 +1,206 @@
+# models/assets.py
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: без нее собираются только .gz
+    brotli = None
+
+# собранные файлы лежат в static/dist, исходники — в остальной static/
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# сжатые копии нужны только текстовым форматам; картинки уже сжаты
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.ico'}
+
+_CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+_CSS_STRINGS = re.compile(_CSS_STRING)
+_CSS_COMMENTS = re.compile(rf'({_CSS_STRING})|/\*.*?\*/', re.S)
+_CSS_SPACES = re.compile(r'\s*([{};,>])\s*|(:)\s+')
+
+
+def _squeeze_css(chunk: str) -> str:
+    chunk = _CSS_SPACES.sub(lambda m: m.group(1) or m.group(2), re.sub(r'\s+', ' ', chunk))
+    return chunk.replace(';}', '}')
+
+
+def minify_css(text: str) -> str:
+    """Убирает комментарии и лишние пробелы; строки в кавычках не трогает."""
+    # комментарий заменяется пробелом: «.a/**/.b» и «.a .b» — разные селекторы
+    text = _CSS_COMMENTS.sub(lambda m: m.group(1) or ' ', text)
+    out = []
+    position = 0
+    for match in _CSS_STRINGS.finditer(text):
+        out.append(_squeeze_css(text[position:match.start()]))
+        out.append(match.group())
+        position = match.end()
+    out.append(_squeeze_css(text[position:]))
+    return ''.join(out).strip()
+
+
+def minify_js(text: str) -> str:
+    """
+    Осторожная минификация без разбора синтаксиса: отступы, пустые строки
+    и строки-комментарии //. Переводы строк остаются — без них меняется смысл
+    кода, полагающегося на автоматическую расстановку точек с запятой.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(path: str, data: bytes):
+    # запись через временный файл: параллельно стартующие процессы не увидят половину файла
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _sources(static_dir: str):
+    for dirpath, dirnames, filenames in os.walk(static_dir):
+        if os.path.abspath(dirpath) == os.path.abspath(static_dir):
+            dirnames[:] = [d for d in dirnames if d != DIST_DIR]
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+def build(static_dir: str, clean: bool = False) -> dict[str, str]:
+    """
+    Собирает static/dist: минифицирует CSS/JS, добавляет к имени хеш
+    содержимого (styles.css -> dist/styles.1a2b3c4d5e6f.css) и кладет рядом
+    сжатые копии .gz и, если установлен brotli, .br. Возвращает манифест
+    {исходное имя: собранное имя} и записывает его в dist/manifest.json.
+    clean удаляет собранные файлы прежних версий; по умолчанию они остаются,
+    чтобы страницы, закэшированные до выкладки, не потеряли стили.
+    """
+    dist = os.path.join(static_dir, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    produced = {MANIFEST_NAME}
+    for name, path in _sources(static_dir):
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext in MINIFIERS:
+            data = MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        built = f'{stem}.{digest}{ext}'
+        target = os.path.join(dist, built)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        variants = {built: data}
+        if ext in COMPRESSIBLE:
+            variants[built + '.gz'] = gzip.compress(data, 9, mtime=0)
+            if brotli is not None:
+                variants[built + '.br'] = brotli.compress(data, quality=11)
+        for variant, content in variants.items():
+            # сжатая копия, которая не меньше исходной, не нужна
+            if variant != built and len(content) >= len(data):
+                continue
+            produced.add(variant)
+            variant_path = os.path.join(dist, variant)
+            if not os.path.exists(variant_path):
+                _write(variant_path, content)
+        manifest[name] = f'{DIST_DIR}/{built}'
+    _write(os.path.join(dist, MANIFEST_NAME),
+           json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+    if clean:
+        for name, path in list(_sources(dist)):
+            if name not in produced and not name.endswith('.tmp'):
+                os.remove(path)
+    return manifest
+
+
+def load_manifest(static_dir: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(static_dir, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class AssetManifest:
+    """Соответствие исходных имен статики собранным; пустой манифест — статика отдается как есть."""
+
+    def __init__(self):
+        self.files: dict[str, str] = {}
+        self.built: set[str] = set()
+        self.version = ''
+
+    def update(self, files: dict[str, str]):
+        self.files = dict(files)
+        self.built = set(files.values())
+        self.version = hashlib.sha1(json.dumps(files, sort_keys=True).encode()).hexdigest()[:12]
+
+    def url_filename(self, filename: str) -> str:
+        return self.files.get(filename, filename)
+
+
+asset_manifest = AssetManifest()
+
+
+def _encoded_variant(static_dir: str, filename: str) -> tuple[str, str | None]:
+    # brotli предпочтительнее: при той же скорости распаковки файл меньше
+    for encoding, ext in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(static_dir, filename + ext)):
+            return filename + ext, encoding
+    return filename, None
+
+
+def init_assets(app):
+    """
+    Подключает собранную статику: url_for('static', filename='styles.css')
+    дает адрес файла с хешем, а он отдается с Cache-Control: immutable и
+    сроком ASSETS_MAX_AGE — повторные страницы не запрашивают статику вовсе.
+    Сборка выполняется при запуске (ASSETS_BUILD_ON_STARTUP) или заранее
+    командой python assets.py; без манифеста статика отдается как раньше.
+    """
+    static_dir = app.static_folder
+    if app.config.get('ASSETS_BUILD_ON_STARTUP', True):
+        try:
+            asset_manifest.update(build(static_dir))
+        except OSError as exc:
+            app.logger.warning('Статика не собрана: %s', exc)
+            asset_manifest.update(load_manifest(static_dir))
+    else:
+        asset_manifest.update(load_manifest(static_dir))
+    if not asset_manifest.files:
+        return
+    max_age = int(app.config.get('ASSETS_MAX_AGE', 31536000))
+
+    @app.url_defaults
+    def _fingerprint(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = asset_manifest.url_filename(values['filename'])
+
+    send_static = app.view_functions['static']
+
+    def static(filename):
+        if filename not in asset_manifest.built:
+            return send_static(filename=filename)
+        served, encoding = _encoded_variant(static_dir, filename)
+        response = send_from_directory(static_dir, served, max_age=max_age,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            # имя файла сжатой копии браузеру не нужно
+            response.headers.pop('Content-Disposition', None)
+        response.vary.add('Accept-Encoding')
+        # имя меняется вместе с содержимым, поэтому файл можно не перепроверять
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
+        return response
+
+    app.view_functions['static'] = static
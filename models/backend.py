@@ -0,0 +1,85 @@
+# models/backend.py
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pymysql
+from pymysql.cursors import DictCursor
+
+from models import sqlite
+from models.metrics import DB_CONNECT_SECONDS
+
+
+@dataclass(frozen=True)
+class Backend:
+    """
+    Драйвер базы данных за DBContextManager: как открыть соединение и как
+    назвать пул. Соединение любого драйвера ведет себя как соединение
+    pymysql (курсоры, плейсхолдеры %(name)s, исключения pymysql.err), поэтому
+    select/execute и код над ними от драйвера не зависят. Флаги описывают
+    возможности сервера, без которых отдельные функции приложения отключаются.
+    """
+    name: str
+    connect: Callable[[Any], Any]
+    pool_key: Callable[[Any], tuple]
+    # EXPLAIN FORMAT=JSON (оценка стоимости отчетов, query_lint)
+    explain_json: bool = False
+    # information_schema.TABLES (версии данных для ETag)
+    information_schema: bool = False
+    # реплики для чтения
+    replication: bool = False
+    # миграции initdb/migrations через MigrationRunner
+    migrations: bool = False
+
+
+def _connect_mysql(config):
+    return pymysql.connect(
+        host=config['DB_HOST'],
+        port=int(config.get('DB_PORT', 3306)),
+        user=config['DB_USER'],
+        password=config['DB_PASSWORD'],
+        database=config['DB_NAME'],
+        cursorclass=DictCursor,
+        autocommit=True,
+        charset='utf8mb4',
+        use_unicode=True,
+        init_command="SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci",
+        connect_timeout=int(config.get('DB_CONNECT_TIMEOUT', 10)),
+    )
+
+
+def _mysql_pool_key(config) -> tuple:
+    return (
+        config['DB_HOST'],
+        int(config.get('DB_PORT', 3306)),
+        config['DB_USER'],
+        config['DB_NAME'],
+    )
+
+
+def _sqlite_pool_key(config) -> tuple:
+    return ('sqlite', 0, 'sqlite', config.get('DB_SQLITE_PATH') or ':memory:')
+
+
+BACKENDS: dict[str, Backend] = {
+    'mysql': Backend('mysql', _connect_mysql, _mysql_pool_key, explain_json=True,
+                     information_schema=True, replication=True, migrations=True),
+    # встроенная база для быстрых прогонов без сервера: схема и данные — из миграций
+    'sqlite': Backend('sqlite', sqlite.connect, _sqlite_pool_key),
+}
+
+
+def get_backend(config) -> Backend:
+    name = (config.get('DB_BACKEND') or 'mysql').lower()
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'неизвестный драйвер базы данных: {name}') from None
+
+
+def connect(config):
+    """Новое соединение драйвера из config (DB_BACKEND) с учетом времени подключения в метриках."""
+    started = time.perf_counter()
+    conn = get_backend(config).connect(config)
+    DB_CONNECT_SECONDS.observe(time.perf_counter() - started)
+    return conn
@@ -0,0 +1,146 @@
+# models/cache.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+CacheKey = tuple[str, Hashable]
+
+
+def normalize_params(params: dict[str, Any] | None) -> Hashable:
+    """Приводит параметры к хешируемому виду, не зависящему от порядка ключей."""
+    if not params:
+        return ()
+    return tuple(sorted(
+        (str(k), None if v is None else str(v).strip()) for k, v in params.items()
+    ))
+
+
+def estimate_size(value: Any) -> int:
+    """Грубая оценка занимаемой памяти результатом выборки (список словарей или кортежей, Page)."""
+    if hasattr(value, 'rows'):
+        return sys.getsizeof(value) + estimate_size(value.rows)
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, dict):
+                for k, v in row.items():
+                    size += sys.getsizeof(k) + sys.getsizeof(v)
+            elif isinstance(row, (list, tuple)):
+                for v in row:
+                    size += sys.getsizeof(v)
+    return size
+
+
+class ResultCache:
+    """
+    LRU-кэш результатов запросов с ограничением по памяти и TTL на запись.
+    Ключ — (имя шаблона или report:<id>, нормализованные параметры).
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, default_ttl: float = 300.0,
+                 enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._data: OrderedDict[CacheKey, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+    def configure(self, max_bytes: int | None = None, default_ttl: float | None = None,
+                  enabled: bool | None = None):
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if default_ttl is not None:
+                self.default_ttl = default_ttl
+            if enabled is not None:
+                self.enabled = enabled
+            self._evict()
+
+    def _remove(self, key: CacheKey):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        while self._data and self._bytes > self.max_bytes:
+            key = next(iter(self._data))
+            self._remove(key)
+            self._stats['evictions'] += 1
+
+    def get(self, key: CacheKey, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: CacheKey, value: Any, ttl: float | None = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if not self.enabled or ttl <= 0:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            self._evict()
+
+    def get_or_load(self, name: str, params: dict[str, Any] | None,
+                    loader: Callable[[], Any], ttl: float | None = None):
+        """Возвращает результат из кэша либо вызывает loader() и кэширует его."""
+        ttl = self.default_ttl if ttl is None else ttl
+        if not self.enabled or ttl <= 0:
+            return loader()
+        key = (name, normalize_params(params))
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, name: str | None = None) -> int:
+        """Сбрасывает записи шаблона/отчета name (или все записи) и возвращает их число."""
+        with self._lock:
+            keys = [k for k in self._data if name is None or k[0] == name]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            data = dict(self._stats)
+            data.update(entries=len(self._data), bytes=self._bytes, max_bytes=self.max_bytes)
+        return data
+
+
+# общий для процесса кэш; параметры задаются из секции [cache] app.conf
+query_cache = ResultCache()
+
+
+def init_cache(config):
+    query_cache.configure(
+        max_bytes=int(config.get('CACHE_MAX_BYTES', query_cache.max_bytes)),
+        default_ttl=float(config.get('CACHE_DEFAULT_TTL', query_cache.default_ttl)),
+        enabled=bool(config.get('CACHE_ENABLED', True)),
+    )
+    return query_cache
@@ -0,0 +1,113 @@
+# models/columnar.py
+import datetime
+import gzip
+import json
+from typing import Any, Callable, Iterable, Sequence
+
+from pymysql.constants import FIELD_TYPE
+
+from models.export import json_default
+
+# тип столбца в ответе API по коду типа поля MySQL (cursor.description)
+_FIELD_TYPES = {
+    FIELD_TYPE.TINY: 'int',
+    FIELD_TYPE.SHORT: 'int',
+    FIELD_TYPE.LONG: 'int',
+    FIELD_TYPE.LONGLONG: 'int',
+    FIELD_TYPE.INT24: 'int',
+    FIELD_TYPE.YEAR: 'int',
+    FIELD_TYPE.FLOAT: 'float',
+    FIELD_TYPE.DOUBLE: 'float',
+    FIELD_TYPE.DECIMAL: 'decimal',
+    FIELD_TYPE.NEWDECIMAL: 'decimal',
+    FIELD_TYPE.DATE: 'date',
+    FIELD_TYPE.NEWDATE: 'date',
+    FIELD_TYPE.DATETIME: 'datetime',
+    FIELD_TYPE.TIMESTAMP: 'datetime',
+    FIELD_TYPE.TIME: 'time',
+    FIELD_TYPE.BIT: 'bytes',
+    FIELD_TYPE.JSON: 'json',
+}
+
+
+def _encoded(value: Any) -> Any:
+    # нулевые и некорректные даты ('0000-00-00') pymysql отдает строкой — как есть
+    if isinstance(value, str):
+        return value
+    # date/datetime — isoformat, TIME (timedelta) — str, BIT (bytes) — hex
+    return json_default(value)
+
+
+# Decimal — строкой без потери точности, даты и время — ISO 8601 (как в выгрузке ndjson)
+_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    'decimal': str,
+    'date': _encoded,
+    'datetime': _encoded,
+    'time': _encoded,
+    'bytes': _encoded,
+}
+
+
+MIMETYPES = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+}
+
+
+def column_types(description: Sequence[Sequence[Any]] | None) -> list[str]:
+    return [_FIELD_TYPES.get(col[1], 'str') for col in description or ()]
+
+
+def encode_rows(types: Sequence[str], rows: Iterable[Sequence[Any]]) -> list[Sequence[Any]]:
+    """
+    Приводит значения к типам, которые одинаково передаются в JSON и msgpack.
+    Преобразователи выбираются один раз на столбец; столбцы без преобразования
+    (числа, строки) не трогаются, а если таких нет — строки отдаются как есть.
+    """
+    converters = [(i, _CONVERTERS[t]) for i, t in enumerate(types) if t in _CONVERTERS]
+    if not converters:
+        return rows if isinstance(rows, list) else list(rows)
+    encoded = []
+    for row in rows:
+        values = list(row)
+        for i, convert in converters:
+            value = values[i]
+            if value is not None:
+                values[i] = convert(value)
+        encoded.append(values)
+    return encoded
+
+
+def columnar_document(columns: Sequence[str], types: Sequence[str],
+                      rows: Iterable[Sequence[Any]], **extra: Any) -> dict[str, Any]:
+    """Колоночный ответ: имена и типы столбцов один раз, затем строки массивами."""
+    data = encode_rows(types, rows)
+    return {
+        'columns': list(columns),
+        'types': list(types),
+        'row_count': len(data),
+        'rows': data,
+        **extra,
+    }
+
+
+def msgpack_available() -> bool:
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def serialize(document: dict[str, Any], fmt: str = 'json') -> bytes:
+    if fmt == 'msgpack':
+        import msgpack
+
+        return msgpack.packb(document, use_bin_type=True, default=json_default)
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':'),
+                      default=json_default).encode('utf-8')
+
+
+def compress(body: bytes, level: int = 6) -> bytes:
+    # mtime=0 — одинаковые данные дают одинаковые байты
+    return gzip.compress(body, compresslevel=level, mtime=0)
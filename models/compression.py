@@ -0,0 +1,224 @@
+# models/compression.py
+import itertools
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+from models.metrics import HTTP_COMPRESSION_BYTES
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость: без нее ответы сжимаются только gzip
+    brotli = None
+
+# сжимаются текстовые форматы; xlsx, картинки и архивы уже сжаты
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml',
+}
+# потоковый ответ сбрасывается клиенту не реже чем через столько исходных байт
+FLUSH_BYTES = 16 * 1024
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+def _header(headers: list[tuple[str, str]], name: str) -> str | None:
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class _Captured:
+    """Что приложение передало в start_response, пока ответ не отправлен."""
+
+    def __init__(self):
+        self.status: str | None = None
+        self.headers: list[tuple[str, str]] = []
+        self.exc_info = None
+        self.written: list[bytes] = []
+
+    def start_response(self, status, headers, exc_info=None):
+        self.status, self.headers, self.exc_info = status, list(headers), exc_info
+        return self.written.append
+
+
+class CompressionMiddleware:
+    """
+    WSGI-обертка, сжимающая ответы gzip или brotli по Accept-Encoding.
+    Тело сжимается по мере выдачи, поэтому потоковые страницы и выгрузки
+    уходят клиенту частями, как и без сжатия: каждый блок от FLUSH_BYTES
+    сбрасывается сразу. Ответ приложения сначала копится до min_size байт:
+    короткий отдается как есть, готовый целиком — сжатым одним блоком
+    с Content-Length. Не сжимаются ответы с Content-Encoding (JSON API,
+    собранная статика), Cache-Control: no-transform, 206/304 и форматы
+    не из COMPRESSIBLE_TYPES.
+    """
+
+    def __init__(self, app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def negotiate(self, environ) -> str | None:
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        # brotli при сопоставимой нагрузке на процессор сжимает HTML лучше gzip
+        if brotli is not None and accept['br']:
+            return 'br'
+        if accept['gzip']:
+            return 'gzip'
+        return None
+
+    def _encoder(self, encoding: str):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    def compressible(self, status: str, headers: list[tuple[str, str]]) -> bool:
+        code = int(status.split(None, 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if (_header(headers, 'Content-Encoding') or 'identity').lower() != 'identity':
+            return False
+        if 'no-transform' in (_header(headers, 'Cache-Control') or '').lower():
+            return False
+        mimetype = (_header(headers, 'Content-Type') or '').split(';', 1)[0].strip().lower()
+        if not (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES):
+            return False
+        length = _header(headers, 'Content-Length')
+        return not (length and length.isdigit() and int(length) < self.min_size)
+
+    @staticmethod
+    def _headers(headers: list[tuple[str, str]], encoding: str, length: int | None) -> list[tuple[str, str]]:
+        out = []
+        vary = None
+        for key, value in headers:
+            name = key.lower()
+            # длина и диапазоны относились к несжатому телу
+            if name in ('content-length', 'accept-ranges'):
+                continue
+            if name == 'vary':
+                vary = value
+                continue
+            if name == 'etag' and not value.startswith('W/'):
+                # сжатое тело побайтно отличается от исходного: строгий ETag становится слабым
+                value = 'W/' + value
+            out.append((key, value))
+        if vary is None:
+            vary = 'Accept-Encoding'
+        elif vary.strip() != '*' and 'accept-encoding' not in vary.lower():
+            vary = f'{vary}, Accept-Encoding'
+        out.append(('Vary', vary))
+        out.append(('Content-Encoding', encoding))
+        if length is not None:
+            out.append(('Content-Length', str(length)))
+        return out
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+        captured = _Captured()
+        body = self.app(environ, captured.start_response)
+        return self._respond(body, captured, encoding, start_response)
+
+    def _respond(self, body, captured: _Captured, encoding: str, start_response):
+        iterator = iter(body)
+        buffered = captured.written
+        size = sum(len(chunk) for chunk in buffered)
+        exhausted = False
+        try:
+            # копим начало ответа, пока не станет ясно, стоит ли его сжимать
+            while not exhausted and (captured.status is None or (
+                    size < self.min_size and self.compressible(captured.status, captured.headers))):
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                else:
+                    buffered.append(chunk)
+                    size += len(chunk)
+            status, headers = captured.status, captured.headers
+            length = _header(headers, 'Content-Length')
+            if length and length.isdigit() and size >= int(length):
+                # тело известной длины уже прочитано целиком
+                exhausted = True
+            if (exhausted and size < self.min_size) or not self.compressible(status, headers):
+                start_response(status, headers, captured.exc_info)
+                yield from buffered
+                yield from iterator
+                return
+
+            encoder = self._encoder(encoding)
+            if exhausted:
+                data = encoder.compress(b''.join(buffered)) + encoder.finish()
+                start_response(status, self._headers(headers, encoding, len(data)), captured.exc_info)
+                HTTP_COMPRESSION_BYTES.inc(encoding, 'original', amount=size)
+                HTTP_COMPRESSION_BYTES.inc(encoding, 'compressed', amount=len(data))
+                yield data
+                return
+
+            start_response(status, self._headers(headers, encoding, None), captured.exc_info)
+            original = sent = pending = 0
+            try:
+                for chunk in itertools.chain(buffered, iterator):
+                    data = encoder.compress(chunk)
+                    original += len(chunk)
+                    pending += len(chunk)
+                    if pending >= FLUSH_BYTES:
+                        data += encoder.flush()
+                        pending = 0
+                    if data:
+                        sent += len(data)
+                        yield data
+                data = encoder.finish()
+                sent += len(data)
+                yield data
+            finally:
+                HTTP_COMPRESSION_BYTES.inc(encoding, 'original', amount=original)
+                HTTP_COMPRESSION_BYTES.inc(encoding, 'compressed', amount=sent)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+
+def init_compression(app):
+    """Оборачивает app.wsgi_app сжатием ответов по настройкам секции [compression]."""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=int(app.config.get('COMPRESSION_MIN_SIZE', 1024)),
+        gzip_level=int(app.config.get('COMPRESSION_GZIP_LEVEL', 6)),
+        brotli_quality=int(app.config.get('COMPRESSION_BROTLI_QUALITY', 4)),
+    )
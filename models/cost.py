@@ -0,0 +1,113 @@
+# models/cost.py
+import json
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import pymysql
+
+from models.backend import get_backend
+
+_PLACEHOLDER_RE = re.compile(r'%\((\w+)\)s')
+# операторы, которые допустимы в отчете (и для которых EXPLAIN не меняет данные)
+_SELECT_RE = re.compile(r'^\s*(?:\(\s*)*(SELECT|WITH)\b', re.I)
+
+# ошибки клиента (CR_*, 2000+) — сервер недоступен, а не ошибка в тексте запроса
+_CLIENT_ERRORS_FROM = 2000
+
+
+class CostCheckUnavailable(RuntimeError):
+    """Оценить запрос не удалось: база данных недоступна или не умеет EXPLAIN FORMAT=JSON."""
+
+
+@dataclass
+class CostEstimate:
+    """Оценка запроса по EXPLAIN FORMAT=JSON; хранится в описании отчета (поле estimate)."""
+    rows: int = 0
+    cost: float | None = None
+    full_scans: list[str] = field(default_factory=list)
+    checked_at: str = ''
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def placeholders(sql: str) -> list[str]:
+    """Имена параметров %(name)s в порядке первого появления."""
+    return list(dict.fromkeys(_PLACEHOLDER_RE.findall(sql)))
+
+
+def is_select(sql: str) -> bool:
+    return bool(_SELECT_RE.match(sql))
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _examined(node: Any, full_scans: list[str]) -> float:
+    """
+    Число просматриваемых строк по дереву плана. В nested_loop каждая
+    следующая таблица читается столько раз, сколько строк дала соединенная
+    часть перед ней, — так декартово произведение и дает большие числа.
+    """
+    if isinstance(node, list):
+        return sum(_examined(item, full_scans) for item in node)
+    if not isinstance(node, dict):
+        return 0.0
+    total = 0.0
+    for key, value in node.items():
+        if key == 'nested_loop' and isinstance(value, list):
+            prefix = 1.0
+            for item in value:
+                table = item.get('table', {}) if isinstance(item, dict) else {}
+                per_scan = _number(table.get('rows_examined_per_scan'))
+                total += prefix * per_scan + _examined(
+                    {k: v for k, v in table.items() if k != 'table_name'}, full_scans
+                )
+                _note_scan(table, full_scans)
+                prefix = max(1.0, _number(table.get('rows_produced_per_join')) or prefix * per_scan)
+        elif key == 'table' and isinstance(value, dict):
+            total += _number(value.get('rows_examined_per_scan')) + _examined(value, full_scans)
+            _note_scan(value, full_scans)
+        else:
+            total += _examined(value, full_scans)
+    return total
+
+
+def _note_scan(table: dict[str, Any], full_scans: list[str]):
+    if table.get('access_type') == 'ALL' and table.get('table_name'):
+        full_scans.append(table['table_name'])
+
+
+def estimate(db, sql: str, params: dict[str, Any] | None) -> CostEstimate:
+    """
+    Выполняет EXPLAIN FORMAT=JSON (сам запрос не выполняется). Ошибка в SQL
+    пробрасывается как pymysql.MySQLError; недоступная база —
+    CostCheckUnavailable. Стоимость есть только у MySQL (cost_info);
+    у MariaDB остается None.
+    """
+    if not get_backend(db.config).explain_json:
+        raise CostCheckUnavailable('драйвер базы данных не поддерживает EXPLAIN FORMAT=JSON')
+    try:
+        rows = db.select('EXPLAIN FORMAT=JSON ' + sql.strip().rstrip(';'), params, 'report:explain',
+                         max_rows=0)
+    except pymysql.err.OperationalError as exc:
+        if exc.args and isinstance(exc.args[0], int) and exc.args[0] >= _CLIENT_ERRORS_FROM:
+            raise CostCheckUnavailable(str(exc)) from exc
+        raise
+    plan = json.loads(next(iter(rows[0].values())))
+    block = plan.get('query_block', plan)
+    cost = (block.get('cost_info') or {}).get('query_cost')
+    full_scans: list[str] = []
+    examined = _examined(plan, full_scans)
+    return CostEstimate(
+        rows=int(examined),
+        cost=round(_number(cost), 2) if cost is not None else None,
+        full_scans=list(dict.fromkeys(full_scans)),
+        checked_at=time.strftime('%Y-%m-%d %H:%M:%S'),
+    )
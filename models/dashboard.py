@@ -0,0 +1,107 @@
+# models/dashboard.py
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Panel:
+    """Панель сводки: load выполняет запрос (в своем соединении) и возвращает ResultSet."""
+    key: str
+    title: str
+    load: Callable[[], Any]
+    timeout: float
+    url: str | None = None
+
+
+@dataclass
+class PanelResult:
+    key: str
+    title: str
+    url: str | None
+    status: str  # ok | error | timeout
+    result: Any = None
+    error: str | None = None
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'key': self.key, 'title': self.title, 'status': self.status,
+                'error': self.error, 'seconds': round(self.seconds, 3)}
+
+
+class DashboardRunner:
+    """
+    Одновременное выполнение панелей сводки в общем пуле из max_workers
+    потоков: время страницы близко к самой медленной панели, а не к сумме.
+    У каждой панели свой срок (отсчитывается от начала сводки, включая
+    ожидание свободного потока); ошибка или таймаут одной панели остальные
+    не затрагивают. Панель, не уложившаяся в срок, дорабатывает в фоне —
+    ее результат попадет в кэш, а сервер прервет ее по MAX_EXECUTION_TIME.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers: int | None = None):
+        with self._lock:
+            if max_workers is not None and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='dashboard')
+            return self._executor
+
+    @staticmethod
+    def _timed(load: Callable[[], Any]) -> tuple[Any, float]:
+        started = time.perf_counter()
+        result = load()
+        return result, time.perf_counter() - started
+
+    def run(self, panels: list[Panel]) -> list[PanelResult]:
+        started = time.monotonic()
+        pool = self._pool()
+        futures: list[Future] = [pool.submit(self._timed, panel.load) for panel in panels]
+        results = []
+        for panel, future in zip(panels, futures):
+            remaining = started + panel.timeout - time.monotonic()
+            try:
+                result, seconds = future.result(timeout=max(remaining, 0))
+            except FutureTimeout:
+                future.cancel()
+                results.append(PanelResult(
+                    panel.key, panel.title, panel.url, 'timeout',
+                    error=f'Панель не уложилась в {panel.timeout:g} с.',
+                    seconds=time.monotonic() - started,
+                ))
+            except Exception as exc:
+                logger.warning('Панель %s завершилась ошибкой: %s', panel.key, exc)
+                # у ошибок MySQL последний аргумент — текст сообщения сервера
+                message = str(exc.args[-1]) if isinstance(exc, pymysql.MySQLError) and exc.args else str(exc)
+                results.append(PanelResult(panel.key, panel.title, panel.url, 'error', error=message,
+                                           seconds=time.monotonic() - started))
+            else:
+                results.append(PanelResult(panel.key, panel.title, panel.url, 'ok', result, seconds=seconds))
+        return results
+
+
+# общий для процесса пул панелей; размер задается секцией [dashboard] app.conf
+dashboard_runner = DashboardRunner()
+
+
+def init_dashboard(config):
+    dashboard_runner.configure(max_workers=int(config.get('DASHBOARD_MAX_WORKERS', 4)))
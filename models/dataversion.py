@@ -0,0 +1,149 @@
+# models/dataversion.py
+import hashlib
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# таблица после FROM/JOIN (FROM может перечислять несколько через запятую);
+# подзапрос "FROM (SELECT ..." пропускается — его таблицы найдет внутренний FROM
+_FROM_RE = re.compile(
+    r'\bFROM\s+(?!\()(.+?)(?=\b(?:WHERE|GROUP|ORDER|HAVING|LIMIT|UNION|WINDOW|JOIN|LEFT|RIGHT|INNER|'
+    r'CROSS|NATURAL|STRAIGHT_JOIN|ON|USING)\b|[();]|$)',
+    re.I | re.S,
+)
+_JOIN_RE = re.compile(r'\b(?:JOIN|STRAIGHT_JOIN)\s+(?!\()`?(\w+)`?', re.I)
+_NAME_RE = re.compile(r'^\s*`?(\w+)`?(?:\s*\.\s*`?(\w+)`?)?')
+
+_MARKERS_SQL = (
+    'SELECT TABLE_NAME, UNIX_TIMESTAMP(UPDATE_TIME), AUTO_INCREMENT, TABLE_ROWS '
+    'FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({})'
+)
+
+
+def tables(sqls: Iterable[str]) -> list[str]:
+    """
+    Таблицы, которые читает запрос (по тексту SQL, без разбора грамматики).
+    Лишние имена (CTE, EXTRACT(... FROM col)) безвредны: в information_schema
+    для них просто нет строки.
+    """
+    found: list[str] = []
+    for sql in sqls:
+        for match in _FROM_RE.finditer(sql):
+            for item in match.group(1).split(','):
+                name = _NAME_RE.match(item)
+                if name:
+                    found.append((name.group(2) or name.group(1)).lower())
+        found.extend(name.lower() for name in _JOIN_RE.findall(sql))
+    return sorted(set(found) - {'dual'})
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    """Версия данных набора таблиц: token меняется при любом их изменении."""
+    token: str
+    # время последнего изменения (unix time) или None, если сервер его не знает
+    last_modified: float | None
+    # реплика, с которой прочитана версия (None — основной сервер): строки под
+    # этой версией нужно читать оттуда же, иначе отстающий сервер вернет старые
+    server: str | None = None
+
+
+class DataVersionTracker:
+    """
+    Версии данных по маркерам таблиц из information_schema.TABLES:
+    UPDATE_TIME, AUTO_INCREMENT и оценка числа строк. Маркеры читаются с
+    того сервера, с которого блок читает выборки (реплика или основной), и
+    кэшируются отдельно для каждого сервера на ttl секунд, чтобы частые
+    обновления страниц не нагружали его.
+    Токен дополнительно меняется раз в max_age секунд: на серверах, где
+    UPDATE_TIME не ведется (MariaDB, таблицы после перезапуска), изменение
+    без новых строк будет замечено не позже этого срока.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_age: float = 300.0, enabled: bool = True):
+        self.ttl = ttl
+        self.max_age = max_age
+        self.enabled = enabled
+        self._markers: dict[tuple[str | None, str], tuple[float, tuple]] = {}
+        self._lock = threading.Lock()
+        # MySQL 8 по умолчанию кэширует статистику information_schema на сутки
+        self._stats_expiry = True
+
+    def configure(self, ttl: float | None = None, max_age: float | None = None,
+                  enabled: bool | None = None):
+        with self._lock:
+            if ttl is not None:
+                self.ttl = ttl
+            if max_age is not None:
+                self.max_age = max_age
+            if enabled is not None:
+                self.enabled = enabled
+            self._markers.clear()
+
+    def _fetch(self, conn, names: list[str]) -> dict[str, tuple]:
+        with conn.cursor(pymysql.cursors.Cursor) as cur:
+            if self._stats_expiry:
+                try:
+                    cur.execute('SET SESSION information_schema_stats_expiry = 0')
+                except pymysql.MySQLError:
+                    self._stats_expiry = False
+            cur.execute(_MARKERS_SQL.format(', '.join(['%s'] * len(names))), names)
+            rows = cur.fetchall()
+        markers = {name: (None, None, None) for name in names}
+        for name, updated, auto_increment, table_rows in rows:
+            markers[str(name).lower()] = (
+                None if updated is None else float(updated), auto_increment, table_rows,
+            )
+        return markers
+
+    def markers(self, db, names: list[str]) -> dict[str, tuple]:
+        server = db.read_server
+        now = time.monotonic()
+        with self._lock:
+            fresh = {
+                name: entry[1] for name in names
+                if (entry := self._markers.get((server, name))) is not None and entry[0] > now
+            }
+        missing = [name for name in names if name not in fresh]
+        if missing:
+            fetched = self._fetch(db.read_conn, missing)
+            with self._lock:
+                for name, marker in fetched.items():
+                    self._markers[(server, name)] = (now + self.ttl, marker)
+            fresh.update(fetched)
+        return fresh
+
+    def version(self, db, sqls: Iterable[str]) -> DataVersion | None:
+        """Версия данных для запроса или None, если таблиц в нем не найдено."""
+        names = tables(sqls)
+        if not self.enabled or not names:
+            return None
+        markers = self.markers(db, names)
+        server = db.read_server
+        # маркеры разных серверов несравнимы (UPDATE_TIME — время применения на сервере)
+        parts: list[Any] = [server] + [markers[name] for name in names]
+        if self.max_age:
+            parts.append(int(time.time() // self.max_age))
+        token = hashlib.sha1(repr((names, parts)).encode()).hexdigest()[:20]
+        times = [marker[0] for marker in markers.values()]
+        last_modified = None if not times or None in times else max(times)
+        return DataVersion(token, last_modified, server)
+
+
+# общий для процесса учет версий; параметры задаются секцией [etag] app.conf
+data_versions = DataVersionTracker()
+
+
+def init_data_versions(config):
+    data_versions.configure(
+        ttl=float(config.get('ETAG_VERSION_TTL', data_versions.ttl)),
+        max_age=float(config.get('ETAG_MAX_AGE', data_versions.max_age)),
+        enabled=bool(config.get('ETAG_ENABLED', True)),
+    )
@@ -1,40 +1,324 @@
 # models/db.py
+import time
+
 import pymysql
-from pymysql.cursors import DictCursor
+from flask import has_request_context, session
+from pymysql.cursors import Cursor, SSCursor, SSDictCursor
+
+from models.cache import estimate_size
+from models.columnar import column_types
+from models.governor import ER_QUERY_TIMEOUT, QueryTimeout, query_governor, with_time_limit
+from models.metrics import QUERY_ERRORS, QUERY_RESULT_BYTES, QUERY_ROWS, QUERY_SECONDS
+from models.pagination import DEFAULT_PAGE_SIZE, build_page, keyset_query
+from models.pool import get_pool
+from models.replicas import replica_router
+from models.resultset import ResultSet
+from models.slowlog import slow_log
+
+# ошибки, после которых соединение нельзя возвращать в пул
+_BROKEN_CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+
+def _column_names(cursor) -> list[str]:
+    # как у DictCursor: повторяющееся имя столбца уточняется именем таблицы
+    fields = getattr(getattr(cursor, '_result', None), 'fields', None)
+    if not fields:
+        return [col[0] for col in cursor.description or ()]
+    names: list[str] = []
+    for f in fields:
+        names.append(f'{f.table_name}.{f.name}' if f.name in names else f.name)
+    return names
+
+
+def _request_login() -> str | None:
+    # пользователь текущего HTTP-запроса — ключ ограничения одновременных запросов
+    if has_request_context():
+        return (session.get('user') or {}).get('login')
+    return None
+
+
+class _Lease:
+    """Соединение, взятое блоком with из пула основного сервера или реплики."""
+    __slots__ = ('pool', 'conn', 'config', 'replica', 'discard')
+
+    def __init__(self, pool, conn, config, replica=None):
+        self.pool = pool
+        self.conn = conn
+        self.config = config
+        self.replica = replica
+        self.discard = False
+
+
+# объем результата для метрик оценивается по первым строкам: полный обход
+# большой выборки стоил бы дороже самой метрики
+_SIZE_SAMPLE_ROWS = 100
+
+
+def _result_bytes(rows, count: int) -> int:
+    sample = list(rows[:_SIZE_SAMPLE_ROWS])
+    if not sample:
+        return 0
+    return estimate_size(sample) * count // len(sample)
 
 
 class DBContextManager:
-    def __init__(self, config):
+    """
+    Соединения из пула на время блока with. Вход проходит допуск
+    query_governor (лимиты одновременных запросов на процесс и на
+    пользователя); governed=False — для служебных запросов вроде KILL QUERY.
+    replica — читать с этой реплики (имя host:port), если она здорова;
+    primary=True — все выборки блока на основном сервере. Оба нужны, чтобы
+    строки брались с того же сервера, что и версия данных для ETag.
+
+    Соединения берутся при первом обращении. Выборки (select, stream) идут
+    на реплику из [replicas], если она есть и здорова. execute и обращение
+    к db.conn закрепляют блок за основным сервером: последующие выборки
+    блока видят его изменения и временные таблицы (многооператорные запросы).
+    """
+
+    def __init__(self, config, user: str | None = None, governed: bool = True,
+                 replica: str | None = None, primary: bool = False):
         self.config = config
-        self.conn = None
-        self.cursor = None
+        self.user = user
+        self.governed = governed
+        self.replica = replica
+        self.primary = primary
+        self._primary: _Lease | None = None
+        self._read: _Lease | None = None
+        self._admitted = False
 
     def __enter__(self):
-        self.conn = pymysql.connect(
-            host=self.config['DB_HOST'],
-            port=int(self.config.get('DB_PORT', 3306)),
-            user=self.config['DB_USER'],
-            password=self.config['DB_PASSWORD'],
-            database=self.config['DB_NAME'],
-            cursorclass=DictCursor,
-            autocommit=True,
-            charset='utf8mb4',
-            use_unicode=True,
-            init_command="SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci"
-        )
-        self.cursor = self.conn.cursor()
+        if self.governed:
+            if self.user is None:
+                self.user = _request_login()
+            query_governor.acquire(self.user)
+            self._admitted = True
         return self
 
+    def _leave(self):
+        if self._admitted:
+            query_governor.release(self.user)
+            self._admitted = False
+
     def __exit__(self, et, ev, tb):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-
-    def select(self, sql, params=None):
-        self.cursor.execute(sql, params)
-        return self.cursor.fetchall()
-
-    def execute(self, sql, params=None):
-        self.cursor.execute(sql, params)
-        return self.cursor.rowcount
+        broken = et is not None and issubclass(et, _BROKEN_CONNECTION_ERRORS)
+        for lease in (self._read, self._primary):
+            if lease is not None:
+                lease.pool.release(lease.conn, discard=broken or lease.discard)
+        self._read = None
+        self._primary = None
+        self._leave()
+
+    def _primary_lease(self) -> _Lease:
+        if self._primary is None:
+            pool = get_pool(self.config)
+            self._primary = _Lease(pool, pool.acquire(), self.config)
+        return self._primary
+
+    def _read_lease(self) -> _Lease:
+        if self._primary is not None or self.primary:
+            return self._primary_lease()
+        if self._read is not None:
+            return self._read
+        # заданная реплика недоступна — основной сервер: он не отстает ни от одной реплики
+        replica = replica_router.get(self.replica) if self.replica else replica_router.pick()
+        if replica is not None:
+            try:
+                pool = get_pool(replica.config)
+                self._read = _Lease(pool, pool.acquire(), replica.config, replica)
+                return self._read
+            except _BROKEN_CONNECTION_ERRORS as exc:
+                replica_router.mark_failed(replica, exc)
+        return self._primary_lease()
+
+    def _read_failed(self, lease: _Lease, exc: Exception) -> bool:
+        """Реплика оборвала соединение: исключить ее; True — выборку можно повторить на основном."""
+        if lease.replica is None or not isinstance(exc, _BROKEN_CONNECTION_ERRORS):
+            return False
+        replica_router.mark_failed(lease.replica, exc)
+        lease.pool.release(lease.conn, discard=True)
+        self._read = None
+        return True
+
+    @property
+    def conn(self):
+        """Соединение с основным сервером (закрепляет блок за ним)."""
+        return self._primary_lease().conn
+
+    @property
+    def read_conn(self):
+        """Соединение, с которого читают выборки блока (реплика или основной сервер)."""
+        return self._read_lease().conn
+
+    @property
+    def read_server(self) -> str | None:
+        """Имя реплики, с которой читает блок; None — основной сервер."""
+        replica = self._read_lease().replica
+        return replica.name if replica is not None else None
+
+    def cancel_hook(self):
+        """
+        Функция, прерывающая выборку этого блока: KILL QUERY на том сервере,
+        где она выполняется. Вызывается до выборки, например для фоновых задач.
+        """
+        lease = self._read_lease()
+        interrupt = getattr(lease.conn, 'interrupt', None)
+        if interrupt is not None:
+            # встроенная база (SQLite) прерывает запрос без отдельного соединения
+            return interrupt
+        config, thread_id = lease.config, lease.conn.thread_id()
+        return lambda: kill_query(config, thread_id)
+
+    def _observe(self, conn, name, sql, params, started, rows, result_bytes=None):
+        # conn=None — соединение с недочитанным результатом: EXPLAIN на нем
+        # сначала вычитал бы выборку до конца, отменив ограничение max_rows
+        duration = time.perf_counter() - started
+        label = name or 'adhoc'
+        QUERY_SECONDS.observe(duration, label)
+        QUERY_ROWS.observe(rows, label)
+        if result_bytes is not None:
+            QUERY_RESULT_BYTES.observe(result_bytes, label)
+        if slow_log.should_record(duration):
+            plan, error = None, None
+            if slow_log.wants_explain(sql):
+                if conn is None:
+                    error = 'план не снят: выборка прервана по max_rows'
+                else:
+                    plan, error = self._explain(conn, sql, params)
+            slow_log.record(name, sql, params, duration, rows, plan, error)
+
+    def _explain(self, conn, sql, params):
+        # план снимается сразу, на том же соединении и с теми же параметрами
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql, params)
+                return cursor.fetchall(), None
+        except Exception as exc:
+            return None, str(exc)
+
+    def _limits(self, timeout_ms, max_rows) -> tuple[int, int]:
+        # None — значение по умолчанию из секции [limits], 0 — без ограничения
+        if timeout_ms is None:
+            timeout_ms = self.config.get('DB_MAX_EXECUTION_MS', 0)
+        if max_rows is None:
+            max_rows = self.config.get('DB_MAX_ROWS', 0)
+        return int(timeout_ms or 0), int(max_rows or 0)
+
+    # name — имя шаблона SQL или report:<id>; используется как метка метрик
+    def select(self, sql, params=None, name=None, timeout_ms=None, max_rows=None) -> ResultSet:
+        """
+        Выборка в виде ResultSet: строки читаются кортежами (без словаря на
+        каждую строку), имена и типы столбцов берутся из описания курсора.
+
+        timeout_ms — MAX_EXECUTION_TIME для SELECT; max_rows — сколько строк
+        читать не больше: лишние не передаются, у результата ставится
+        truncated. None — значения по умолчанию из [limits] app.conf.
+        """
+        timeout_ms, max_rows = self._limits(timeout_ms, max_rows)
+        sql = with_time_limit(sql, timeout_ms)
+        lease = self._read_lease()
+        try:
+            return self._select(lease, sql, params, name, timeout_ms, max_rows)
+        except _BROKEN_CONNECTION_ERRORS as exc:
+            if not self._read_failed(lease, exc):
+                raise
+        # реплика недоступна — выборка повторяется на основном сервере
+        return self._select(self._primary_lease(), sql, params, name, timeout_ms, max_rows)
+
+    def _select(self, lease: _Lease, sql, params, name, timeout_ms, max_rows) -> ResultSet:
+        started = time.perf_counter()
+        # с ограничением строк курсор небуферизованный: остаток выборки не читается
+        cursor = lease.conn.cursor(SSCursor if max_rows else Cursor)
+        truncated = False
+        try:
+            cursor.execute(sql, params)
+            rows = list(cursor.fetchmany(max_rows + 1) if max_rows else cursor.fetchall())
+            if max_rows and len(rows) > max_rows:
+                truncated = True
+                del rows[max_rows:]
+            result = ResultSet(_column_names(cursor), rows, column_types(cursor.description))
+            result.truncated = truncated
+        except pymysql.err.OperationalError as exc:
+            QUERY_ERRORS.inc(name or 'adhoc')
+            if exc.args and exc.args[0] == ER_QUERY_TIMEOUT:
+                raise QueryTimeout(
+                    f'Запрос прерван: превышено ограничение времени выполнения ({timeout_ms} мс).'
+                ) from exc
+            raise
+        except Exception:
+            QUERY_ERRORS.inc(name or 'adhoc')
+            raise
+        finally:
+            if truncated:
+                # недочитанный результат пришлось бы вычитывать до конца — соединение закрывается
+                lease.discard = True
+            else:
+                cursor.close()
+        self._observe(None if truncated else lease.conn, name, sql, params, started, len(rows),
+                      _result_bytes(rows, len(rows)))
+        return result
+
+    def select_page(self, sql, params, keys, after=None, before=None,
+                    page_size=DEFAULT_PAGE_SIZE, name=None, timeout_ms=None):
+        # страница выборки по ключу сортировки keys (см. models.pagination)
+        query, query_params = keyset_query(sql, params, keys, after, before, page_size)
+        rows = self.select(query, query_params, name, timeout_ms, max_rows=0)
+        return build_page(rows, keys, after, before, page_size)
+
+    def execute(self, sql, params=None, name=None):
+        # изменения и служебные операторы — только на основном сервере
+        conn = self.conn
+        started = time.perf_counter()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                rowcount = cursor.rowcount
+        except Exception:
+            QUERY_ERRORS.inc(name or 'adhoc')
+            raise
+        self._observe(conn, name, sql, params, started, rowcount)
+        return rowcount
+
+    def stream(self, sql, params=None, chunk_size=500, name=None, timeout_ms=None):
+        """
+        Построчно отдает результат через небуферизованный серверный курсор
+        (SSDictCursor), читая строки пачками по chunk_size. Память не зависит
+        от размера выборки. Пока генератор не исчерпан, соединение занято.
+        Ограничение времени ставится, только если задано явно: полная выгрузка
+        может законно идти дольше, чем обычная страница.
+        """
+        sql = with_time_limit(sql, timeout_ms)
+        lease = self._read_lease()
+        cursor = lease.conn.cursor(SSDictCursor)
+        finished = False
+        started = time.perf_counter()
+        count = 0
+        sample: list = []
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if not sample:
+                    sample = rows[:_SIZE_SAMPLE_ROWS]
+                count += len(rows)
+                yield from rows
+            finished = True
+        except Exception:
+            QUERY_ERRORS.inc(name or 'adhoc')
+            raise
+        finally:
+            if finished:
+                cursor.close()
+                self._observe(lease.conn, name, sql, params, started, count, _result_bytes(sample, count))
+            else:
+                # недочитанный результат пришлось бы вычитывать до конца —
+                # дешевле закрыть соединение, чем возвращать его в пул
+                lease.discard = True
+
+
+def kill_query(config, thread_id):
+    """Прерывает запрос, выполняющийся в соединении thread_id (KILL QUERY)."""
+    with DBContextManager(config, governed=False) as db:
+        db.execute('KILL QUERY %s', (int(thread_id),))
@@ -0,0 +1,123 @@
+# models/export.py
+import csv
+import datetime
+import decimal
+import io
+import json
+import re
+import tempfile
+from typing import Any, Iterable, Iterator, Mapping
+
+# сколько строк накапливать перед отдачей очередного блока
+ROWS_PER_CHUNK = 500
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def json_default(value: Any):
+    """Кодирование типов MySQL для JSON: Decimal — строкой без потери точности, даты — ISO 8601."""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, Mapping):
+        # строка ResultSet (models.resultset.Row)
+        return dict(value.items())
+    raise TypeError(f'Тип {type(value).__name__} не сериализуется в JSON')
+
+
+def csv_chunks(rows: Iterable[Mapping[str, Any]]) -> Iterator[bytes]:
+    # BOM нужен, чтобы Excel правильно открыл кириллицу в UTF-8
+    buf = io.StringIO()
+    buf.write('\ufeff')
+    writer = csv.writer(buf)
+    pending = 0
+    header_written = False
+    for row in rows:
+        if not header_written:
+            writer.writerow(row.keys())
+            header_written = True
+        writer.writerow(row.values())
+        pending += 1
+        if pending >= ROWS_PER_CHUNK:
+            yield buf.getvalue().encode('utf-8')
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def ndjson_chunks(rows: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    lines: list[str] = []
+    for row in rows:
+        lines.append(json.dumps(row, ensure_ascii=False, default=json_default))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _xlsx_value(value: Any):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return value
+
+
+_SHEET_TITLE_INVALID = re.compile(r'[\[\]:*?/\\]')
+
+
+def _sheet_title(title: str) -> str:
+    # Excel не допускает в имени листа []:*?/\, апострофа по краям и длины больше 31
+    title = _SHEET_TITLE_INVALID.sub('_', title)[:31].strip("' ")
+    return title or 'Данные'
+
+
+def xlsx_chunks(rows: Iterable[dict[str, Any]], title: str = 'Данные',
+                chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Пишет книгу в режиме write_only (строки сразу уходят во временные файлы
+    openpyxl) и затем отдает готовый файл блоками. Требует пакет openpyxl.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=_sheet_title(title))
+    header_written = False
+    for row in rows:
+        if not header_written:
+            ws.append(list(row.keys()))
+            header_written = True
+        ws.append([_xlsx_value(v) for v in row.values()])
+
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            yield block
+
+
+def export_chunks(fmt: str, rows: Iterable[dict[str, Any]], title: str = 'Данные') -> Iterator[bytes]:
+    if fmt == 'csv':
+        return csv_chunks(rows)
+    if fmt == 'ndjson':
+        return ndjson_chunks(rows)
+    if fmt == 'xlsx':
+        return xlsx_chunks(rows, title)
+    raise ValueError(f'Неизвестный формат выгрузки: {fmt}')
@@ -0,0 +1,190 @@
+# models/governor.py
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# лексемы SQL, достаточные, чтобы найти SELECT верхнего уровня: комментарии и строки
+# пропускаются целиком, скобки считаются
+_SQL_TOKEN_RE = re.compile(
+    r"\s+|--[^\n]*|#[^\n]*|/\*.*?\*/|'(?:\\.|''|[^'\\])*'|\"(?:\\.|\"\"|[^\"\\])*\"|`[^`]*`|\w+|.",
+    re.S,
+)
+
+# ER_QUERY_TIMEOUT (MySQL): запрос прерван по MAX_EXECUTION_TIME
+ER_QUERY_TIMEOUT = 3024
+
+
+class QueryRejected(RuntimeError):
+    """Запрос не допущен к выполнению: исчерпан лимит одновременных запросов."""
+
+
+class QueryTimeout(RuntimeError):
+    """Запрос прерван сервером по ограничению времени выполнения."""
+
+
+def _hint_position(sql: str) -> int | None:
+    """
+    Позиция сразу после SELECT, к которому относится подсказка оптимизатору:
+    первый SELECT запроса (после комментариев и открывающих скобок) или, для
+    WITH ... SELECT, SELECT основного запроса после списка CTE. None — не выборка.
+    """
+    depth = 0
+    with_clause = False
+    for match in _SQL_TOKEN_RE.finditer(sql):
+        token = match.group()
+        if token[0].isspace() or token.startswith(('--', '#', '/*')):
+            continue
+        if token == '(':
+            depth += 1
+            continue
+        if token == ')':
+            depth -= 1
+            continue
+        word = token.upper()
+        if not with_clause:
+            if word == 'SELECT':
+                return match.end()
+            if word != 'WITH':
+                return None
+            with_clause = True
+            depth = 0
+        elif word == 'SELECT' and depth == 0:
+            return match.end()
+    return None
+
+
+def with_time_limit(sql: str, timeout_ms: int | None) -> str:
+    """
+    Добавляет к выборке подсказку /*+ MAX_EXECUTION_TIME(n) */ (MySQL 5.7+):
+    после первого SELECT или, в запросах WITH, после SELECT основного запроса
+    (подсказку у SELECT внутри CTE сервер игнорирует). Начальные комментарии
+    пропускаются. Остальные операторы (EXPLAIN, DML) не меняются; MariaDB
+    принимает подсказку за комментарий.
+    """
+    if not timeout_ms or timeout_ms <= 0:
+        return sql
+    position = _hint_position(sql)
+    if position is None:
+        return sql
+    return f'{sql[:position]} /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */{sql[position:]}'
+
+
+class QueryGovernor:
+    """
+    Допуск запросов к БД: не больше max_concurrent одновременно на процесс и
+    max_per_user на пользователя. Сверх лимита запрос ждет в очереди до
+    queue_timeout секунд; если очередь уже длиннее max_queue, он сразу
+    отклоняется с QueryRejected.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_per_user: int = 2,
+                 queue_timeout: float = 5.0, max_queue: int = 16):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.enabled = True
+        self._cond = threading.Condition()
+        self._active = 0
+        self._by_user: dict[str, int] = {}
+        self._waiting = 0
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timeouts': 0}
+
+    def configure(self, enabled: bool = True, max_concurrent: int | None = None,
+                  max_per_user: int | None = None, queue_timeout: float | None = None,
+                  max_queue: int | None = None):
+        with self._cond:
+            self.enabled = enabled
+            if max_concurrent is not None:
+                self.max_concurrent = max_concurrent
+            if max_per_user is not None:
+                self.max_per_user = max_per_user
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            if max_queue is not None:
+                self.max_queue = max_queue
+            self._cond.notify_all()
+
+    def _blocked_by(self, user: str | None) -> str | None:
+        if self.max_concurrent and self._active >= self.max_concurrent:
+            return 'global'
+        if user and self.max_per_user and self._by_user.get(user, 0) >= self.max_per_user:
+            return 'user'
+        return None
+
+    def _take(self, user: str | None):
+        self._active += 1
+        if user:
+            self._by_user[user] = self._by_user.get(user, 0) + 1
+        self._stats['admitted'] += 1
+
+    def _reject(self, reason: str, waited: bool):
+        self._stats['timeouts' if waited else 'rejected'] += 1
+        if reason == 'user':
+            raise QueryRejected('Слишком много одновременных запросов от вашей учетной записи. '
+                                'Дождитесь завершения предыдущих и повторите.')
+        raise QueryRejected('Сервер перегружен запросами. Повторите попытку чуть позже.')
+
+    def acquire(self, user: str | None = None):
+        with self._cond:
+            reason = self._blocked_by(user) if self.enabled else None
+            if reason is None:
+                self._take(user)
+                return
+            if self._waiting >= self.max_queue:
+                self._reject(reason, waited=False)
+            self._waiting += 1
+            self._stats['queued'] += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while reason is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject(reason, waited=True)
+                    self._cond.wait(remaining)
+                    reason = self._blocked_by(user) if self.enabled else None
+                self._take(user)
+            finally:
+                self._waiting -= 1
+
+    def release(self, user: str | None = None):
+        with self._cond:
+            self._active -= 1
+            if user:
+                left = self._by_user.get(user, 1) - 1
+                if left > 0:
+                    self._by_user[user] = left
+                else:
+                    self._by_user.pop(user, None)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, user: str | None = None) -> Iterator[None]:
+        self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release(user)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            data = dict(self._stats)
+            data.update(active=self._active, waiting=self._waiting, users=len(self._by_user),
+                        max_concurrent=self.max_concurrent, max_per_user=self.max_per_user)
+        return data
+
+
+# общий для процесса допуск запросов; параметры задаются из секции [limits] app.conf
+query_governor = QueryGovernor()
+
+
+def init_governor(config):
+    query_governor.configure(
+        enabled=bool(config.get('LIMITS_ENABLED', True)),
+        max_concurrent=int(config.get('LIMITS_MAX_CONCURRENT', query_governor.max_concurrent)),
+        max_per_user=int(config.get('LIMITS_MAX_PER_USER', query_governor.max_per_user)),
+        queue_timeout=float(config.get('LIMITS_QUEUE_TIMEOUT', query_governor.queue_timeout)),
+        max_queue=int(config.get('LIMITS_MAX_QUEUE', query_governor.max_queue)),
+    )
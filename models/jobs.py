@@ -0,0 +1,205 @@
+# models/jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+# сколько секунд результат доступен по адресу задачи, даже если его срок меньше:
+# страница ожидания должна успеть его показать
+RESULT_VIEW_SECONDS = 60.0
+
+
+class JobQueueFull(RuntimeError):
+    """Очередь фоновых задач заполнена."""
+
+
+class Job:
+    def __init__(self, key: Hashable, owner: str | None = None, title: str | None = None,
+                 ttl: float | None = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.owner = owner
+        self.title = title
+        # срок годности результата (cache_ttl отчета); None — result_ttl менеджера
+        self.ttl = ttl
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._cancel_hook: Callable[[], None] | None = None
+        self._cancel_requested = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested
+
+    def set_cancel_hook(self, hook: Callable[[], None] | None):
+        """Функция, прерывающая выполнение (например, KILL QUERY для текущего соединения)."""
+        with self._lock:
+            self._cancel_hook = hook
+
+    def to_dict(self) -> dict[str, Any]:
+        now = time.time()
+        started = self.started_at or now
+        return {
+            'id': self.id,
+            'status': self.status,
+            'finished': self.finished,
+            'title': self.title,
+            'error': self.error,
+            'queued_for': round(started - self.created_at, 3),
+            'running_for': round((self.finished_at or now) - started, 3) if self.started_at else 0,
+        }
+
+
+class JobManager:
+    """
+    Фоновое выполнение долгих запросов без внешнего брокера: ограниченный пул
+    потоков, дедупликация по ключу (отчет, параметры), отмена и хранение
+    результата в течение result_ttl секунд или срока задачи (ttl), если он
+    меньше. Готовый результат повторно отдается новым запросам только в
+    пределах этого срока; по адресу задачи он доступен не меньше
+    RESULT_VIEW_SECONDS. Задачи живут в памяти процесса.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 20, result_ttl: float = 600.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor: ThreadPoolExecutor | None = None
+        self._jobs: dict[str, Job] = {}
+        self._by_key: dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers: int | None = None, max_queue: int | None = None,
+                  result_ttl: float | None = None):
+        with self._lock:
+            if max_workers is not None and max_workers != self.max_workers:
+                self.max_workers = max_workers
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if result_ttl is not None:
+                self.result_ttl = result_ttl
+
+    def _fresh_for(self, job: Job) -> float:
+        return self.result_ttl if job.ttl is None else min(self.result_ttl, job.ttl)
+
+    def _purge(self, now: float):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - (job.finished_at or now) > min(
+                self.result_ttl, max(self._fresh_for(job), RESULT_VIEW_SECONDS))
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def submit(self, key: Hashable, fn: Callable[[Job], Any], owner: str | None = None,
+               title: str | None = None, ttl: float | None = None) -> Job:
+        """
+        Ставит fn(job) в очередь или возвращает уже существующую задачу с тем же
+        ключом: незавершенную или готовую, чей результат еще не старше ее срока.
+        """
+        with self._lock:
+            now = time.time()
+            self._purge(now)
+            existing_id = self._by_key.get(key)
+            if existing_id:
+                existing = self._jobs[existing_id]
+                if existing.status in (QUEUED, RUNNING):
+                    return existing
+                if existing.status == DONE and now - (existing.finished_at or now) <= self._fresh_for(existing):
+                    return existing
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if queued >= self.max_queue:
+                raise JobQueueFull('Очередь фоновых отчетов заполнена, попробуйте позже.')
+            job = Job(key, owner, title, ttl)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='report-job'
+                )
+            self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        with job._lock:
+            if job._cancel_requested:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            result = fn(job)
+        except Exception as exc:
+            status, result, error = (CANCELLED, None, None) if job.cancel_requested else (FAILED, None, str(exc))
+        else:
+            status, error = (CANCELLED, None) if job.cancel_requested else (DONE, None)
+        with job._lock:
+            job.status = status
+            job.result = result if status == DONE else None
+            job.error = error
+            job.finished_at = time.time()
+            job._cancel_hook = None
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            self._purge(time.time())
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        with job._lock:
+            job._cancel_requested = True
+            hook = job._cancel_hook
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        if hook is not None:
+            try:
+                hook()
+            except Exception:
+                pass
+        return True
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            data = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                data[job.status] += 1
+            data['max_workers'] = self.max_workers
+            data['max_queue'] = self.max_queue
+        return data
+
+
+# общий для процесса менеджер задач; параметры задаются из секции [jobs] app.conf
+report_jobs = JobManager()
+
+
+def init_jobs(config):
+    report_jobs.configure(
+        max_workers=int(config.get('JOBS_MAX_WORKERS', report_jobs.max_workers)),
+        max_queue=int(config.get('JOBS_MAX_QUEUE', report_jobs.max_queue)),
+        result_ttl=float(config.get('JOBS_RESULT_TTL', report_jobs.result_ttl)),
+    )
+    return report_jobs
@@ -0,0 +1,196 @@
+# models/metrics.py
+import bisect
+import threading
+from typing import Callable, Iterable
+
+# границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+BYTE_BUCKETS = (1024, 8192, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for values, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labels, values)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # на каждую комбинацию меток: [счетчики корзин..., count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(label_values)
+            if data is None:
+                data = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                data[index] += 1
+            data[-2] += 1
+            data[-1] += value
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for values, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                labels = _format_labels(self.labels, values, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {int(data[-2])}')
+            plain = _format_labels(self.labels, values)
+            lines.append(f'{self.name}_count{plain} {int(data[-2])}')
+            lines.append(f'{self.name}_sum{plain} {_format_value(data[-1])}')
+        return lines
+
+
+class GaugeCallback(_Metric):
+    """Значения вычисляются при выдаче метрик: callback() -> {метки: значение}."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels, callback: Callable[[], dict[tuple[str, ...], float]]):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def collect(self) -> list[str]:
+        lines = self.header()
+        for values, value in sorted(self.callback().items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, values)} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+QUERY_SECONDS = registry.register(Histogram(
+    'kurs_query_duration_seconds', 'Время выполнения запроса к БД', ('query',)))
+QUERY_ROWS = registry.register(Histogram(
+    'kurs_query_rows', 'Число строк в результате запроса', ('query',), ROW_BUCKETS))
+QUERY_RESULT_BYTES = registry.register(Histogram(
+    'kurs_query_result_bytes', 'Объем результата запроса в памяти (оценка)', ('query',), BYTE_BUCKETS))
+QUERY_ERRORS = registry.register(Counter(
+    'kurs_query_errors_total', 'Ошибки выполнения запросов', ('query',)))
+DB_CONNECT_SECONDS = registry.register(Histogram(
+    'kurs_db_connect_seconds', 'Время установки соединения с БД'))
+HTTP_REQUESTS = registry.register(Counter(
+    'kurs_http_requests_total', 'HTTP-запросы по обработчику и статусу', ('endpoint', 'method', 'status')))
+HTTP_SECONDS = registry.register(Histogram(
+    'kurs_http_request_duration_seconds', 'Время обработки HTTP-запроса', ('endpoint',)))
+HTTP_RESPONSE_BYTES = registry.register(Histogram(
+    'kurs_http_response_bytes', 'Размер ответа (без потоковых ответов)', ('endpoint',), BYTE_BUCKETS))
+
+HTTP_COMPRESSION_BYTES = registry.register(Counter(
+    'kurs_http_compression_bytes_total', 'Байты сжатых ответов до и после сжатия', ('encoding', 'stage')))
+
+
+def _pool_gauges():
+    from models.pool import pool_stats
+
+    values = {}
+    for pool, stats in pool_stats().items():
+        for key in ('size', 'idle', 'in_use'):
+            values[(pool, key)] = stats[key]
+    return values
+
+
+def _cache_gauges():
+    from models.cache import query_cache
+
+    stats = query_cache.stats()
+    return {(key,): stats[key] for key in ('entries', 'bytes', 'hits', 'misses', 'evictions')}
+
+
+def _governor_gauges():
+    from models.governor import query_governor
+
+    stats = query_governor.stats()
+    return {(key,): stats[key] for key in ('active', 'waiting', 'admitted', 'queued', 'rejected', 'timeouts')}
+
+
+def _replica_gauges():
+    from models.replicas import replica_router
+
+    values = {}
+    for stats in replica_router.stats():
+        values[(stats['name'], 'healthy')] = int(stats['healthy'])
+        values[(stats['name'], 'selects')] = stats['selects']
+        if stats['lag'] is not None:
+            values[(stats['name'], 'lag_seconds')] = stats['lag']
+    return values
+
+
+registry.register(GaugeCallback(
+    'kurs_db_pool_connections', 'Соединения пула по состоянию', ('pool', 'state'), _pool_gauges))
+registry.register(GaugeCallback(
+    'kurs_result_cache', 'Состояние кэша результатов', ('field',), _cache_gauges))
+registry.register(GaugeCallback(
+    'kurs_query_admission', 'Допуск запросов к БД: выполняются, ждут, счетчики', ('field',), _governor_gauges))
+registry.register(GaugeCallback(
+    'kurs_db_replica', 'Реплики для чтения: доступность, выборки, отставание', ('replica', 'field'), _replica_gauges))
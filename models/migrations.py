@@ -0,0 +1,332 @@
+# models/migrations.py
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+
+import pymysql
+from pymysql.constants import CLIENT
+from pymysql.cursors import DictCursor
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'initdb', 'migrations')
+SCHEMA_TABLE = 'schema_migrations'
+LOCK_NAME = 'kurs_schema_migrations'
+
+_FILE_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+_DELIMITER_RE = re.compile(r'[ \t]*DELIMITER[ \t]+(\S+)[ \t]*(?:\r?\n|$)', re.I)
+
+# ER_NO_SUCH_TABLE
+_NO_SUCH_TABLE = 1146
+
+
+class MigrationError(RuntimeError):
+    """Миграцию нельзя применить: ошибка SQL, измененный файл или неразмеченная база."""
+
+
+@dataclass
+class Statement:
+    sql: str
+    # составной оператор из блока DELIMITER (процедура, триггер) — отправляется отдельно
+    compound: bool = False
+
+
+@dataclass
+class Migration:
+    version: str
+    name: str
+    path: str
+    checksum: str
+
+    @property
+    def number(self) -> int:
+        return int(self.version)
+
+    def statements(self) -> list[Statement]:
+        with open(self.path, encoding='utf-8') as f:
+            return split_statements(f.read())
+
+
+def _skip_quoted(text: str, i: int) -> int:
+    quote = text[i]
+    j = i + 1
+    while j < len(text):
+        c = text[j]
+        if c == '\\' and quote != '`':
+            j += 2
+            continue
+        if c == quote:
+            if text.startswith(quote, j + 1):
+                j += 2
+                continue
+            return j + 1
+        j += 1
+    raise MigrationError(f'незакрытая кавычка {quote} в позиции {i}')
+
+
+def split_statements(text: str) -> list[Statement]:
+    """
+    Делит SQL-скрипт на операторы так же, как клиент mysql: учитывает строки
+    и идентификаторы в кавычках, комментарии (--, #, /* */) и команду
+    DELIMITER. Комментарии отбрасываются, кроме исполняемых /*! ... */.
+    """
+    statements: list[Statement] = []
+    delimiter = ';'
+    buf: list[str] = []
+    start = 0  # начало еще не скопированного в buf фрагмента
+    i = 0
+    n = len(text)
+    line_start = True
+
+    def flush(end: int):
+        buf.append(text[start:end])
+        sql = ''.join(buf).strip()
+        if sql:
+            statements.append(Statement(sql, compound=delimiter != ';'))
+        buf.clear()
+
+    while i < n:
+        if line_start:
+            m = _DELIMITER_RE.match(text, i)
+            if m:
+                flush(i)
+                delimiter = m.group(1)
+                i = start = m.end()
+                continue
+        c = text[i]
+        line_start = c == '\n'
+        if text.startswith(delimiter, i):
+            flush(i)
+            i = start = i + len(delimiter)
+        elif c in '\'"`':
+            i = _skip_quoted(text, i)
+        elif c == '#' or (text.startswith('--', i) and (i + 2 == n or text[i + 2] in ' \t\r\n')):
+            buf.append(text[start:i])
+            end = text.find('\n', i)
+            i = start = n if end < 0 else end
+        elif text.startswith('/*', i) and not text.startswith('/*!', i):
+            buf.append(text[start:i])
+            end = text.find('*/', i + 2)
+            i = start = n if end < 0 else end + 2
+        else:
+            i += 1
+    flush(n)
+    return statements
+
+
+def _checksum(path: str) -> str:
+    with open(path, 'rb') as f:
+        # окончания строк не влияют на сумму: файл мог быть выгружен с CRLF
+        return hashlib.sha256(f.read().replace(b'\r\n', b'\n')).hexdigest()
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = []
+    seen: dict[int, str] = {}
+    for filename in os.listdir(directory):
+        m = _FILE_RE.match(filename)
+        if not m:
+            continue
+        version, name = m.groups()
+        if int(version) in seen:
+            raise MigrationError(f'две миграции с номером {version}: {seen[int(version)]} и {filename}')
+        seen[int(version)] = filename
+        path = os.path.join(directory, filename)
+        migrations.append(Migration(version, name, path, _checksum(path)))
+    return sorted(migrations, key=lambda mig: mig.number)
+
+
+def batches(statements: list[Statement], max_statements: int = 50, max_bytes: int = 512 * 1024):
+    """Группирует простые операторы в пакеты для одного обращения к серверу (CLIENT.MULTI_STATEMENTS)."""
+    batch: list[Statement] = []
+    size = 0
+    for stmt in statements:
+        if stmt.compound:
+            if batch:
+                yield batch
+                batch, size = [], 0
+            yield [stmt]
+            continue
+        if batch and (len(batch) >= max_statements or size + len(stmt.sql) > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(stmt)
+        size += len(stmt.sql)
+    if batch:
+        yield batch
+
+
+class MigrationRunner:
+    """
+    Применяет файлы initdb/migrations/NNNN_name.sql по порядку номеров и
+    записывает примененные в таблицу schema_migrations с контрольной суммой.
+    Если новых миграций нет, обходится одним SELECT; одновременный запуск из
+    нескольких процессов упорядочивается через GET_LOCK.
+    """
+
+    def __init__(self, config, directory: str = MIGRATIONS_DIR, batch_size: int = 50):
+        self.config = config
+        self.directory = directory
+        self.batch_size = batch_size
+        self.database = config['DB_NAME']
+
+    def _connect(self, create: bool = True):
+        conn = pymysql.connect(
+            host=self.config['DB_HOST'],
+            port=int(self.config.get('DB_PORT', 3306)),
+            user=self.config.get('DB_ADMIN_USER') or self.config['DB_USER'],
+            password=self.config.get('DB_ADMIN_PASSWORD') or self.config['DB_PASSWORD'],
+            cursorclass=DictCursor,
+            autocommit=True,
+            charset='utf8mb4',
+            client_flag=CLIENT.MULTI_STATEMENTS,
+            connect_timeout=5,
+        )
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1 FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = %s', (self.database,))
+            exists = cur.fetchone() is not None
+            if not exists and not create:
+                conn.close()
+                return None
+            if not exists:
+                cur.execute(f'CREATE DATABASE `{self.database}` '
+                            'CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci')
+        conn.select_db(self.database)
+        return conn
+
+    def _applied(self, cur) -> dict[str, dict] | None:
+        """Примененные миграции по номеру; None, если таблицы журнала еще нет."""
+        try:
+            cur.execute(f'SELECT version, name, checksum, applied_at, duration_ms FROM {SCHEMA_TABLE}')
+        except pymysql.err.ProgrammingError as exc:
+            if exc.args[0] == _NO_SUCH_TABLE:
+                return None
+            raise
+        return {row['version']: row for row in cur.fetchall()}
+
+    def _ensure_table(self, cur):
+        cur.execute(
+            f'CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} ('
+            ' version VARCHAR(20) NOT NULL PRIMARY KEY,'
+            ' name VARCHAR(255) NOT NULL,'
+            ' checksum CHAR(64) NOT NULL,'
+            ' applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,'
+            ' duration_ms INT NOT NULL DEFAULT 0'
+            ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci'
+        )
+
+    def _pending(self, migrations: list[Migration], applied: dict[str, dict]) -> list[Migration]:
+        changed = [
+            mig.version for mig in migrations
+            if mig.version in applied and applied[mig.version]['checksum'] != mig.checksum
+        ]
+        if changed:
+            raise MigrationError(
+                'изменены уже примененные миграции: ' + ', '.join(changed)
+                + '; изменения схемы оформляются новой миграцией'
+            )
+        return [mig for mig in migrations if mig.version not in applied]
+
+    def _check_unmarked(self, cur):
+        cur.execute('SELECT COUNT(*) AS n FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s',
+                    (self.database,))
+        if cur.fetchone()['n']:
+            raise MigrationError(
+                f'база {self.database} уже содержит таблицы, но не журнал миграций; '
+                'отметьте примененные миграции: python migrate.py baseline <номер>'
+            )
+
+    def _apply(self, cur, migration: Migration):
+        started = time.perf_counter()
+        for batch in batches(migration.statements(), self.batch_size):
+            try:
+                cur.execute(';\n'.join(stmt.sql for stmt in batch))
+                while cur.nextset():
+                    pass
+            except pymysql.MySQLError as exc:
+                first = batch[0].sql.splitlines()[0][:80]
+                raise MigrationError(
+                    f'{os.path.basename(migration.path)}: {exc.args[-1]} (пакет начинается с: {first})'
+                ) from exc
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        cur.execute(
+            f'INSERT INTO {SCHEMA_TABLE} (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)',
+            (migration.version, migration.name, migration.checksum, duration_ms),
+        )
+
+    def migrate(self) -> list[Migration]:
+        """Применяет новые миграции; возвращает примененные в этом вызове."""
+        migrations = discover(self.directory)
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                applied = self._applied(cur)
+                if applied is not None and not self._pending(migrations, applied):
+                    return []
+                cur.execute('SELECT GET_LOCK(%s, 300) AS locked', (LOCK_NAME,))
+                if not cur.fetchone()['locked']:
+                    raise MigrationError('не дождались блокировки миграций, занятой другим процессом')
+                try:
+                    # пока ждали блокировку, миграции мог применить другой процесс
+                    applied = self._applied(cur)
+                    if applied is None:
+                        self._check_unmarked(cur)
+                        self._ensure_table(cur)
+                        applied = {}
+                    pending = self._pending(migrations, applied)
+                    for migration in pending:
+                        self._apply(cur, migration)
+                    return pending
+                finally:
+                    cur.execute('SELECT RELEASE_LOCK(%s)', (LOCK_NAME,))
+        finally:
+            conn.close()
+
+    def status(self) -> list[tuple[Migration, dict | None]]:
+        migrations = discover(self.directory)
+        applied = {}
+        conn = self._connect(create=False)
+        if conn is not None:
+            try:
+                with conn.cursor() as cur:
+                    applied = self._applied(cur) or {}
+            finally:
+                conn.close()
+        return [(mig, applied.get(mig.version)) for mig in migrations]
+
+    def baseline(self, version: str) -> list[Migration]:
+        """Отмечает миграции до version включительно как примененные, не выполняя их."""
+        marked = [mig for mig in discover(self.directory) if mig.number <= int(version)]
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                self._ensure_table(cur)
+                for mig in marked:
+                    cur.execute(
+                        f'INSERT IGNORE INTO {SCHEMA_TABLE} (version, name, checksum) VALUES (%s, %s, %s)',
+                        (mig.version, mig.name, mig.checksum),
+                    )
+        finally:
+            conn.close()
+        return marked
+
+
+def migrate_on_startup(app):
+    """Применяет новые миграции при запуске; недоступная база не мешает старту приложения."""
+    from models.backend import get_backend
+
+    if not get_backend(app.config).migrations:
+        # встроенная база наполняется из тех же файлов при первом подключении (models.sqlite)
+        return
+    try:
+        applied = MigrationRunner(app.config).migrate()
+    except pymysql.err.OperationalError as exc:
+        app.logger.warning('Миграции не проверены: база недоступна (%s)', exc)
+        return
+    except MigrationError as exc:
+        # база, развернутая до миграций, не должна мешать запуску приложения
+        app.logger.warning('Миграции при запуске не применены: %s. Состояние — python migrate.py status; '
+                           'базу, развернутую раньше вручную, отметьте: python migrate.py baseline <номер>', exc)
+        return
+    for migration in applied:
+        app.logger.info('Применена миграция %s_%s', migration.version, migration.name)
@@ -0,0 +1,110 @@
+# models/pagination.py
+import base64
+import binascii
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Sequence
+
+DEFAULT_PAGE_SIZE = 100
+
+_IDENT_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class InvalidPageToken(ValueError):
+    """Токен страницы поврежден или не соответствует ключу сортировки."""
+
+
+@dataclass
+class Page:
+    rows: Sequence[Mapping[str, Any]]
+    next_token: str | None = None
+    prev_token: str | None = None
+    keys: list[str] = field(default_factory=list)
+
+
+def parse_keys(value: str | list[str] | None) -> list[str]:
+    """Ключ сортировки: 'invoice_date, ttn_no' или ['invoice_date', 'ttn_no']."""
+    if not value:
+        return []
+    keys = [k.strip() for k in value.split(',')] if isinstance(value, str) else list(value)
+    keys = [k for k in keys if k]
+    for key in keys:
+        if not _IDENT_RE.match(key):
+            raise ValueError(f'Недопустимое имя столбца для пагинации: {key!r}')
+    return keys
+
+
+def encode_token(values: list[Any]) -> str:
+    raw = json.dumps(values, default=str, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_token(token: str, keys: list[str]) -> list[Any]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, binascii.Error, UnicodeError) as exc:
+        raise InvalidPageToken('Некорректный токен страницы.') from exc
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidPageToken('Некорректный токен страницы.')
+    return values
+
+
+def keyset_query(sql: str, params: dict[str, Any] | None, keys: list[str],
+                 after: str | None = None, before: str | None = None,
+                 page_size: int = DEFAULT_PAGE_SIZE) -> tuple[str, dict[str, Any] | None]:
+    """
+    Оборачивает запрос в выборку страницы по ключу (keyset/seek):
+    WHERE (k1, k2) > (%s, %s) ORDER BY k1, k2 LIMIT n+1 — без OFFSET, поэтому
+    стоимость дальних страниц не растет. Ключ должен быть уникальным и NOT NULL.
+    Лишняя (n+1)-я строка показывает, есть ли следующая страница.
+    """
+    base = sql.strip().rstrip(';').strip()
+    columns = ', '.join(f'`{k}`' for k in keys)
+    query_params = dict(params) if params else {}
+    where = ''
+    order = 'ASC'
+    token = after or before
+    if token:
+        values = decode_token(token, keys)
+        placeholders = []
+        for i, value in enumerate(values):
+            query_params[f'_keyset_{i}'] = value
+            placeholders.append(f'%(_keyset_{i})s')
+        op = '>' if after else '<'
+        where = f'WHERE ({columns}) {op} ({", ".join(placeholders)})'
+        if before:
+            order = 'DESC'
+    order_by = ', '.join(f'`{k}` {order}' for k in keys)
+    parts = [f'SELECT * FROM (\n{base}\n) AS _keyset_page']
+    if where:
+        parts.append(where)
+    parts.append(f'ORDER BY {order_by}\nLIMIT {int(page_size) + 1}')
+    wrapped = '\n'.join(parts)
+    if not query_params and params is None:
+        return wrapped, None
+    return wrapped, query_params
+
+
+def build_page(rows: Sequence[Mapping[str, Any]], keys: list[str],
+               after: str | None = None, before: str | None = None,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    has_more = len(rows) > page_size
+    # срез ResultSet остается ResultSet: страница хранит строки кортежами
+    rows = rows[:page_size]
+    if before:
+        rows = rows[::-1]
+
+    def token(row):
+        return encode_token([row[k] for k in keys])
+
+    if not rows:
+        return Page(rows, keys=keys)
+    if before:
+        next_token = token(rows[-1])
+        prev_token = token(rows[0]) if has_more else None
+    else:
+        next_token = token(rows[-1]) if has_more else None
+        prev_token = token(rows[0]) if after else None
+    return Page(rows, next_token=next_token, prev_token=prev_token, keys=keys)
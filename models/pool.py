@@ -0,0 +1,222 @@
+# models/pool.py
+import os
+import threading
+import time
+from collections import deque
+
+from models.backend import connect, get_backend
+
+
+class PoolTimeout(RuntimeError):
+    """Не удалось получить соединение из пула за отведенное время."""
+
+
+class _PooledConnection:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений (pymysql или другого драйвера из models.backend).
+    Соединения выдаются через acquire()/release(); при выдаче проверяется
+    срок жизни и, если соединение долго простаивало, выполняется ping.
+    """
+
+    def __init__(self, connect, min_size: int = 1, max_size: int = 10,
+                 max_lifetime: float = 3600.0, timeout: float = 10.0,
+                 ping_interval: float = 30.0):
+        if max_size < 1:
+            raise ValueError('max_size должен быть не меньше 1')
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'creations': 0,
+            'discards': 0,
+            'ping_failures': 0,
+        }
+
+    def warm(self):
+        """Открывает соединения до min_size; вызывается после создания пула, вне общих блокировок."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                item = _PooledConnection(self._connect())
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['creations'] += 1
+                self._idle.append(item)
+                self._cond.notify()
+
+    def _close(self, item: _PooledConnection):
+        try:
+            item.conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, item: _PooledConnection, now: float) -> bool:
+        return bool(self.max_lifetime) and now - item.created_at > self.max_lifetime
+
+    def _healthy(self, item: _PooledConnection, now: float) -> bool:
+        if now - item.last_used < self.ping_interval:
+            return True
+        try:
+            item.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._cond:
+                self._stats['ping_failures'] += 1
+            return False
+
+    def _drop(self, item: _PooledConnection):
+        self._close(item)
+        with self._cond:
+            self._size -= 1
+            self._stats['discards'] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            item = None
+            reserve = False
+            with self._cond:
+                waited = False
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout('Пул соединений исчерпан: все соединения заняты.')
+                    if not waited:
+                        self._stats['waits'] += 1
+                        waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    item = self._idle.pop()
+                else:
+                    # резервируем место под новое соединение, создаем его вне блокировки
+                    self._size += 1
+                    reserve = True
+
+            if reserve:
+                try:
+                    item = _PooledConnection(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['creations'] += 1
+            else:
+                now = time.monotonic()
+                if self._expired(item, now) or not self._healthy(item, now):
+                    self._drop(item)
+                    continue
+
+            with self._cond:
+                self._in_use[id(item.conn)] = item
+                self._stats['checkouts'] += 1
+            return item.conn
+
+    def release(self, conn, discard: bool = False):
+        with self._cond:
+            item = self._in_use.pop(id(conn), None)
+        if item is None:
+            # соединение не из этого пула (например, пул был пересоздан)
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+        now = time.monotonic()
+        if discard or not conn.open or self._expired(item, now):
+            self._drop(item)
+            return
+        item.last_used = now
+        with self._cond:
+            self._idle.append(item)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for item in idle:
+            self._close(item)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            data = dict(self._stats)
+            data.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+        return data
+
+
+_pools: dict[tuple, ConnectionPool] = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+
+
+def get_pool(config) -> ConnectionPool:
+    """Возвращает общий для процесса пул для параметров подключения из config."""
+    global _pools_pid
+    key = get_backend(config).pool_key(config)
+    created = False
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # после fork соединения родителя использовать нельзя
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                lambda: connect(config),
+                min_size=int(config.get('DB_POOL_MIN_SIZE', 1)),
+                max_size=int(config.get('DB_POOL_MAX_SIZE', 10)),
+                max_lifetime=float(config.get('DB_POOL_MAX_LIFETIME', 3600)),
+                timeout=float(config.get('DB_POOL_TIMEOUT', 10)),
+                ping_interval=float(config.get('DB_POOL_PING_INTERVAL', 30)),
+            )
+            _pools[key] = pool
+            created = True
+    if created:
+        # соединения открываются вне _pools_lock: недоступная реплика не должна
+        # задерживать на connect_timeout получение пула основного сервера
+        pool.warm()
+    return pool
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f'{user}@{host}:{port}/{db}': pool.stats() for (host, port, user, db), pool in pools}
@@ -0,0 +1,231 @@
+# models/replicas.py
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import pymysql
+
+from models.backend import get_backend
+from models.pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('round_robin', 'least_latency')
+# вес нового замера в скользящем среднем задержки
+_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class Replica:
+    host: str
+    port: int
+    # параметры подключения: копия [mysql] с адресом реплики (ключ пула в models.pool)
+    config: dict[str, Any]
+    healthy: bool = False
+    lag: float | None = None
+    latency_ms: float | None = None
+    error: str | None = None
+    checked_at: float = 0.0
+    selects: int = 0
+    failures: int = 0
+
+    @property
+    def name(self) -> str:
+        return f'{self.host}:{self.port}'
+
+    def observe_latency(self, ms: float):
+        self.latency_ms = ms if self.latency_ms is None else (
+            _EWMA_ALPHA * ms + (1 - _EWMA_ALPHA) * self.latency_ms
+        )
+
+
+def parse_hosts(value: str | None, default_port: int = 3306) -> list[tuple[str, int]]:
+    """'db2:3307, db3' -> [('db2', 3307), ('db3', 3306)]"""
+    hosts = []
+    for item in (value or '').replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(':') if ':' in item else (item, '', '')
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
+def replication_lag(conn) -> float | None:
+    """
+    Отставание реплики в секундах по SHOW REPLICA STATUS (SHOW SLAVE STATUS
+    на старых серверах). 0 — сервер не настроен репликой (например, вторая
+    локальная база для проверки); None — репликация остановлена.
+    """
+    with conn.cursor() as cur:
+        try:
+            cur.execute('SHOW REPLICA STATUS')
+        except pymysql.err.ProgrammingError:
+            cur.execute('SHOW SLAVE STATUS')
+        row = cur.fetchone()
+    if not row:
+        return 0.0
+    lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+    return None if lag is None else float(lag)
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения. Реплики периодически (раз в check_interval
+    секунд) проверяются фоновым потоком: доступность и отставание не больше
+    max_lag. Выборки распределяются по здоровым репликам по кругу
+    (round_robin) или на реплику с наименьшей задержкой (least_latency);
+    если здоровых нет, чтение идет на основной сервер.
+    """
+
+    def __init__(self):
+        self.replicas: list[Replica] = []
+        self.strategy = 'round_robin'
+        self.max_lag = 5.0
+        self.check_interval = 10.0
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._monitor: threading.Thread | None = None
+
+    def configure(self, config, hosts: list[tuple[str, int]], strategy: str = 'round_robin',
+                  max_lag: float = 5.0, check_interval: float = 10.0,
+                  user: str | None = None, password: str | None = None,
+                  connect_timeout: int = 3):
+        if strategy not in STRATEGIES:
+            raise ValueError(f'неизвестная стратегия выбора реплики: {strategy}')
+        replicas = []
+        for host, port in hosts:
+            replica_config = {
+                key: value for key, value in dict(config).items()
+                if key.startswith('DB_')
+            }
+            replica_config.update(DB_HOST=host, DB_PORT=port, DB_CONNECT_TIMEOUT=connect_timeout)
+            if user:
+                replica_config.update(DB_USER=user, DB_PASSWORD=password or '')
+            replicas.append(Replica(host, port, replica_config))
+        with self._lock:
+            self.replicas = replicas
+            self.strategy = strategy
+            self.max_lag = max_lag
+            self.check_interval = check_interval
+        self._wakeup.set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def check(self, replica: Replica):
+        started = time.perf_counter()
+        try:
+            pool = get_pool(replica.config)
+            conn = pool.acquire()
+            discard = False
+            try:
+                lag = replication_lag(conn)
+            except pymysql.MySQLError:
+                discard = True
+                raise
+            finally:
+                pool.release(conn, discard=discard)
+        except Exception as exc:
+            healthy, lag, error = False, None, str(exc)
+        else:
+            replica.observe_latency((time.perf_counter() - started) * 1000)
+            if lag is None:
+                healthy, error = False, 'репликация остановлена'
+            elif lag > self.max_lag:
+                healthy, error = False, f'отставание {lag:g} с больше допустимых {self.max_lag:g} с'
+            else:
+                healthy, error = True, None
+        if healthy != replica.healthy:
+            logger.warning('Реплика %s %s%s', replica.name, 'доступна' if healthy else 'исключена',
+                           f': {error}' if error else '')
+        replica.healthy, replica.lag, replica.error = healthy, lag, error
+        replica.checked_at = time.time()
+
+    def check_all(self):
+        for replica in list(self.replicas):
+            self.check(replica)
+
+    def _run_monitor(self):
+        while True:
+            self.check_all()
+            self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
+
+    def _ensure_monitor(self):
+        if self._monitor is not None and self._monitor.is_alive():
+            return
+        with self._lock:
+            if self._monitor is None or not self._monitor.is_alive():
+                self._monitor = threading.Thread(target=self._run_monitor, name='replica-monitor',
+                                                 daemon=True)
+                self._monitor.start()
+
+    def pick(self) -> Replica | None:
+        """Реплика для очередной выборки или None — читать с основного сервера."""
+        if not self.replicas:
+            return None
+        self._ensure_monitor()
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        if self.strategy == 'least_latency':
+            replica = min(healthy, key=lambda r: r.latency_ms if r.latency_ms is not None else float('inf'))
+        else:
+            replica = healthy[next(self._counter) % len(healthy)]
+        replica.selects += 1
+        return replica
+
+    def get(self, name: str) -> Replica | None:
+        """Реплика с именем host:port, если она здорова; иначе None — читать с основного."""
+        self._ensure_monitor()
+        for replica in self.replicas:
+            if replica.name == name and replica.healthy:
+                replica.selects += 1
+                return replica
+        return None
+
+    def mark_failed(self, replica: Replica, exc: Exception):
+        """Ошибка соединения с репликой: исключить ее до следующей проверки."""
+        replica.failures += 1
+        if replica.healthy:
+            logger.warning('Реплика %s исключена: %s', replica.name, exc)
+        replica.healthy, replica.error = False, str(exc)
+        self._wakeup.set()
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                'name': r.name,
+                'healthy': r.healthy,
+                'lag': r.lag,
+                'latency_ms': None if r.latency_ms is None else round(r.latency_ms, 1),
+                'error': r.error,
+                'checked_at': r.checked_at,
+                'selects': r.selects,
+                'failures': r.failures,
+            }
+            for r in self.replicas
+        ]
+
+
+# общий для процесса выбор реплик; список задается секцией [replicas] app.conf
+replica_router = ReplicaRouter()
+
+
+def init_replicas(config):
+    hosts = parse_hosts(config.get('DB_REPLICAS'), int(config.get('DB_PORT', 3306)))
+    replica_router.configure(
+        config,
+        hosts if get_backend(config).replication else [],
+        strategy=config.get('DB_REPLICA_STRATEGY', 'round_robin'),
+        max_lag=float(config.get('DB_REPLICA_MAX_LAG', 5)),
+        check_interval=float(config.get('DB_REPLICA_CHECK_INTERVAL', 10)),
+        user=config.get('DB_REPLICA_USER'),
+        password=config.get('DB_REPLICA_PASSWORD'),
+    )
@@ -0,0 +1,128 @@
+# models/resultset.py
+from array import array
+from collections.abc import Mapping
+from typing import Any, Iterator, Sequence
+
+# типы столбцов (см. models.columnar), которые column() отдает массивом array
+_ARRAY_TYPECODES = {'int': 'q', 'float': 'd'}
+
+
+class Row(Mapping):
+    """
+    Строка ResultSet в виде словаря только для чтения: row['col'], row.keys(),
+    row.values(), row.items(). Имена столбцов не копируются — строка хранит
+    ссылку на общий индекс и кортеж значений.
+    """
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index: dict[str, int], values: tuple):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self) -> tuple:
+        return self._values
+
+    def items(self):
+        return zip(self._index, self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        i = self._index.get(key)
+        return default if i is None else self._values[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Row):
+            return self._index.keys() == other._index.keys() and self._values == other._values
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f'Row({dict(self.items())!r})'
+
+
+class ResultSet(Sequence):
+    """
+    Результат выборки: имена и типы столбцов хранятся один раз, строки —
+    кортежами, как их отдает курсор. Итерация и индексация дают Row,
+    совместимую с шаблонами, которые ждали словари DictCursor; срез — новый
+    ResultSet с теми же столбцами. truncated — выборка обрезана ограничением
+    числа строк (max_rows).
+    """
+    __slots__ = ('columns', 'types', 'rows', 'truncated', '_index')
+
+    def __init__(self, columns: Sequence[str], rows: list[tuple] | None = None,
+                 types: Sequence[str] | None = None):
+        self.columns = list(columns)
+        self.types = list(types) if types is not None else ['str'] * len(self.columns)
+        self.rows = rows if rows is not None else []
+        self.truncated = False
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    def _derive(self, rows: list[tuple]) -> 'ResultSet':
+        rs = ResultSet.__new__(ResultSet)
+        rs.columns, rs.types, rs.rows, rs._index = self.columns, self.types, rows, self._index
+        rs.truncated = self.truncated
+        return rs
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __bool__(self) -> bool:
+        return bool(self.rows)
+
+    def __iter__(self) -> Iterator[Row]:
+        index = self._index
+        for values in self.rows:
+            yield Row(index, values)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self._derive(self.rows[item])
+        return Row(self._index, self.rows[item])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ResultSet):
+            return self.columns == other.columns and self.rows == other.rows
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def column(self, name: str) -> Sequence[Any]:
+        """
+        Значения одного столбца. Целые и дробные столбцы без NULL отдаются
+        компактным array('q'/'d'), остальные — списком.
+        """
+        i = self._index[name]
+        values = [row[i] for row in self.rows]
+        code = _ARRAY_TYPECODES.get(self.types[i])
+        if code and None not in values:
+            try:
+                return array(code, values)
+            except (TypeError, OverflowError):
+                pass
+        return values
+
+    def dicts(self) -> list[dict[str, Any]]:
+        """Строки обычными словарями — для кода, которому нужен изменяемый dict."""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+    def __repr__(self) -> str:
+        return f'ResultSet(columns={self.columns!r}, rows={len(self.rows)})'
@@ -0,0 +1,105 @@
+# models/slowlog.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+from models.export import json_default
+
+# операторы, для которых MySQL умеет EXPLAIN
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+
+class SlowQueryLog:
+    """
+    Журнал медленных запросов: запросы дольше threshold секунд (с вероятностью
+    sample_rate) пишутся вместе с параметрами и EXPLAIN в ротируемый файл
+    JSON-строк и в кольцевой буфер последних записей для страницы /admin.
+    """
+
+    def __init__(self, threshold: float = 0.5, sample_rate: float = 1.0,
+                 explain: bool = True, keep: int = 100):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.explain = explain
+        self.enabled = True
+        self._recent: deque[dict[str, Any]] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('kurs.slow_queries')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+
+    def configure(self, enabled: bool = True, threshold: float | None = None,
+                  sample_rate: float | None = None, explain: bool | None = None,
+                  path: str | None = None, max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5, keep: int | None = None):
+        self.enabled = enabled
+        if threshold is not None:
+            self.threshold = threshold
+        if sample_rate is not None:
+            self.sample_rate = max(0.0, min(1.0, sample_rate))
+        if explain is not None:
+            self.explain = explain
+        if keep is not None:
+            with self._lock:
+                self._recent = deque(self._recent, maxlen=keep)
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                          encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+    def should_record(self, duration: float) -> bool:
+        if not self.enabled or duration < self.threshold:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def wants_explain(self, sql: str) -> bool:
+        return self.explain and sql.lstrip().upper().startswith(EXPLAINABLE)
+
+    def record(self, name: str | None, sql: str, params: Any, duration: float, rows: int,
+               explain: list[dict[str, Any]] | None = None, explain_error: str | None = None):
+        entry = {
+            'ts': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'query': name or 'adhoc',
+            'duration_ms': round(duration * 1000, 1),
+            'rows': rows,
+            'sql': sql.strip(),
+            'params': params,
+            'explain': explain,
+            'explain_error': explain_error,
+        }
+        with self._lock:
+            self._recent.appendleft(entry)
+        if self._logger.handlers:
+            self._logger.info(json.dumps(entry, ensure_ascii=False, default=json_default))
+
+    def recent(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)
+
+
+slow_log = SlowQueryLog()
+
+
+def init_slowlog(config):
+    slow_log.configure(
+        enabled=bool(config.get('SLOWLOG_ENABLED', True)),
+        threshold=float(config.get('SLOWLOG_THRESHOLD_MS', 500)) / 1000,
+        sample_rate=float(config.get('SLOWLOG_SAMPLE_RATE', 1.0)),
+        explain=bool(config.get('SLOWLOG_EXPLAIN', True)),
+        path=config.get('SLOWLOG_PATH'),
+        max_bytes=int(config.get('SLOWLOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backup_count=int(config.get('SLOWLOG_BACKUP_COUNT', 5)),
+        keep=int(config.get('SLOWLOG_KEEP', 100)),
+    )
+    return slow_log
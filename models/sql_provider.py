@@ -1,23 +1,260 @@
 ﻿import os
 import glob
+import re
+import datetime
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from models.migrations import split_statements
+
+# строка заголовка вида "-- key: value" в начале .sql-файла
+_HEADER_RE = re.compile(r'^--\s*([A-Za-z_][\w-]*)\s*:\s*(.*?)\s*$')
+# ключи заголовка, которые могут повторяться (значения собираются построчно)
+_MULTI_KEYS = ('param', 'check')
+# "-- param: name type[?] [min=X] [max=X] [= default] [| подпись [| подсказка]]"
+_PARAM_RE = re.compile(r'^(\w+)\s+(\w+)(\?)?((?:\s+\w+=\S+)*)\s*(?:=\s*(.*))?$')
+_CHECK_RE = re.compile(r'^(\w+)\s*(<=|<|>=|>)\s*(\w+)$')
+_TRAILING_LIMIT_RE = re.compile(r'\bLIMIT\s+\d+(?:\s*,\s*\d+)?\s*$', re.I)
+
+_CHECKS = {
+    '<=': lambda a, b: a <= b,
+    '<': lambda a, b: a < b,
+    '>=': lambda a, b: a >= b,
+    '>': lambda a, b: a > b,
+}
+
+
+def _parse_header(text: str) -> tuple[dict[str, str], str]:
+    meta: dict[str, str] = {}
+    lines = text.lstrip('\ufeff').splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        m = _HEADER_RE.match(lines[i].strip())
+        if not m:
+            break
+        key, value = m.group(1).lower(), m.group(2)
+        if key in _MULTI_KEYS and key in meta:
+            meta[key] += '\n' + value
+        else:
+            meta[key] = value
+        i += 1
+    return meta, ''.join(lines[i:])
+
+
+class QueryParamError(ValueError):
+    """Значение параметра запроса не прошло проверку; текст показывается пользователю."""
+
+
+def _convert(kind: str, raw: str) -> Any:
+    if kind == 'int':
+        return int(raw)
+    if kind == 'float':
+        return float(raw)
+    if kind == 'date':
+        return datetime.date.fromisoformat(raw)
+    if kind == 'like':
+        return f'%{raw}%'
+    return raw
+
+
+_TYPE_NAMES = {'int': 'целое число', 'float': 'число', 'date': 'дата ГГГГ-ММ-ДД'}
+_INPUT_TYPES = {'int': 'number', 'float': 'number', 'date': 'date'}
+
+
+@dataclass
+class QueryParam:
+    name: str
+    type: str = 'str'
+    label: str = ''
+    placeholder: str = ''
+    default: str | None = None
+    optional: bool = False
+    min: float | None = None
+    max: float | None = None
+
+    @classmethod
+    def parse(cls, spec: str) -> 'QueryParam':
+        head, _, rest = spec.partition('|')
+        label, _, placeholder = rest.partition('|')
+        m = _PARAM_RE.match(head.strip())
+        if not m:
+            raise ValueError(f'неверное описание параметра: {spec!r}')
+        name, kind, optional, options, default = m.groups()
+        if kind not in ('str', 'int', 'float', 'date', 'like'):
+            raise ValueError(f'неизвестный тип параметра {name}: {kind}')
+        param = cls(name, kind, label.strip() or name, placeholder.strip(),
+                    default.strip() if default else None,
+                    bool(optional) or kind == 'like')
+        for option in options.split():
+            key, _, value = option.partition('=')
+            if key not in ('min', 'max'):
+                raise ValueError(f'неизвестное ограничение параметра {name}: {key}')
+            setattr(param, key, float(value))
+        return param
+
+    @property
+    def input_type(self) -> str:
+        return _INPUT_TYPES.get(self.type, 'text')
+
+    def bind(self, raw: str | None) -> Any:
+        raw = (raw or '').strip() or self.default
+        if raw is None or raw == '':
+            if self.optional:
+                return None
+            raise QueryParamError(f'Заполните поле «{self.label}».')
+        try:
+            value = _convert(self.type, raw)
+        except ValueError:
+            raise QueryParamError(
+                f'Поле «{self.label}»: ожидается {_TYPE_NAMES.get(self.type, "значение")}.'
+            ) from None
+        if self.min is not None and value < self.min:
+            raise QueryParamError(f'Поле «{self.label}» не может быть меньше {self.min:g}.')
+        if self.max is not None and value > self.max:
+            raise QueryParamError(f'Поле «{self.label}» не может быть больше {self.max:g}.')
+        return value
+
+
+@dataclass
+class QuerySpec:
+    """Запрос каталога: текст SQL и метаданные из заголовка .sql-файла."""
+    name: str
+    sql: str
+    meta: dict[str, str] = field(default_factory=dict)
+    title: str = ''
+    description: str = ''
+    icon: str = ''
+    order: int = 1000
+    path: str = ''
+    params: list[QueryParam] = field(default_factory=list)
+    checks: list[tuple[str, str, str]] = field(default_factory=list)
+    limit: int | None = None
+    # ограничения выполнения (None — по умолчанию из [limits] app.conf, 0 — без ограничения)
+    timeout_ms: int | None = None
+    max_rows: int | None = None
+    multi: bool = False
+    # операторы для выполнения: у многооператорного запроса результат дает последний
+    statements: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_file(cls, name: str, meta: dict[str, str], sql: str) -> 'QuerySpec':
+        spec = cls(
+            name=name,
+            sql=sql,
+            meta=meta,
+            title=meta.get('title', ''),
+            description=meta.get('description', ''),
+            icon=meta.get('icon', ''),
+            order=int(meta.get('order', 1000)),
+            path=meta.get('path') or name,
+            limit=int(meta['limit']) if meta.get('limit') else None,
+            timeout_ms=int(meta['timeout_ms']) if meta.get('timeout_ms') else None,
+            max_rows=int(meta['max_rows']) if meta.get('max_rows') else None,
+            multi=_truthy(meta.get('multi')),
+        )
+        for line in filter(None, meta.get('param', '').splitlines()):
+            spec.params.append(QueryParam.parse(line))
+        names = {p.name for p in spec.params}
+        for line in filter(None, meta.get('check', '').splitlines()):
+            m = _CHECK_RE.match(line.strip())
+            if not m or m.group(1) not in names or m.group(3) not in names:
+                raise ValueError(f'{name}: неверная проверка {line!r}')
+            spec.checks.append(m.groups())
+        if spec.multi:
+            statements = [s.sql for s in split_statements(sql)]
+        else:
+            statements = [sql.strip().rstrip(';').rstrip()]
+        if spec.limit and not _TRAILING_LIMIT_RE.search(statements[-1]):
+            statements[-1] += f'\nLIMIT {spec.limit}'
+        spec.statements = statements
+        return spec
+
+    @property
+    def in_menu(self) -> bool:
+        return bool(self.title) and not _falsy(self.meta.get('menu'))
+
+    def bind(self, values: Mapping[str, str]) -> dict[str, Any] | None:
+        """Проверяет и приводит параметры запроса; None, если параметров нет."""
+        if not self.params:
+            return None
+        bound = {p.name: p.bind(values.get(p.name)) for p in self.params}
+        labels = {p.name: p.label for p in self.params}
+        for left, op, right in self.checks:
+            a, b = bound[left], bound[right]
+            if a is not None and b is not None and not _CHECKS[op](a, b):
+                raise QueryParamError(f'Неверно задан диапазон: должно быть «{labels[left]}» {op} «{labels[right]}».')
+        return bound
+
+    def describe(self, values: Mapping[str, str]) -> list[tuple[str, str]]:
+        """Подписи и введенные значения параметров для показа над результатом."""
+        return [(p.label, (values.get(p.name) or '').strip() or p.default or '—') for p in self.params]
+
+
+def _truthy(value: str | None) -> bool:
+    return (value or '').lower() in ('1', 'on', 'yes', 'true')
+
+
+def _falsy(value: str | None) -> bool:
+    return (value or '').lower() in ('0', 'off', 'no', 'false')
+
 
 class SQLProvider:
     """
     Загружает .sql-файлы из указанной папки в словарь {имя_файла: текст_sql}.
     Шаблон SQL — это файл с плейсхолдерами вида %(param)s для безопасной
     подстановки через параметризацию DB-API.
+
+    Начальные строки вида "-- key: value" считаются метаданными шаблона
+    (например, "-- cache_ttl: 3600") и в текст запроса не попадают. Из них
+    при загрузке строится каталог запросов (catalog): название и описание
+    для меню, адрес, типизированные параметры, ограничение числа строк.
     """
 
     def __init__(self, folder: str):
         self.folder = folder
         self.sql: dict[str, str] = {}
+        self.meta: dict[str, dict[str, str]] = {}
+        self.catalog: dict[str, QuerySpec] = {}
+        self._by_path: dict[str, QuerySpec] = {}
         self._init()
 
     def _init(self):
         for path in glob.glob(os.path.join(self.folder, '*.sql')):
             name = os.path.splitext(os.path.basename(path))[0]
             with open(path, 'r', encoding='utf-8') as f:  # ✅ теперь внутри цикла
-                self.sql[name] = f.read()
+                self.meta[name], self.sql[name] = _parse_header(f.read())
+            spec = QuerySpec.from_file(name, self.meta[name], self.sql[name])
+            if spec.path in self._by_path:
+                raise ValueError(f'адрес {spec.path} занят запросами {self._by_path[spec.path].name} и {name}')
+            self.catalog[name] = spec
+            self._by_path[spec.path] = spec
 
     def get(self, name: str) -> str | None:
         return self.sql.get(name)
+
+    def get_meta(self, name: str) -> dict[str, str]:
+        return self.meta.get(name, {})
+
+    def spec(self, name: str) -> QuerySpec | None:
+        return self.catalog.get(name)
+
+    def by_path(self, path: str) -> QuerySpec | None:
+        return self._by_path.get(path)
+
+    def menu(self) -> list[QuerySpec]:
+        return sorted((s for s in self.catalog.values() if s.in_menu), key=lambda s: (s.order, s.name))
+
+    def flag(self, name: str, key: str, default: bool = False) -> bool:
+        value = self.get_meta(name).get(key)
+        if value is None:
+            return default
+        return _truthy(value)
+
+    def cache_ttl(self, name: str) -> float | None:
+        """TTL кэша из заголовка шаблона: None — по умолчанию, 0 — не кэшировать."""
+        meta = self.get_meta(name)
+        if _falsy(meta.get('cache')):
+            return 0
+        if 'cache_ttl' in meta:
+            return float(meta['cache_ttl'])
+        return None
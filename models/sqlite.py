@@ -0,0 +1,457 @@
+# models/sqlite.py
+import calendar
+import datetime
+import logging
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+import pymysql
+from pymysql.constants import FIELD_TYPE
+from pymysql.cursors import DictCursor, SSDictCursor
+
+from models.migrations import MIGRATIONS_DIR, discover
+
+logger = logging.getLogger(__name__)
+
+# --- перевод SQL диалекта MySQL -------------------------------------------------
+
+# %(name)s, %s и %% — как их подставляет pymysql (только если переданы параметры)
+_PLACEHOLDER_RE = re.compile(r'%(?:\((\w+)\)s|s|%)')
+# <значение> +/- INTERVAL n UNIT
+_INTERVAL_RE = re.compile(
+    r"(CURRENT_DATE|CURRENT_TIMESTAMP|NOW\(\)|CURDATE\(\)|'[^']*'|`?[\w.]+`?)\s*([-+])\s*"
+    r"INTERVAL\s+('?-?\d+'?|:\w+|\?)\s+(SECOND|MINUTE|HOUR|DAY|WEEK|MONTH|YEAR)S?\b",
+    re.I,
+)
+_TIME_LIMIT_RE = re.compile(r'/\*\+\s*MAX_EXECUTION_TIME\((\d+)\)\s*\*/', re.I)
+_EXPLAIN_RE = re.compile(r'^\s*EXPLAIN\s+(?!QUERY\s+PLAN\b)(?!FORMAT\b)', re.I)
+
+
+def translate(sql: str, params: Any = None) -> tuple[str, Any]:
+    """
+    Запрос MySQL -> SQLite: плейсхолдеры pymysql в именованные (:name) и
+    позиционные (?), выражения "x - INTERVAL n DAY" — в вызов функции
+    _date_add, "EXPLAIN" — в "EXPLAIN QUERY PLAN". Функции MySQL (YEAR,
+    CONCAT, DATE_FORMAT, ...) не переводятся, а регистрируются в соединении.
+    """
+    if params is not None:
+        sql = _PLACEHOLDER_RE.sub(
+            lambda m: f':{m.group(1)}' if m.group(1) else ('?' if m.group(0) == '%s' else '%'), sql
+        )
+        if isinstance(params, dict):
+            params = {key: _adapt(value) for key, value in params.items()}
+        else:
+            params = tuple(_adapt(value) for value in params)
+    sql = _INTERVAL_RE.sub(
+        lambda m: f"_date_add({m.group(1)}, {'-' if m.group(2) == '-' else ''}({m.group(3)}), "
+                  f"'{m.group(4).upper()}')",
+        sql,
+    )
+    sql = _EXPLAIN_RE.sub('EXPLAIN QUERY PLAN ', sql, count=1)
+    return sql, params
+
+
+def _adapt(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(' ')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+# --- функции MySQL ----------------------------------------------------------------
+
+_DATE_FORMATS = {'Y': '%Y', 'y': '%y', 'm': '%m', 'c': '%-m', 'd': '%d', 'e': '%-d', 'H': '%H',
+                 'k': '%-H', 'i': '%M', 's': '%S', 'S': '%S', 'M': '%B', 'b': '%b', 'j': '%j',
+                 'W': '%A', 'a': '%a', 'T': '%H:%M:%S', '%': '%%'}
+
+
+def _parse(value: Any) -> datetime.datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _part(attr: str):
+    def extract(value):
+        parsed = _parse(value)
+        return None if parsed is None else getattr(parsed, attr)
+    return extract
+
+
+def _concat(*args):
+    return None if any(a is None for a in args) else ''.join(str(a) for a in args)
+
+
+def _date_format(value, fmt):
+    parsed = _parse(value)
+    if parsed is None or fmt is None:
+        return None
+    out = re.sub(r'%(.)', lambda m: _DATE_FORMATS.get(m.group(1), m.group(1)), fmt)
+    return parsed.strftime(out)
+
+
+def _makedate(year, day_of_year):
+    if year is None or day_of_year is None or int(day_of_year) < 1:
+        return None
+    return (datetime.date(int(year), 1, 1) + datetime.timedelta(days=int(day_of_year) - 1)).isoformat()
+
+
+def _date_add(value, amount, unit):
+    parsed = _parse(value)
+    if parsed is None or amount is None:
+        return None
+    amount = int(amount)
+    if unit in ('MONTH', 'YEAR'):
+        months = parsed.month - 1 + amount * (12 if unit == 'YEAR' else 1)
+        year, month = parsed.year + months // 12, months % 12 + 1
+        parsed = parsed.replace(year=year, month=month,
+                                day=min(parsed.day, calendar.monthrange(year, month)[1]))
+    else:
+        seconds = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400, 'WEEK': 604800}[unit]
+        parsed += datetime.timedelta(seconds=amount * seconds)
+    # дата без времени остается датой, как в MySQL
+    if len(str(value).strip()) <= 10 and unit not in ('SECOND', 'MINUTE', 'HOUR'):
+        return parsed.date().isoformat()
+    return parsed.isoformat(' ')
+
+
+def _register_functions(raw: sqlite3.Connection):
+    raw.create_function('YEAR', 1, _part('year'), deterministic=True)
+    raw.create_function('MONTH', 1, _part('month'), deterministic=True)
+    raw.create_function('DAY', 1, _part('day'), deterministic=True)
+    raw.create_function('CONCAT', -1, _concat, deterministic=True)
+    raw.create_function('DATE_FORMAT', 2, _date_format, deterministic=True)
+    raw.create_function('MAKEDATE', 2, _makedate, deterministic=True)
+    raw.create_function('GREATEST', -1, lambda *a: None if None in a else max(a), deterministic=True)
+    raw.create_function('LEAST', -1, lambda *a: None if None in a else min(a), deterministic=True)
+    raw.create_function('NOW', 0, lambda: datetime.datetime.now().replace(microsecond=0).isoformat(' '))
+    raw.create_function('CURDATE', 0, lambda: datetime.date.today().isoformat())
+    raw.create_function('_date_add', 3, _date_add, deterministic=True)
+
+
+# --- типы столбцов -------------------------------------------------------------
+
+def _decimal(raw: bytes) -> Decimal | bytes:
+    try:
+        return Decimal(raw.decode())
+    except InvalidOperation:
+        return raw
+
+
+def _date(raw: bytes):
+    try:
+        return datetime.date.fromisoformat(raw.decode()[:10])
+    except ValueError:
+        return raw.decode()
+
+
+def _datetime(raw: bytes):
+    try:
+        return datetime.datetime.fromisoformat(raw.decode())
+    except ValueError:
+        return raw.decode()
+
+
+# значения столбцов с объявленным типом (PARSE_DECLTYPES) приводятся к типам pymysql
+for _name, _converter in (('DECIMAL', _decimal), ('NUMERIC', _decimal), ('DATE', _date),
+                          ('DATETIME', _datetime), ('TIMESTAMP', _datetime)):
+    sqlite3.register_converter(_name, _converter)
+
+_TYPE_CODES = (
+    (bool, FIELD_TYPE.TINY),
+    (int, FIELD_TYPE.LONGLONG),
+    (float, FIELD_TYPE.DOUBLE),
+    (Decimal, FIELD_TYPE.NEWDECIMAL),
+    (datetime.datetime, FIELD_TYPE.DATETIME),
+    (datetime.date, FIELD_TYPE.DATE),
+    (bytes, FIELD_TYPE.BLOB),
+)
+
+
+def _type_code(rows: list[tuple], i: int) -> int:
+    # у SQLite нет типов столбцов результата: тип берется по первому непустому значению
+    for row in rows:
+        value = row[i]
+        if value is not None:
+            for cls, code in _TYPE_CODES:
+                if isinstance(value, cls):
+                    return code
+            break
+    return FIELD_TYPE.VAR_STRING
+
+
+# --- ошибки ------------------------------------------------------------------------
+
+def _mysql_error(exc: sqlite3.Error, timed_out: bool = False) -> pymysql.MySQLError:
+    """Ошибка SQLite в виде исключения pymysql с близким кодом MySQL."""
+    message = str(exc)
+    if timed_out:
+        return pymysql.err.OperationalError(3024, 'Query execution was interrupted, maximum statement '
+                                                  'execution time exceeded')
+    if isinstance(exc, sqlite3.IntegrityError):
+        return pymysql.err.IntegrityError(1062, message)
+    if 'no such table' in message:
+        return pymysql.err.ProgrammingError(1146, message)
+    if 'no such column' in message:
+        return pymysql.err.OperationalError(1054, message)
+    if 'interrupted' in message:
+        return pymysql.err.OperationalError(1317, 'Query execution was interrupted')
+    if 'locked' in message:
+        return pymysql.err.OperationalError(1205, message)
+    if isinstance(exc, (sqlite3.OperationalError, sqlite3.ProgrammingError)):
+        return pymysql.err.ProgrammingError(1064, message)
+    return pymysql.err.InternalError(1105, message)
+
+
+# --- соединение и курсор ---------------------------------------------------------
+
+class SQLiteCursor:
+    """
+    Курсор с интерфейсом pymysql: execute с параметрами в стиле pymysql,
+    fetchone/fetchmany/fetchall, description с кодами типов MySQL.
+    Результат читается целиком при execute — база в том же процессе,
+    передавать по сети нечего.
+    """
+
+    def __init__(self, conn: 'SQLiteConnection', dicts: bool):
+        self.connection = conn
+        self._dicts = dicts
+        self._rows: list[tuple] = []
+        self._pos = 0
+        self._names: list[str] = []
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, sql: str, params: Any = None) -> int:
+        sql, params = translate(sql, params)
+        limit = _TIME_LIMIT_RE.search(sql)
+        deadline = time.monotonic() + int(limit.group(1)) / 1000 if limit else None
+        raw = self.connection.raw
+        if deadline is not None:
+            # аналог MAX_EXECUTION_TIME: обработчик прогресса прерывает долгий запрос
+            raw.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+        try:
+            cur = raw.execute(sql, params if params is not None else ())
+            rows = cur.fetchall() if cur.description else []
+        except sqlite3.Error as exc:
+            raise _mysql_error(exc, deadline is not None and time.monotonic() > deadline) from exc
+        finally:
+            if deadline is not None:
+                raw.set_progress_handler(None, 0)
+        self._rows, self._pos = rows, 0
+        if cur.description:
+            self._names = [col[0] for col in cur.description]
+            self.description = tuple(
+                (name, _type_code(rows, i), None, None, None, None, True)
+                for i, name in enumerate(self._names)
+            )
+            self.rowcount = len(rows)
+        else:
+            self._names, self.description = [], None
+            self.rowcount = cur.rowcount
+        self.lastrowid = cur.lastrowid
+        return self.rowcount
+
+    def _convert(self, rows: list[tuple]) -> list:
+        if not self._dicts:
+            return rows
+        names = self._names
+        return [dict(zip(names, row)) for row in rows]
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        self._pos += 1
+        return self._convert([self._rows[self._pos - 1]])[0]
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return self._convert(rows)
+
+    def fetchall(self) -> list:
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return self._convert(rows)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """Соединение SQLite с подмножеством интерфейса pymysql, которое использует приложение."""
+
+    def __init__(self, raw: sqlite3.Connection, cursorclass=DictCursor):
+        self.raw = raw
+        self.cursorclass = cursorclass
+        self.open = True
+
+    def cursor(self, cursorclass=None) -> SQLiteCursor:
+        cls = cursorclass or self.cursorclass
+        return SQLiteCursor(self, dicts=cls in (DictCursor, SSDictCursor))
+
+    def ping(self, reconnect: bool = False):
+        try:
+            self.raw.execute('SELECT 1')
+        except sqlite3.Error as exc:
+            raise pymysql.err.OperationalError(2013, str(exc)) from exc
+
+    def thread_id(self) -> int:
+        return id(self)
+
+    def interrupt(self):
+        """Прерывает выполняющийся запрос (вместо KILL QUERY)."""
+        self.raw.interrupt()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self.raw.close()
+
+
+# --- база: подключение и начальное наполнение ---------------------------------
+
+# базы, уже проверенные (и при необходимости наполненные) в этом процессе;
+# для базы в памяти здесь же держится соединение, без которого она исчезнет
+_databases: dict[str, sqlite3.Connection | None] = {}
+_databases_lock = threading.Lock()
+
+
+def _database_uri(path: str) -> tuple[str, bool]:
+    if path in ('', ':memory:'):
+        # общая для всех соединений процесса база в памяти
+        return 'file:kurs?mode=memory&cache=shared', True
+    return path, False
+
+
+def _open(path: str) -> sqlite3.Connection:
+    uri, is_uri = _database_uri(path)
+    raw = sqlite3.connect(uri, uri=is_uri, detect_types=sqlite3.PARSE_DECLTYPES,
+                          check_same_thread=False, isolation_level=None, timeout=10)
+    _register_functions(raw)
+    raw.execute('PRAGMA foreign_keys = ON')
+    if not is_uri:
+        # читатели не ждут писателя
+        raw.execute('PRAGMA journal_mode = WAL')
+    return raw
+
+
+# --- перевод DDL миграций ---------------------------------------------------------
+
+_AUTO_PK_RE = re.compile(r'\b(?:BIG|SMALL|MEDIUM|TINY)?INT(?:\(\d+\))?(?:\s+UNSIGNED)?\s+(?:NOT\s+NULL\s+)?'
+                         r'AUTO_INCREMENT\s+PRIMARY\s+KEY', re.I)
+_TABLE_OPTIONS_RE = re.compile(r'\)\s*(?:ENGINE|DEFAULT\s+CHARSET|CHARSET|COLLATE)\b[^)]*$', re.I | re.S)
+_INLINE_KEY_RE = re.compile(r',\s*(UNIQUE\s+)?(?:KEY|INDEX)\s+`?(\w+)`?\s*\(([^)]*)\)', re.I)
+_CREATE_TABLE_RE = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?', re.I)
+_ALTER_INDEX_RE = re.compile(r'^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+((?:ADD\s+(?:UNIQUE\s+)?(?:INDEX|KEY)\s+`?\w+`?'
+                             r'\s*\([^)]*\)\s*,?\s*)+)$', re.I | re.S)
+_ADD_INDEX_RE = re.compile(r'ADD\s+(UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?\s*\(([^)]*)\)', re.I)
+_UPDATE_JOIN_RE = re.compile(r'^\s*UPDATE\s+`?(\w+)`?\s+(?:AS\s+)?(\w+)\s+JOIN\s+(\(.*\))\s+(?:AS\s+)?(\w+)\s+'
+                             r'ON\s+(.+?)\s+SET\s+(.+)$', re.I | re.S)
+_COLUMN_NOISE_RE = re.compile(r"\s+(?:UNSIGNED|ON\s+UPDATE\s+CURRENT_TIMESTAMP|COMMENT\s+'[^']*')", re.I)
+
+
+def translate_ddl(sql: str) -> list[str]:
+    """
+    Оператор миграции MySQL -> операторы SQLite: AUTO_INCREMENT, параметры
+    таблицы, индексы внутри CREATE TABLE и в ALTER TABLE ... ADD INDEX,
+    UPDATE ... JOIN (в UPDATE ... FROM). Остальное передается как есть.
+    """
+    create = _CREATE_TABLE_RE.match(sql)
+    if create:
+        table = create.group(1)
+        indexes = [
+            f'CREATE {unique or ""}INDEX IF NOT EXISTS {name} ON {table} ({columns})'
+            for unique, name, columns in _INLINE_KEY_RE.findall(sql)
+        ]
+        sql = _INLINE_KEY_RE.sub('', sql)
+        sql = _AUTO_PK_RE.sub('INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+        sql = _COLUMN_NOISE_RE.sub('', sql)
+        sql = _TABLE_OPTIONS_RE.sub(')', sql)
+        return [sql] + indexes
+    alter = _ALTER_INDEX_RE.match(sql)
+    if alter:
+        return [
+            f'CREATE {unique or ""}INDEX IF NOT EXISTS {name} ON {alter.group(1)} ({columns})'
+            for unique, name, columns in _ADD_INDEX_RE.findall(alter.group(2))
+        ]
+    update = _UPDATE_JOIN_RE.match(sql)
+    if update:
+        table, alias, source, source_alias, condition, assignments = update.groups()
+        assignments = re.sub(rf'\b{alias}\.(\w+)\s*=', r'\1 =', assignments)
+        return [f'UPDATE {table} AS {alias} SET {assignments} FROM {source} AS {source_alias} '
+                f'WHERE {condition}']
+    return [sql]
+
+
+def load_migrations(raw: sqlite3.Connection, directory: str = MIGRATIONS_DIR) -> tuple[int, int]:
+    """
+    Наполняет пустую базу схемой и демонстрационными данными из миграций.
+    Процедуры и триггеры (блоки DELIMITER) и операторы, которые SQLite не
+    принимает, пропускаются. Возвращает (выполнено, пропущено).
+    """
+    done = skipped = 0
+    for migration in discover(directory):
+        for statement in migration.statements():
+            if statement.compound:
+                skipped += 1
+                continue
+            for sql in translate_ddl(statement.sql):
+                try:
+                    raw.execute(translate(sql)[0])
+                    done += 1
+                except sqlite3.Error as exc:
+                    skipped += 1
+                    logger.debug('SQLite: пропущен оператор %s_%s: %s', migration.version,
+                                 migration.name, exc)
+    return done, skipped
+
+
+def connect(config) -> SQLiteConnection:
+    path = config.get('DB_SQLITE_PATH') or ':memory:'
+    with _databases_lock:
+        if path not in _databases:
+            keeper = _open(path)
+            empty = keeper.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+            if empty and config.get('DB_SQLITE_INIT', True):
+                started = time.perf_counter()
+                done, skipped = load_migrations(keeper)
+                logger.info('SQLite %s: база создана из миграций за %.2f с (операторов: %d, пропущено: %d)',
+                            path, time.perf_counter() - started, done, skipped)
+            if _database_uri(path)[1]:
+                _databases[path] = keeper
+            else:
+                keeper.close()
+                _databases[path] = None
+    return SQLiteConnection(_open(path))
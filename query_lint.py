@@ -0,0 +1,254 @@
+"""
+Проверка планов выполнения SQL-шаблонов и отчетов.
+
+Загружает все шаблоны через SQLProvider и все отчеты из reports.json,
+выполняет для каждого EXPLAIN FORMAT=JSON на локальной базе и сообщает
+о полных сканах, filesort и временных таблицах, предлагая индексы.
+
+    python query_lint.py                # все шаблоны и отчеты
+    python query_lint.py --no-db        # только статические проверки текста SQL
+    python query_lint.py -p series=HT   # значение параметра для EXPLAIN
+
+Код возврата 1, если найдены замечания (удобно для проверки перед выкладкой).
+"""
+import argparse
+import json
+import re
+import sys
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any
+
+# значения параметров шаблонов для EXPLAIN, если они не заданы в описании
+SAMPLE_PARAMS: dict[str, Any] = {
+    'name': '%a%',
+    'min_price': 0,
+    'max_price': 10 ** 9,
+    'series': 'HT',
+    'contract': 'C-1001',
+    'year': 2020,
+    'client': '%',
+}
+
+_PLACEHOLDER_RE = re.compile(r'%\((\w+)\)s')
+
+# функции над столбцом в условии не дают использовать индекс
+_NON_SARGABLE_RE = re.compile(
+    r'\b(YEAR|MONTH|DAY|DATE|LOWER|UPPER|TRIM)\s*\(\s*[\w.`]+\s*\)\s*(?:=|<|>|IN\b|BETWEEN\b)',
+    re.I,
+)
+_LEADING_WILDCARD_RE = re.compile(r"LIKE\s+(?:CONCAT\s*\(\s*)?'%", re.I)
+_TABLE_ALIAS_RE = re.compile(
+    r'\b(?:FROM|JOIN)\s+`?(\w+)`?'
+    r'(?:\s+(?:AS\s+)?(?!(?:ON|WHERE|JOIN|LEFT|RIGHT|INNER|GROUP|ORDER|LIMIT)\b)(\w+))?',
+    re.I,
+)
+
+_COLUMN_RE = re.compile(r'`\w+`\.`(\w+)`\.`(\w+)`')
+_EQ_COLUMN_RE = re.compile(r'`\w+`\.`(\w+)`\.`(\w+)`\s*=\s*(?!`)')
+
+
+@dataclass
+class Finding:
+    source: str
+    message: str
+    suggestion: str | None = None
+
+
+@dataclass
+class QueryReport:
+    source: str
+    findings: list[Finding] = field(default_factory=list)
+    error: str | None = None
+
+
+def static_checks(source: str, sql: str) -> list[Finding]:
+    findings = []
+    for m in _NON_SARGABLE_RE.finditer(sql):
+        findings.append(Finding(
+            source,
+            f'функция {m.group(1).upper()}() над столбцом в условии: индекс не используется',
+            'перепишите условие диапазоном, например invoice_date >= ... AND invoice_date < ...',
+        ))
+    if _LEADING_WILDCARD_RE.search(sql):
+        findings.append(Finding(
+            source,
+            "LIKE с ведущим '%': поиск по подстроке всегда читает всю таблицу",
+            'используйте поиск по префиксу или полнотекстовый индекс',
+        ))
+    return findings
+
+
+def _walk_tables(node: Any):
+    # обходит дерево EXPLAIN FORMAT=JSON, включая материализованные подзапросы
+    if isinstance(node, dict):
+        table = node.get('table')
+        if isinstance(table, dict) and 'table_name' in table:
+            yield table
+        for value in node.values():
+            yield from _walk_tables(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_tables(item)
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    """Соответствие псевдоним -> таблица для FROM/JOIN запроса."""
+    aliases = {}
+    for m in _TABLE_ALIAS_RE.finditer(sql):
+        aliases[m.group(2) or m.group(1)] = m.group(1)
+    return aliases
+
+
+def _walk_flags(node: Any, flag: str):
+    if isinstance(node, dict):
+        if node.get(flag):
+            yield node
+        for value in node.values():
+            yield from _walk_flags(value, flag)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_flags(item, flag)
+
+
+def suggest_index(table: dict[str, Any], aliases: dict[str, str]) -> str | None:
+    """Покрывающий индекс: столбцы равенства, затем диапазона, затем прочие используемые."""
+    condition = table.get('attached_condition') or ''
+    alias = table.get('table_name')
+    real_name = aliases.get(alias, alias)
+    eq_cols, range_cols = [], []
+    for m in _EQ_COLUMN_RE.finditer(condition):
+        if m.group(1) == alias and m.group(2) not in eq_cols:
+            eq_cols.append(m.group(2))
+    for m in _COLUMN_RE.finditer(condition):
+        col = m.group(2)
+        if m.group(1) == alias and col not in eq_cols and col not in range_cols:
+            range_cols.append(col)
+    if not eq_cols and not range_cols:
+        return None
+    used = [c for c in table.get('used_columns') or [] if c not in eq_cols + range_cols and c != 'id']
+    columns = eq_cols + range_cols[:1] + used
+    name = f"idx_{real_name}_{'_'.join(eq_cols + range_cols[:1])}"
+    return f"CREATE INDEX {name} ON {real_name} ({', '.join(columns)})"
+
+
+def analyze_plan(source: str, sql: str, plan: dict[str, Any], min_rows: int = 0) -> list[Finding]:
+    findings = []
+    aliases = table_aliases(sql)
+    for table in _walk_tables(plan):
+        access = table.get('access_type')
+        rows = int(table.get('rows_examined_per_scan') or 0)
+        if access in ('ALL', 'index') and rows >= min_rows:
+            kind = 'полный скан таблицы' if access == 'ALL' else 'полный скан индекса'
+            findings.append(Finding(
+                source,
+                f"{kind} {table.get('table_name')} (~{rows} строк)",
+                suggest_index(table, aliases),
+            ))
+    for _ in _walk_flags(plan, 'using_filesort'):
+        findings.append(Finding(source, 'сортировка filesort',
+                                'добавьте индекс, совпадающий с ORDER BY/GROUP BY'))
+    for _ in _walk_flags(plan, 'using_temporary_table'):
+        findings.append(Finding(source, 'временная таблица для GROUP BY/DISTINCT',
+                                'индекс по столбцам группировки позволяет обойтись без нее'))
+    return findings
+
+
+def _sample_params(sql: str, defaults: dict[str, Any], overrides: dict[str, str]) -> dict[str, Any] | None:
+    names = _PLACEHOLDER_RE.findall(sql)
+    if not names:
+        return None
+    params = {}
+    for name in names:
+        if name in overrides:
+            params[name] = overrides[name]
+        elif name in defaults:
+            params[name] = defaults[name]
+        else:
+            params[name] = SAMPLE_PARAMS.get(name, '')
+    return params
+
+
+def collect_queries(app) -> list[tuple[str, str, dict[str, Any]]]:
+    """Все запросы приложения: (источник, SQL, значения параметров по умолчанию)."""
+    from blueprints.query import provider
+    from blueprints.reports.registry import get_registry
+
+    queries = []
+    for name, spec in sorted(provider.catalog.items()):
+        defaults = {p.name: p.default for p in spec.params}
+        for i, stmt in enumerate(spec.statements):
+            suffix = f'#{i + 1}' if i else ''
+            queries.append((f'sql/{name}{suffix}', stmt, defaults))
+    for report in get_registry(app.config['REPORTS_CONFIG_PATH']).all():
+        defaults = {p['name']: p.get('default') for p in report.get('params') or [] if 'name' in p}
+        queries.append((f"report/{report.get('id')}", report.get('sql') or '', defaults))
+    return queries
+
+
+def lint(app, use_db: bool = True, overrides: dict[str, str] | None = None,
+         min_rows: int = 0) -> list[QueryReport]:
+    from models.db import DBContextManager
+
+    overrides = overrides or {}
+    reports = []
+    with (DBContextManager(app.config) if use_db else nullcontext()) as db:
+        for source, sql, defaults in collect_queries(app):
+            report = QueryReport(source, static_checks(source, sql))
+            if db is not None and sql.lstrip().upper().startswith('SELECT'):
+                params = _sample_params(sql, defaults, overrides)
+                try:
+                    rows = db.select('EXPLAIN FORMAT=JSON ' + sql.rstrip().rstrip(';'), params)
+                    plan = json.loads(next(iter(rows[0].values())))
+                    report.findings.extend(analyze_plan(source, sql, plan, min_rows))
+                except Exception as exc:
+                    report.error = str(exc)
+            reports.append(report)
+    return reports
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='EXPLAIN-проверка SQL-шаблонов и отчетов')
+    parser.add_argument('--no-db', action='store_true', help='без обращения к базе, только текст SQL')
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=VALUE',
+                        help='значение параметра для EXPLAIN (можно несколько)')
+    parser.add_argument('--min-rows', type=int, default=0,
+                        help='не сообщать о полных сканах таблиц меньше N строк')
+    parser.add_argument('--json', action='store_true', help='вывод в JSON')
+    args = parser.parse_args(argv)
+
+    overrides = dict(p.split('=', 1) for p in args.param if '=' in p)
+
+    from app import create_app
+
+    reports = lint(create_app(), use_db=not args.no_db, overrides=overrides, min_rows=args.min_rows)
+    issues = sum(len(r.findings) + (1 if r.error else 0) for r in reports)
+
+    if args.json:
+        json.dump([
+            {
+                'source': r.source,
+                'error': r.error,
+                'findings': [{'message': f.message, 'suggestion': f.suggestion} for f in r.findings],
+            }
+            for r in reports
+        ], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for r in reports:
+            if not r.findings and not r.error:
+                print(f'OK    {r.source}')
+                continue
+            print(f'WARN  {r.source}')
+            if r.error:
+                print(f'      ошибка EXPLAIN: {r.error}')
+            for f in r.findings:
+                print(f'      - {f.message}')
+                if f.suggestion:
+                    print(f'        → {f.suggestion}')
+        print(f'\nЗамечаний: {issues}')
+    return 1 if issues else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())